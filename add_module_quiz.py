@@ -95,7 +95,7 @@ async def add_module_quiz():
                 "explanation": "La méthodologie AutoJust repose sur 5 piliers : Systématisation, Technologie, Traçabilité, Transparence et Expertise."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.quizzes.insert_one(module_quiz)
@@ -161,7 +161,7 @@ async def add_preliminary_quizzes():
                 "explanation": "Une reconversion professionnelle montre un engagement sérieux dans ce métier."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     # Mechanical Knowledge Quiz (authentication required)
@@ -328,7 +328,7 @@ async def add_preliminary_quizzes():
                 "explanation": "L'alternateur produit l'électricité nécessaire au fonctionnement du véhicule et recharge la batterie."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     # Insert both quizzes
@@ -488,8 +488,8 @@ async def add_preliminary_quizzes():
             </div>
         </div>
         """,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.modules.insert_one(module2_remedial)
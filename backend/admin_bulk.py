@@ -0,0 +1,158 @@
+"""
+Actions admin groupées (validation des élèves, codes Weproov, inspections, rappels prospects).
+
+Une requête porte une liste d'actions typées. Les actions sont converties en
+``UpdateOne`` et envoyées par ``bulk_write`` (un lot par suite d'actions sur la
+même collection) au lieu d'un aller-retour par élève :
+
+- ``ordered=True`` : arrêt à la première action en échec, les suivantes sont « skipped » ;
+- ``ordered=False`` : toutes les actions valides sont appliquées.
+
+Chaque action reçoit un résultat (``ok``, ``not_found``, ``invalid``, ``error``,
+``skipped``). L'existence des cibles est vérifiée par un ``$in`` par collection,
+ce qui permet de distinguer les ``not_found`` que ``bulk_write`` ne détaille pas.
+"""
+from datetime import datetime, timezone
+from typing import Annotated, Any, Dict, List, Literal, Set, Tuple, Union
+
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from prospects import CALLBACK_STATUSES
+
+MAX_ACTIONS = 1000
+
+
+class ValidateStudentAction(BaseModel):
+    type: Literal["validate_student"]
+    user_id: str
+    validated: bool
+    notes: str = ""
+
+
+class WeproovCodeAction(BaseModel):
+    type: Literal["set_weproov_code"]
+    user_id: str
+    code: str
+
+
+class ValidateInspectionAction(BaseModel):
+    type: Literal["validate_inspection"]
+    user_id: str
+    validated: bool
+    notes: str = ""
+
+
+class ProspectCallbackAction(BaseModel):
+    type: Literal["update_prospect_callback"]
+    prospect_id: str
+    callback_status: str
+    callback_notes: str = ""
+
+
+BulkAction = Annotated[
+    Union[ValidateStudentAction, WeproovCodeAction, ValidateInspectionAction, ProspectCallbackAction],
+    Field(discriminator="type")
+]
+
+
+class BulkAdminRequest(BaseModel):
+    actions: List[BulkAction] = Field(..., min_length=1, max_length=MAX_ACTIONS)
+    ordered: bool = False
+
+
+def _operation(action: BaseModel) -> Tuple[str, str, UpdateOne]:
+    """(collection, id cible, opération) d'une action"""
+    if isinstance(action, ValidateStudentAction):
+        update = {"is_validated": action.validated, "validation_pending": False, "validation_notes": action.notes}
+        return "users", action.user_id, UpdateOne({"id": action.user_id}, {"$set": update})
+    if isinstance(action, WeproovCodeAction):
+        return "users", action.user_id, UpdateOne({"id": action.user_id}, {"$set": {"weproov_code": action.code}})
+    if isinstance(action, ValidateInspectionAction):
+        update = {"inspection_validated": action.validated, "inspection_notes": action.notes}
+        return "users", action.user_id, UpdateOne({"id": action.user_id}, {"$set": update})
+    update = {
+        "callback_status": action.callback_status,
+        "callback_notes": action.callback_notes,
+        "callback_updated_at": datetime.now(timezone.utc),
+    }
+    return "pre_registration_questionnaires", action.prospect_id, UpdateOne({"id": action.prospect_id}, {"$set": update})
+
+
+def _validate(action: BaseModel) -> str:
+    if isinstance(action, ProspectCallbackAction) and action.callback_status not in CALLBACK_STATUSES:
+        return f"Statut invalide. Valeurs possibles: {CALLBACK_STATUSES}"
+    return ""
+
+
+async def _existing_ids(db, targets: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    existing = {}
+    for collection, ids in targets.items():
+        existing[collection] = {
+            doc["id"] async for doc in db[collection].find({"id": {"$in": list(ids)}}, {"_id": 0, "id": 1})
+        }
+    return existing
+
+
+async def run_bulk_actions(db, request: BulkAdminRequest) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """Applique les actions ; retourne les résultats par action et les user_id modifiés"""
+    results: List[Dict[str, Any]] = [{"index": i, "type": a.type, "status": "skipped"} for i, a in enumerate(request.actions)]
+    planned = [_operation(action) for action in request.actions]
+
+    targets: Dict[str, Set[str]] = {}
+    for collection, target_id, _ in planned:
+        targets.setdefault(collection, set()).add(target_id)
+    existing = await _existing_ids(db, targets)
+
+    # Lots : un par collection (non ordonné) ou par suite d'actions consécutives sur la même collection (ordonné)
+    batches: List[Tuple[str, List[int]]] = []
+    for index, (action, (collection, target_id, _)) in enumerate(zip(request.actions, planned)):
+        error = _validate(action)
+        if error:
+            results[index].update(status="invalid", detail=error)
+        elif target_id not in existing[collection]:
+            results[index].update(status="not_found")
+        else:
+            if request.ordered and batches and batches[-1][0] == collection:
+                batches[-1][1].append(index)
+            elif request.ordered:
+                batches.append((collection, [index]))
+            else:
+                group = next((b for b in batches if b[0] == collection), None)
+                if group is None:
+                    batches.append((collection, [index]))
+                else:
+                    group[1].append(index)
+            continue
+        if request.ordered:
+            break
+
+    touched_users: Set[str] = set()
+    for collection, indexes in batches:
+        failed: Dict[int, str] = {}
+        try:
+            await db[collection].bulk_write([planned[i][2] for i in indexes], ordered=request.ordered)
+        except BulkWriteError as e:
+            failed = {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+
+        # En mode ordonné, MongoDB s'arrête à la première erreur du lot
+        executed = min(failed) + 1 if request.ordered and failed else len(indexes)
+        for position, index in enumerate(indexes[:executed]):
+            if position in failed:
+                results[index].update(status="error", detail=failed[position])
+            else:
+                results[index]["status"] = "ok"
+                if collection == "users":
+                    touched_users.add(planned[index][1])
+        if request.ordered and failed:
+            break
+
+    return results, touched_users
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
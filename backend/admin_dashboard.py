@@ -0,0 +1,83 @@
+"""
+Tableau de bord admin composite.
+
+Les sections du tableau de bord (analytics, derniers inscrits, dernières
+transactions, validations en attente, chat...) sont indépendantes : elles sont
+calculées en parallèle avec ``asyncio.gather``, chacune avec son propre délai.
+Une section lente ou en erreur est renvoyée à ``None`` et listée dans
+``partial`` au lieu de bloquer toute la page.
+
+Le résultat est partagé pendant quelques secondes : plusieurs admins qui
+rafraîchissent en même temps attendent le même calcul.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Section = Callable[[], Awaitable[Any]]
+
+
+async def _run_section(name: str, section: Section, timeout: float):
+    try:
+        return await asyncio.wait_for(section(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Dashboard section '{name}' exceeded {timeout}s")
+        raise
+    except Exception as e:
+        logger.error(f"Dashboard section '{name}' failed: {e}")
+        raise
+
+
+async def gather_sections(sections: Dict[str, Section], timeout: float) -> Dict[str, Any]:
+    """Exécute les sections en parallèle ; résultat partiel si certaines échouent ou expirent"""
+    names = list(sections)
+    outcomes = await asyncio.gather(
+        *(_run_section(name, sections[name], timeout) for name in names),
+        return_exceptions=True
+    )
+    result: Dict[str, Any] = {"partial": []}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            result[name] = None
+            result["partial"].append(name)
+        else:
+            result[name] = outcome
+    return result
+
+
+class SharedResult:
+    """Résultat réutilisé pendant ``ttl`` secondes ; les appels concurrents partagent le calcul en cours"""
+
+    def __init__(self, compute: Callable[[], Awaitable[Dict[str, Any]]], ttl: float = 5.0):
+        self.compute = compute
+        self.ttl = ttl
+        self._value: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self.computations = 0
+        self.shared = 0
+
+    async def get(self) -> Dict[str, Any]:
+        if self._value is not None and time.monotonic() - self._computed_at < self.ttl:
+            self.shared += 1
+            return self._value
+        if self._inflight is not None:
+            self.shared += 1
+            return await asyncio.shield(self._inflight)
+
+        self._inflight = asyncio.get_running_loop().create_task(self.compute())
+        try:
+            value = await asyncio.shield(self._inflight)
+        finally:
+            self._inflight = None
+        self.computations += 1
+        # Un résultat partiel n'est pas gardé : le prochain rafraîchissement retente
+        if not value.get("partial"):
+            self._value, self._computed_at = value, time.monotonic()
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {"computations": self.computations, "shared": self.shared, "ttl_seconds": self.ttl}
@@ -0,0 +1,270 @@
+"""
+Compteurs d'analytics matérialisés.
+
+Les chemins d'écriture (inscription, paiement, complétion de module)
+incrémentent des compteurs au lieu que le tableau de bord rescanne les
+collections :
+
+- ``analytics_daily`` : un document par jour UTC (``_id = "AAAA-MM-JJ"``) ;
+- ``analytics_totals`` : un document ``_id = "totals"`` avec les cumuls et les
+  complétions par module.
+
+Le tableau de bord lit le document des cumuls et au plus ~31 documents
+journaliers. Les compteurs se reconstruisent depuis les collections brutes :
+
+    python analytics_store.py backfill
+
+Au démarrage du serveur, si les cumuls n'ont jamais été reconstruits (nouvelle
+base, premier déploiement sur une base existante), la reconstruction est lancée
+en tâche de fond (``start_seed``) : le tableau de bord n'affiche pas de cumuls
+partant de zéro.
+
+La reconstruction tourne pendant que les requêtes continuent d'incrémenter les
+compteurs. Elle ne réécrit donc que les jours terminés (qui ne reçoivent plus
+d'incréments) et corrige les cumuls par ``$inc`` de l'écart constaté, sans
+jamais les remplacer ; le document du jour reste alimenté en direct. Un bail
+dans ``job_state`` empêche deux reconstructions simultanées.
+"""
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+TOTALS_ID = "totals"
+COUNTERS = ("registrations", "purchases", "revenue", "completions")
+JOB_ID = "analytics_backfill"
+
+
+def day_key(moment: datetime) -> str:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def _day_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+
+
+class AnalyticsStore:
+    def __init__(self, db, lease_seconds: float = 600.0):
+        self.db = db
+        self.daily = db.analytics_daily
+        self.totals = db.analytics_totals
+        self.lease_seconds = lease_seconds
+        self._owner = str(uuid.uuid4())
+        self._seed_task: Optional[asyncio.Task] = None
+
+    async def _record(self, increments: Dict[str, Any], at: Optional[datetime] = None,
+                      totals_only: Optional[Dict[str, Any]] = None):
+        at = at or datetime.now(timezone.utc)
+        if increments:
+            await self.daily.update_one(
+                {"_id": day_key(at)},
+                {"$inc": increments, "$setOnInsert": {"day": _day_start(at)}},
+                upsert=True
+            )
+        await self.totals.update_one(
+            {"_id": TOTALS_ID},
+            {"$inc": {**increments, **(totals_only or {})}},
+            upsert=True
+        )
+
+    async def record_registration(self, at: Optional[datetime] = None):
+        await self._record({"registrations": 1}, at)
+
+    async def record_purchase(self, amount: float, at: Optional[datetime] = None):
+        """Vente encaissée ; ``paid_users`` suit uniquement le passage de has_purchased"""
+        await self._record({"purchases": 1, "revenue": amount}, at)
+
+    async def record_paid_access_change(self, granted: bool):
+        """Passage de has_purchased à vrai (paiement, admin) ou à faux (admin)"""
+        await self._record({}, totals_only={"paid_users": 1 if granted else -1})
+
+    async def record_completion(self, module_id: str, at: Optional[datetime] = None):
+        await self._record({"completions": 1}, at, totals_only={f"module_completions.{module_id}": 1})
+
+    async def summary(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Cumuls + compteurs du jour, des 7 derniers jours et du mois en cours"""
+        now = now or datetime.now(timezone.utc)
+        today = _day_start(now)
+        week_ago = today - timedelta(days=7)
+        month_start = today.replace(day=1)
+
+        totals = await self.totals.find_one({"_id": TOTALS_ID}) or {}
+        buckets = await self.daily.find({"day": {"$gte": min(week_ago, month_start)}}).to_list(None)
+
+        def window(start: datetime, field: str) -> float:
+            return sum(b.get(field, 0) for b in buckets if b["day"] >= start)
+
+        return {
+            "totals": {
+                **{name: totals.get(name, 0) for name in COUNTERS},
+                "paid_users": totals.get("paid_users", 0),
+                "module_completions": totals.get("module_completions", {}),
+            },
+            "today": {name: window(today, name) for name in COUNTERS},
+            "week": {name: window(week_ago, name) for name in COUNTERS},
+            "month": {name: window(month_start, name) for name in COUNTERS},
+        }
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_state.find_one_and_update(
+                {"_id": JOB_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_owner": self._owner}, {"lease_until": None}]},
+                {"$set": {"lease_owner": self._owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except PyMongoError:
+            # Upsert concurrent sur le même _id : une autre reconstruction est en cours
+            return False
+
+    async def _release_lease(self):
+        await self.db.job_state.update_one(
+            {"_id": JOB_ID, "lease_owner": self._owner},
+            {"$set": {"lease_until": None, "last_run_at": datetime.now(timezone.utc)}}
+        )
+
+    async def backfill(self, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reconstruit les compteurs depuis users, payment_transactions et module_progress.
+
+        Retourne None si une autre reconstruction détient le bail.
+        """
+        if not await self._acquire_lease():
+            return None
+        try:
+            return await self._backfill(_day_start(now or datetime.now(timezone.utc)))
+        finally:
+            await self._release_lease()
+
+    async def _backfill(self, cutoff: datetime) -> Dict[str, Any]:
+        # Jours terminés uniquement : le jour en cours reçoit encore des incréments
+        buckets: Dict[str, Dict[str, Any]] = {}
+
+        def bucket(key: str) -> Dict[str, Any]:
+            if key not in buckets:
+                day = datetime.strptime(key, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                buckets[key] = {"_id": key, "day": day, **{name: 0 for name in COUNTERS}}
+            return buckets[key]
+
+        def by_day(field: str):
+            return {"$dateToString": {"format": "%Y-%m-%d", "date": field}}
+
+        async for row in self.db.users.aggregate([
+            {"$match": {"created_at": {"$type": "date", "$lt": cutoff}}},
+            {"$group": {"_id": by_day("$created_at"), "n": {"$sum": 1}}}
+        ]):
+            bucket(row["_id"])["registrations"] = row["n"]
+
+        async for row in self.db.payment_transactions.aggregate([
+            {"$match": {"payment_status": "completed", "updated_at": {"$type": "date", "$lt": cutoff}}},
+            {"$group": {"_id": by_day("$updated_at"), "n": {"$sum": 1}, "revenue": {"$sum": "$amount"}}}
+        ]):
+            bucket(row["_id"])["purchases"] = row["n"]
+            bucket(row["_id"])["revenue"] = row["revenue"]
+
+        completed_on = {"$ifNull": ["$completed_at", "$created_at"]}
+        async for row in self.db.module_progress.aggregate([
+            {"$match": {"completed": True}},
+            {"$match": {"$expr": {"$lt": [completed_on, cutoff]}}},
+            {"$group": {"_id": by_day(completed_on), "n": {"$sum": 1}}}
+        ]):
+            if row["_id"]:
+                bucket(row["_id"])["completions"] += row["n"]
+
+        # Écart entre les jours terminés stockés et reconstruits : appliqué aux cumuls par $inc
+        stored = await self.daily.find({"day": {"$lt": cutoff}}).to_list(None)
+        delta: Dict[str, Any] = {
+            name: sum(b[name] for b in buckets.values()) - sum(b.get(name, 0) for b in stored)
+            for name in COUNTERS
+        }
+        if buckets:
+            await self.daily.bulk_write([ReplaceOne({"_id": k}, b, upsert=True) for k, b in buckets.items()])
+        await self.daily.delete_many({"day": {"$lt": cutoff}, "_id": {"$nin": list(buckets)}})
+
+        # Compteurs d'état (non datés) : écart entre l'état réel et le cumul, lu juste avant
+        totals = await self.totals.find_one({"_id": TOTALS_ID}) or {}
+        paid_users = await self.db.users.count_documents({"has_purchased": True})
+        module_completions: Dict[str, int] = {}
+        async for row in self.db.module_progress.aggregate([
+            {"$match": {"completed": True, "module_id": {"$ne": None}}},
+            {"$group": {"_id": "$module_id", "n": {"$sum": 1}}}
+        ]):
+            module_completions[row["_id"]] = row["n"]
+        delta["paid_users"] = paid_users - totals.get("paid_users", 0)
+        stored_modules = totals.get("module_completions", {})
+        for module_id in set(module_completions) | set(stored_modules):
+            delta[f"module_completions.{module_id}"] = module_completions.get(module_id, 0) - stored_modules.get(module_id, 0)
+
+        update: Dict[str, Any] = {"$set": {"rebuilt_at": datetime.now(timezone.utc)}}
+        corrections = {k: v for k, v in delta.items() if v}
+        if corrections:
+            update["$inc"] = corrections
+        await self.totals.update_one({"_id": TOTALS_ID}, update, upsert=True)
+        return {"days": len(buckets), **delta}
+
+    async def seed_if_missing(self) -> Optional[Dict[str, Any]]:
+        """Reconstruit les compteurs s'ils ne l'ont jamais été ; None si rien à faire ou bail détenu"""
+        totals = await self.totals.find_one({"_id": TOTALS_ID})
+        if totals and totals.get("rebuilt_at"):
+            return None
+        return await self.backfill()
+
+    async def _seed(self):
+        try:
+            result = await self.seed_if_missing()
+            if result is not None:
+                logger.info(f"Analytics counters seeded: {result}")
+        except Exception as e:
+            logger.error(f"Analytics seeding failed: {e}")
+
+    def start_seed(self):
+        if self._seed_task is None:
+            self._seed_task = asyncio.get_running_loop().create_task(self._seed())
+
+    async def stop(self):
+        if self._seed_task is not None:
+            self._seed_task.cancel()
+            try:
+                await self._seed_task
+            except asyncio.CancelledError:
+                pass
+            self._seed_task = None
+
+
+async def main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True, tzinfo=timezone.utc)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if command == "backfill":
+            result = await AnalyticsStore(db).backfill()
+            if result is None:
+                print("⏳ Reconstruction déjà en cours sur un autre processus")
+                return 1
+            print(f"✅ Analytics reconstruits (écarts corrigés) : {result}")
+            return 0
+
+        print("Usage: python analytics_store.py backfill")
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "backfill")))
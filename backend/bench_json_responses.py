@@ -0,0 +1,102 @@
+"""
+Benchmark du chemin de réponse JSON : chemin FastAPI par défaut
+(revalidation du response_model + jsonable_encoder + json.dumps) contre
+fast_response (orjson, sans revalidation).
+
+    python bench_json_responses.py            # 10 000 lignes
+    python bench_json_responses.py 50000      # taille personnalisée
+
+Les documents sont générés en mémoire avec la forme de ceux renvoyés par
+MongoDB : aucune base n'est nécessaire, seul le coût de sérialisation est mesuré.
+"""
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from fast_json import TrustedProjection, dumps
+from models import Module
+
+
+def make_modules(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Module {i}",
+            "description": "Diagnostic et inspection du véhicule " * 3,
+            "content": "<p>Contenu du module</p>" * 200,
+            "order_index": i,
+            "is_free": i == 0,
+            "is_published": True,
+            "duration_minutes": 45,
+            "created_at": now - timedelta(days=i),
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def make_admin_users(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "email": f"eleve{i}@example.com",
+            "username": f"eleve{i}",
+            "full_name": f"Élève {i}",
+            "is_admin": False,
+            "has_purchased": i % 3 == 0,
+            "created_at": now - timedelta(minutes=i),
+            "last_login": now,
+            "progress": {"completed_modules": i % 12, "total_modules": 12, "completion_percentage": (i % 12) / 12 * 100},
+        }
+        for i in range(count)
+    ]
+
+
+def default_render(content) -> bytes:
+    """Équivalent de JSONResponse.render après jsonable_encoder"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def timed(label: str, func, repeat: int = 3) -> float:
+    best = min(_run_once(func) for _ in range(repeat))
+    print(f"  {label:<45} {best * 1000:9.1f} ms")
+    return best
+
+
+def _run_once(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(count: int):
+    modules = make_modules(count)
+    adapter = TypeAdapter(List[Module])
+    projection = TrustedProjection(Module)
+
+    print(f"GET /modules ({count} modules)")
+    slow = timed("response_model + jsonable_encoder", lambda: default_render(adapter.validate_python(modules)))
+    fast = timed("fast_response (projection de confiance)", lambda: dumps(projection.prepare_many(modules)))
+    print(f"  -> x{slow / fast:.1f}\n")
+
+    users = make_admin_users(count)
+    payload = {"users": users, "pagination": {"current_page": 1, "total_pages": 1, "total_users": count, "users_per_page": count}}
+
+    print(f"GET /admin/users ({count} utilisateurs)")
+    slow = timed("jsonable_encoder + json.dumps", lambda: default_render(payload))
+    fast = timed("fast_response", lambda: dumps(payload))
+    print(f"  -> x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
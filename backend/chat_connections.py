@@ -0,0 +1,188 @@
+"""
+Registre des connexions WebSocket du chat privé.
+
+Les connexions sont indexées par utilisateur et par rôle : un message destiné
+aux admins n'est envoyé qu'aux sockets des admins (jamais aux élèves).
+
+Chaque socket a sa propre tâche d'écriture et une file d'envoi bornée :
+``send_to_user`` / ``send_to_admins`` ne font que déposer le message (sérialisé
+une seule fois) dans les files, sans jamais attendre un client lent. Un client
+dont la file déborde est déconnecté (« slow consumer »), de même qu'une socket
+dont un envoi dépasse ``send_timeout``.
+
+La tâche d'écriture envoie un ping serveur (``{"type": "ping"}``) après
+``ping_interval`` secondes sans message et ferme la connexion si le client n'a
+rien envoyé depuis ``idle_timeout`` secondes (le client envoie « ping » toutes
+les 30 s).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+PING_FRAME = dumps({"type": "ping"}).decode("utf-8")
+# Codes de fermeture : 1011 erreur d'envoi, 1013 client trop lent, 1001 inactif
+CLOSE_SEND_FAILED = 1011
+CLOSE_SLOW_CONSUMER = 1013
+CLOSE_IDLE = 1001
+
+
+class ChatConnection:
+    def __init__(self, websocket: WebSocket, user_id: str, is_admin: bool, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_received = time.monotonic()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def touch(self):
+        """À appeler à chaque message reçu du client"""
+        self.last_received = time.monotonic()
+
+
+class ConnectionRegistry:
+    def __init__(self, send_timeout: float = 2.0, queue_size: int = 100,
+                 ping_interval: float = 25.0, idle_timeout: float = 75.0):
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        # user_id -> connexions ouvertes
+        self._connections: Dict[str, List[ChatConnection]] = {}
+        self._admins: Set[str] = set()
+        self.peak_connections = 0
+        self.sends = 0
+        self.failed_sends = 0
+        self.evicted_slow = 0
+        self.closed_idle = 0
+        self.pings = 0
+        self.max_queue_depth = 0
+        self.fanouts = 0
+        self.fanout_seconds = 0.0
+        self.max_fanout_seconds = 0.0
+
+    async def connect(self, websocket: WebSocket, user_id: str, is_admin: bool = False) -> ChatConnection:
+        await websocket.accept()
+        connection = ChatConnection(websocket, user_id, is_admin, self.queue_size)
+        self._connections.setdefault(user_id, []).append(connection)
+        if is_admin:
+            self._admins.add(user_id)
+        self.peak_connections = max(self.peak_connections, self.connection_count())
+        connection.writer = asyncio.get_running_loop().create_task(self._write(connection))
+        return connection
+
+    def disconnect(self, connection: ChatConnection):
+        """Retire la connexion du registre et arrête sa tâche d'écriture (idempotent)"""
+        connection.closed = True
+        connections = self._connections.get(connection.user_id)
+        if connections is not None:
+            if connection in connections:
+                connections.remove(connection)
+            if not connections:
+                del self._connections[connection.user_id]
+                self._admins.discard(connection.user_id)
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _close(self, connection: ChatConnection, code: int):
+        self.disconnect(connection)
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self._connections.values())
+
+    def enqueue(self, connection: ChatConnection, text: str) -> bool:
+        """Dépose un message dans la file de la connexion ; évince le client si elle est pleine"""
+        if connection.closed:
+            return False
+        try:
+            connection.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.evicted_slow += 1
+            logger.info(f"Evicting slow chat consumer {connection.user_id}")
+            # Retrait immédiat du registre ; la fermeture de la socket se fait en tâche de fond
+            self.disconnect(connection)
+            asyncio.get_running_loop().create_task(self._close(connection, CLOSE_SLOW_CONSUMER))
+            return False
+        self.max_queue_depth = max(self.max_queue_depth, connection.queue.qsize())
+        return True
+
+    async def _write(self, connection: ChatConnection):
+        while not connection.closed:
+            try:
+                text = await asyncio.wait_for(connection.queue.get(), self.ping_interval)
+            except asyncio.TimeoutError:
+                if time.monotonic() - connection.last_received > self.idle_timeout:
+                    self.closed_idle += 1
+                    await self._close(connection, CLOSE_IDLE)
+                    return
+                text = PING_FRAME
+                self.pings += 1
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(text), self.send_timeout)
+                self.sends += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Dropping chat socket after failed send: {e!r}")
+                self.failed_sends += 1
+                await self._close(connection, CLOSE_SEND_FAILED)
+                return
+
+    def _fanout(self, connections: List[ChatConnection], message: Dict[str, Any]) -> int:
+        """Dépose le message dans chaque file ; retourne le nombre de connexions servies"""
+        if not connections:
+            return 0
+        started = time.monotonic()
+        text = dumps(message).decode("utf-8")
+        delivered = sum(self.enqueue(connection, text) for connection in connections)
+        elapsed = time.monotonic() - started
+        self.fanouts += 1
+        self.fanout_seconds += elapsed
+        self.max_fanout_seconds = max(self.max_fanout_seconds, elapsed)
+        return delivered
+
+    async def send_to_user(self, user_id: str, message: Dict[str, Any]) -> int:
+        """Envoie un message à toutes les connexions d'un utilisateur"""
+        return self._fanout(list(self._connections.get(user_id, ())), message)
+
+    async def send_to_admins(self, message: Dict[str, Any]) -> int:
+        """Envoie un message aux admins connectés uniquement"""
+        return self._fanout([c for user_id in self._admins for c in self._connections.get(user_id, ())], message)
+
+    async def close_all(self):
+        for connections in list(self._connections.values()):
+            for connection in list(connections):
+                await self._close(connection, CLOSE_IDLE)
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [c.queue.qsize() for connections in self._connections.values() for c in connections]
+        return {
+            "connections": len(depths),
+            "users": len(self._connections),
+            "admins": len(self._admins),
+            "peak_connections": self.peak_connections,
+            "queued_messages": sum(depths),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_size": self.queue_size,
+            "sends": self.sends,
+            "failed_sends": self.failed_sends,
+            "evicted_slow_consumers": self.evicted_slow,
+            "closed_idle": self.closed_idle,
+            "server_pings": self.pings,
+            "fanouts": self.fanouts,
+            "avg_fanout_ms": round(self.fanout_seconds / self.fanouts * 1000, 3) if self.fanouts else 0.0,
+            "max_fanout_ms": round(self.max_fanout_seconds * 1000, 3),
+            "send_timeout_seconds": self.send_timeout,
+        }
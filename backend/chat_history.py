@@ -0,0 +1,77 @@
+"""
+Lecture paginée des messages du chat privé.
+
+Les messages sont ordonnés par ``(created_at, id)`` (index
+conversation_id / created_at / id) et lus par clé au lieu d'une fenêtre fixe :
+
+- sans paramètre : les ``limit`` messages les plus récents ;
+- ``before`` / ``after`` : curseurs opaques (voir pagination.py) renvoyés dans
+  les en-têtes ``X-Before-Cursor`` / ``X-After-Cursor`` ;
+- ``since`` : id du dernier message reçu par le client ; seuls les messages
+  plus récents sont renvoyés (resynchronisation après reconnexion).
+
+Les messages sont toujours renvoyés du plus ancien au plus récent.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+MESSAGE_SORT = [("created_at", 1), ("id", 1)]
+NEWEST_FIRST = [("created_at", -1), ("id", -1)]
+MAX_LIMIT = 500
+
+
+def _cursor(message: Dict[str, Any]) -> str:
+    return encode_cursor({"created_at": message["created_at"], "id": message["id"]})
+
+
+async def fetch_messages(
+    db,
+    conversation_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Retourne (messages, en-têtes de curseurs). Lève InvalidCursor si un paramètre est invalide."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    collection = db.private_chat_messages
+    query: Dict[str, Any] = {"conversation_id": conversation_id}
+
+    if since:
+        anchor = await collection.find_one(
+            {"conversation_id": conversation_id, "id": since}, {"_id": 0, "created_at": 1, "id": 1}
+        )
+        if anchor is None:
+            raise InvalidCursor(f"unknown message {since}")
+        after_values = anchor
+    elif after:
+        after_values = decode_cursor(after)
+    else:
+        after_values = None
+
+    if after_values is not None:
+        # Messages plus récents, du plus ancien au plus récent
+        query.update(keyset_filter(MESSAGE_SORT, after_values))
+        messages = await collection.find(query, {"_id": 0}).sort(MESSAGE_SORT).limit(limit + 1).to_list(limit + 1)
+        has_more_after = len(messages) > limit
+        messages = messages[:limit]
+        has_more_before = True
+    else:
+        # Page la plus récente (ou précédant ``before``), lue à rebours puis remise dans l'ordre
+        if before:
+            query.update(keyset_filter(NEWEST_FIRST, decode_cursor(before)))
+        messages = await collection.find(query, {"_id": 0}).sort(NEWEST_FIRST).limit(limit + 1).to_list(limit + 1)
+        has_more_before = len(messages) > limit
+        messages = list(reversed(messages[:limit]))
+        has_more_after = bool(before)
+
+    headers = {}
+    if messages:
+        if has_more_before:
+            headers["X-Before-Cursor"] = _cursor(messages[0])
+        # Toujours fourni : point de reprise pour la page suivante ou la prochaine synchronisation
+        headers["X-After-Cursor"] = _cursor(messages[-1])
+        if has_more_after:
+            headers["X-Has-More-After"] = "true"
+    return messages, headers
@@ -0,0 +1,166 @@
+"""
+Diffusion des événements du chat entre workers.
+
+Les WebSockets d'un admin et d'un élève peuvent être ouvertes sur deux workers
+uvicorn différents. Chaque événement (nouveau message...) est donc :
+
+1. livré immédiatement aux sockets du worker qui le publie ;
+2. publié sur un canal partagé, que chaque worker écoute une seule fois pour
+   livrer l'événement à ses propres sockets (ses propres publications sont ignorées).
+
+Backends :
+
+- ``MongoCappedBackend`` : collection plafonnée (``chat_events``) lue par un
+  curseur *tailable* ; fonctionne sur un MongoDB autonome (pas de replica set
+  requis, contrairement aux change streams) ;
+- ``InMemoryBackend`` : un seul processus (tests, développement).
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class InMemoryBackend:
+    def __init__(self):
+        self._queues: List[asyncio.Queue] = []
+
+    async def publish(self, event: Dict[str, Any]):
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    async def run(self, handler: Handler):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                await handler(await queue.get())
+        finally:
+            self._queues.remove(queue)
+
+
+class MongoCappedBackend:
+    def __init__(self, db, collection: str = "chat_events", size_bytes: int = 16 * 1024 * 1024, retry_interval: float = 1.0):
+        self.db = db
+        self.name = collection
+        self.size_bytes = size_bytes
+        self.retry_interval = retry_interval
+
+    @property
+    def collection(self):
+        return self.db[self.name]
+
+    async def _ensure_collection(self):
+        try:
+            await self.db.create_collection(self.name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # déjà créée (par ce worker ou un autre)
+
+    async def publish(self, event: Dict[str, Any]):
+        await self.collection.insert_one({**event, "published_at": datetime.now(timezone.utc)})
+
+    async def run(self, handler: Handler):
+        # Reprise par position dans l'ordre naturel (ordre d'insertion) : les ObjectId générés
+        # par des workers différents ne sont pas ordonnés, un filtre _id > last_id perdrait des événements
+        last_id = None
+        started = False
+        while True:
+            try:
+                if not started:
+                    await self._ensure_collection()
+                    # Seuls les événements publiés après le démarrage du worker sont livrés
+                    last = await self.collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+                    last_id = last["_id"] if last else None
+                    started = True
+                # last_id évincé de la collection plafonnée : tout ce qui reste lui est postérieur
+                skipping = last_id is not None and await self.collection.find_one({"_id": last_id}, {"_id": 1}) is not None
+                cursor = self.collection.find({}, {"published_at": 0}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for event in cursor:
+                        event_id = event.pop("_id")
+                        if skipping:
+                            skipping = event_id != last_id
+                            continue
+                        last_id = event_id
+                        await handler(event)
+                    if skipping:
+                        # last_id évincé entre la vérification et l'ouverture du curseur
+                        last_id = None
+                        break
+            except PyMongoError as e:
+                logger.warning(f"Chat events cursor interrupted: {e}")
+            # Mongo injoignable, curseur mort (collection vide, failover...) : on réessaie
+            await asyncio.sleep(self.retry_interval)
+
+
+class ChatPubSub:
+    """Publie les événements du chat et les livre au registre de connexions local"""
+
+    def __init__(self, backend, registry):
+        self.backend = backend
+        self.registry = registry
+        self.worker_id = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.publish_errors = 0
+        self.received = 0
+
+    async def _deliver(self, event: Dict[str, Any]):
+        if event["target"] == "admins":
+            await self.registry.send_to_admins(event["message"])
+        else:
+            await self.registry.send_to_user(event["user_id"], event["message"])
+
+    async def _publish(self, event: Dict[str, Any]):
+        await self._deliver(event)
+        try:
+            await self.backend.publish({**event, "origin": self.worker_id})
+            self.published += 1
+        except Exception as e:
+            # Les sockets locales ont reçu l'événement ; les autres workers le rattraperont au rechargement
+            self.publish_errors += 1
+            logger.error(f"Chat event publish failed: {e}")
+
+    async def publish_to_user(self, user_id: str, message: Dict[str, Any]):
+        await self._publish({"target": "user", "user_id": user_id, "message": message})
+
+    async def publish_to_admins(self, message: Dict[str, Any]):
+        await self._publish({"target": "admins", "message": message})
+
+    async def _handle(self, event: Dict[str, Any]):
+        if event.get("origin") == self.worker_id:
+            return
+        self.received += 1
+        try:
+            await self._deliver(event)
+        except Exception as e:
+            logger.error(f"Chat event delivery failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.backend.run(self._handle))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "published": self.published,
+            "publish_errors": self.publish_errors,
+            "received": self.received,
+        }
@@ -0,0 +1,105 @@
+"""
+État de lecture du chat privé par « filigrane » (watermark).
+
+Les messages ne sont plus modifiés à la lecture. Chaque conversation porte,
+pour chaque participant, le dernier message lu (``read_by_admin`` /
+``read_by_student`` : id + created_at) ainsi que le dernier message envoyé par
+chaque côté (``last_student_message`` / ``last_admin_message``).
+
+- un message est lu si sa clé ``(created_at, id)`` est inférieure ou égale au
+  filigrane du destinataire ;
+- ouvrir une conversation coûte une seule écriture conditionnelle, et aucune si
+  le lecteur est déjà à jour ;
+- les compteurs ``unread_by_*`` restent sur la conversation (lecture O(1) des
+  listes) et sont remis à zéro en même temps que le filigrane avance ;
+  ``mark_read`` retourne la valeur remise à zéro pour ajuster le compteur
+  global des admins (``chat_unread``).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+SENDER_OF = {"admin": "student", "student": "admin"}
+
+
+def message_ref(message: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": message["id"], "created_at": message["created_at"]}
+
+
+def last_message_field(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Champ à ``$set`` sur la conversation à l'envoi d'un message"""
+    return {f"last_{message['sender_type']}_message": message_ref(message)}
+
+
+async def mark_read(db, conversation: Dict[str, Any], reader: str) -> int:
+    """Avance le filigrane de ``reader`` jusqu'au dernier message de l'autre participant.
+
+    Retourne le nombre de messages non lus remis à zéro (0 si aucune écriture).
+    """
+    sender = SENDER_OF[reader]
+    counter, watermark_field, last_field = f"unread_by_{reader}", f"read_by_{reader}", f"last_{sender}_message"
+
+    last = conversation.get(last_field)
+    watermark = conversation.get(watermark_field) or {}
+    if last is None:
+        # Conversation antérieure aux filigranes : dernier message de l'expéditeur lu en base
+        if not conversation.get(counter):
+            return 0
+        last = await db.private_chat_messages.find_one(
+            {"conversation_id": conversation["id"], "sender_type": sender},
+            {"_id": 0, "id": 1, "created_at": 1},
+            sort=[("created_at", -1), ("id", -1)]
+        )
+        if last is None:
+            return 0
+        condition: Dict[str, Any] = {last_field: None}
+    elif watermark.get("message_id") == last["id"] and not conversation.get(counter):
+        return 0  # déjà à jour : aucune écriture
+    else:
+        # Un message arrivé entre-temps change last_*_message : l'écriture est alors ignorée
+        condition = {f"{last_field}.id": last["id"]}
+
+    # Document avant écriture : la valeur du compteur remise à zéro, lue atomiquement
+    previous = await db.private_conversations.find_one_and_update(
+        {"id": conversation["id"], **condition},
+        {"$set": {
+            watermark_field: {"message_id": last["id"], "created_at": last["created_at"], "read_at": datetime.now(timezone.utc)},
+            counter: 0,
+        }},
+        projection={"_id": 0, counter: 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return 0
+    conversation[watermark_field] = {"message_id": last["id"], "created_at": last["created_at"]}
+    return previous.get(counter) or 0
+
+
+def _is_read(message: Dict[str, Any], watermark: Optional[Dict[str, Any]]) -> bool:
+    if not watermark:
+        # Messages antérieurs aux filigranes : ancien indicateur stocké
+        return message.get("is_read", False)
+    return (message["created_at"], message["id"]) <= (watermark["created_at"], watermark["message_id"])
+
+
+def unread_counts(messages: List[Dict[str, Any]], conversations: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Nombre de messages non lus par conversation et par destinataire (ex. messages purgés)"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for message in messages:
+        conversation = conversations.get(message.get("conversation_id"))
+        if conversation is None:
+            continue
+        recipient = SENDER_OF.get(message.get("sender_type"), "admin")
+        if not _is_read(message, conversation.get(f"read_by_{recipient}")):
+            per_reader = counts.setdefault(conversation["id"], {})
+            per_reader[recipient] = per_reader.get(recipient, 0) + 1
+    return counts
+
+
+def annotate_read(messages: List[Dict[str, Any]], conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Calcule ``is_read`` de chaque message depuis le filigrane de son destinataire"""
+    for message in messages:
+        recipient = SENDER_OF.get(message.get("sender_type"), "admin")
+        message["is_read"] = _is_read(message, conversation.get(f"read_by_{recipient}"))
+    return messages
@@ -0,0 +1,250 @@
+"""
+Rétention des messages du chat privé.
+
+Un job périodique en processus supprime les messages plus anciens que
+``retention_days``, après les avoir archivés (conformité) dans un fichier
+NDJSON compressé par mois : ``<archive_dir>/chat-messages-AAAA-MM.ndjson.gz``.
+
+Un index TTL supprimerait les messages sans les archiver ; le job procède donc
+par lots (index created_at / id) :
+
+1. lecture d'un lot des plus anciens messages expirés ;
+2. ajout au fichier du mois (un membre gzip par lot, fichier synchronisé sur disque) ;
+3. suppression du lot par ``_id``.
+
+Un arrêt entre 2 et 3 ré-archive le lot au passage suivant (l'``id`` de chaque
+message permet de dédoublonner). Les messages supprimés encore non lus sont
+retirés des compteurs ``unread_by_*`` de leur conversation et du compteur global
+des admins (``chat_unread``) dans le même passage ; les filigranes de lecture
+restent valides, ils ne comparent que des clés ``(created_at, id)``. Le débit est plafonné (``max_per_second``) pour
+ne pas concurrencer le chat en direct, et un bail dans ``job_state`` évite que
+plusieurs workers traitent les mêmes lots (bail perdu entre deux lots : arrêt).
+
+Le répertoire d'archives (``CHAT_ARCHIVE_DIR``) doit être configuré explicitement,
+sur un stockage durable : sans lui, le job ne supprime rien.
+
+Exécution ponctuelle :
+
+    python chat_retention.py run
+"""
+import asyncio
+import gzip
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from chat_read_state import unread_counts
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = "chat_retention"
+RETENTION_SORT = [("created_at", 1), ("id", 1)]
+
+
+def archive_path(archive_dir: Path, moment: datetime) -> Path:
+    return archive_dir / f"chat-messages-{moment.strftime('%Y-%m')}.ndjson.gz"
+
+
+def write_archive(archive_dir: Path, messages: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Ajoute les messages aux archives mensuelles ; retourne le nombre de messages par fichier"""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    by_file: Dict[Path, List[bytes]] = {}
+    for message in messages:
+        by_file.setdefault(archive_path(archive_dir, message["created_at"]), []).append(dumps(message) + b"\n")
+
+    written = {}
+    for path, lines in by_file.items():
+        # Mode ajout : chaque lot est un membre gzip, le fichier reste lisible d'un seul tenant
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+                archive.writelines(lines)
+            raw.flush()
+            os.fsync(raw.fileno())
+        written[path.name] = len(lines)
+    return written
+
+
+class ChatRetentionJob:
+    def __init__(self, db, archive_dir: Optional[Path], retention_days: int = 30, batch_size: int = 500,
+                 max_per_second: float = 500.0, interval: float = 3600.0, lease_seconds: float = 600.0,
+                 unread_counter=None):
+        self.db = db
+        self.unread_counter = unread_counter
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_per_second = max_per_second
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self._owner = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.archived = 0
+        self.deleted = 0
+        self.last_run_at: Optional[datetime] = None
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_state.find_one_and_update(
+                {"_id": JOB_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_owner": self._owner}, {"lease_until": None}]},
+                {"$set": {"lease_owner": self._owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except PyMongoError:
+            # Upsert concurrent sur le même _id : un autre worker détient le bail
+            return False
+
+    async def _release_lease(self, deleted: int):
+        await self.db.job_state.update_one(
+            {"_id": JOB_ID, "lease_owner": self._owner},
+            {"$set": {"lease_until": None, "last_run_at": datetime.now(timezone.utc), "last_run_deleted": deleted}}
+        )
+
+    async def _discount_unread(self, messages: List[Dict[str, Any]]):
+        """Retire des compteurs de non-lus les messages supprimés sans avoir été lus"""
+        conversation_ids = list({m["conversation_id"] for m in messages if m.get("conversation_id")})
+        conversations = {
+            c["id"]: c async for c in self.db.private_conversations.find(
+                {"id": {"$in": conversation_ids}}, {"_id": 0, "id": 1, "read_by_admin": 1, "read_by_student": 1}
+            )
+        }
+        counts = unread_counts(messages, conversations)
+        if not counts:
+            return
+        # Jamais négatif : une lecture concurrente a pu remettre le compteur à zéro
+        await self.db.private_conversations.bulk_write([
+            UpdateOne({"id": conversation_id}, [{"$set": {
+                f"unread_by_{reader}": {"$max": [0, {"$subtract": [{"$ifNull": [f"$unread_by_{reader}", 0]}, n]}]}
+                for reader, n in per_reader.items()
+            }}])
+            for conversation_id, per_reader in counts.items()
+        ], ordered=False)
+        admin_unread = sum(per_reader.get("admin", 0) for per_reader in counts.values())
+        if admin_unread and self.unread_counter is not None:
+            await self.unread_counter.decrement(admin_unread)
+
+    async def run_once(self) -> Optional[int]:
+        """Archive puis supprime les messages expirés ; None si un autre worker s'en charge"""
+        if self.archive_dir is None:
+            raise RuntimeError("CHAT_ARCHIVE_DIR is not set, refusing to delete chat messages without an archive")
+        if not await self._acquire_lease():
+            return None
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        collection = self.db.private_chat_messages
+        deleted = 0
+        try:
+            while True:
+                started = time.monotonic()
+                batch = await collection.find({"created_at": {"$lt": cutoff}}).sort(RETENTION_SORT).limit(self.batch_size).to_list(self.batch_size)
+                if not batch:
+                    break
+                object_ids = [message.pop("_id") for message in batch]
+
+                # Écriture disque hors de la boucle d'événements
+                await asyncio.to_thread(write_archive, self.archive_dir, batch)
+                self.archived += len(batch)
+
+                result = await collection.delete_many({"_id": {"$in": object_ids}})
+                deleted += result.deleted_count
+                self.deleted += result.deleted_count
+                await self._discount_unread(batch)
+                if not await self._acquire_lease():
+                    # Bail repris par un autre worker (pause trop longue...) : il poursuit
+                    logger.warning("Chat retention lease lost, stopping this run")
+                    break
+
+                # Plafond de débit : un lot au plus toutes les batch_size / max_per_second secondes
+                pause = len(batch) / self.max_per_second - (time.monotonic() - started)
+                if pause > 0:
+                    await asyncio.sleep(pause)
+        finally:
+            await self._release_lease(deleted)
+        self.runs += 1
+        self.last_run_at = datetime.now(timezone.utc)
+        return deleted
+
+    async def _run(self):
+        while True:
+            try:
+                deleted = await self.run_once()
+                if deleted:
+                    logger.info(f"Chat retention: {deleted} message(s) archived and deleted")
+            except Exception as e:
+                logger.error(f"Chat retention failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.archive_dir is None:
+            logger.warning("CHAT_ARCHIVE_DIR is not set, chat retention disabled")
+            return
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.archive_dir is not None,
+            "runs": self.runs,
+            "archived": self.archived,
+            "deleted": self.deleted,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "retention_days": self.retention_days,
+            "max_per_second": self.max_per_second,
+        }
+
+
+async def main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    root = Path(__file__).parent
+    load_dotenv(root / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True, tzinfo=timezone.utc)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if command == "run":
+            if not os.environ.get('CHAT_ARCHIVE_DIR'):
+                print("❌ CHAT_ARCHIVE_DIR non défini : aucune suppression sans archive")
+                return 2
+            job = ChatRetentionJob(
+                db,
+                Path(os.environ['CHAT_ARCHIVE_DIR']),
+                retention_days=int(os.environ.get('CHAT_RETENTION_DAYS', '30')),
+                batch_size=int(os.environ.get('CHAT_RETENTION_BATCH_SIZE', '500')),
+                max_per_second=float(os.environ.get('CHAT_RETENTION_MAX_PER_SECOND', '500'))
+            )
+            deleted = await job.run_once()
+            if deleted is None:
+                print("⏳ Rétention déjà en cours sur un autre worker")
+                return 1
+            print(f"✅ {deleted} message(s) archivé(s) et supprimé(s)")
+            return 0
+
+        print("Usage: python chat_retention.py run")
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "run")))
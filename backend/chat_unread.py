@@ -0,0 +1,157 @@
+"""
+Compteur global des messages non lus par les admins.
+
+Le badge admin lit un seul document (``chat_counters``, ``_id = "admin_unread"``)
+au lieu d'additionner ``unread_by_admin`` sur toutes les conversations :
+
+- ``increment`` à chaque message d'élève ;
+- ``decrement`` quand un admin lit une conversation (du nombre de messages lus) ;
+- ``reconcile`` recalcule périodiquement le total depuis les conversations et
+  corrige une éventuelle dérive (écriture interrompue entre les deux mises à jour).
+
+La correction est conditionnelle : le compteur est lu avant l'agrégation et n'est
+remplacé que s'il n'a pas bougé entre-temps (sinon un increment/decrement concurrent
+serait écrasé) ; en cas de conflit, on recommence. Un bail dans ``job_state`` évite
+que plusieurs workers réconcilient en même temps.
+
+Chaque méthode retourne le nouveau total, que l'appelant pousse aux admins par WebSocket.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+COUNTER_ID = "admin_unread"
+JOB_ID = "chat_unread_reconcile"
+MAX_RECONCILE_ATTEMPTS = 5
+
+
+class AdminUnreadCounter:
+    def __init__(self, db, reconcile_interval: float = 600.0, lease_seconds: float = 60.0):
+        self.db = db
+        self.counters = db.chat_counters
+        self.reconcile_interval = reconcile_interval
+        self.lease_seconds = lease_seconds
+        self._owner = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self.reconciliations = 0
+        self.corrected_drift = 0
+        self.conflicts = 0
+
+    async def total(self) -> int:
+        counter = await self.counters.find_one({"_id": COUNTER_ID}, {"total": 1})
+        return counter.get("total", 0) if counter else 0
+
+    async def increment(self, count: int = 1) -> int:
+        counter = await self.counters.find_one_and_update(
+            {"_id": COUNTER_ID},
+            {"$inc": {"total": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["total"]
+
+    async def decrement(self, count: int) -> int:
+        # Jamais négatif : une dérive éventuelle est corrigée par reconcile
+        counter = await self.counters.find_one_and_update(
+            {"_id": COUNTER_ID},
+            [{"$set": {"total": {"$max": [0, {"$subtract": [{"$ifNull": ["$total", 0]}, count]}]}}}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["total"]
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_state.find_one_and_update(
+                {"_id": JOB_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_owner": self._owner}, {"lease_until": None}]},
+                {"$set": {"lease_owner": self._owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except PyMongoError:
+            # Upsert concurrent sur le même _id : un autre worker détient le bail
+            return False
+
+    async def _release_lease(self):
+        await self.db.job_state.update_one(
+            {"_id": JOB_ID, "lease_owner": self._owner},
+            {"$set": {"lease_until": None, "last_run_at": datetime.now(timezone.utc)}}
+        )
+
+    async def _replace_if_unchanged(self, snapshot: Optional[Dict[str, Any]], actual: int) -> bool:
+        """Écrit le total recalculé seulement si le compteur vaut toujours ``snapshot``"""
+        update = {"$set": {"total": actual, "reconciled_at": datetime.now(timezone.utc)}}
+        if snapshot is None:
+            # Compteur absent : création, en conflit si un increment l'a créé entre-temps
+            try:
+                await self.counters.update_one({"_id": COUNTER_ID, "total": None}, update, upsert=True)
+                return True
+            except DuplicateKeyError:
+                return False
+        result = await self.counters.update_one({"_id": COUNTER_ID, "total": snapshot.get("total")}, update)
+        return result.matched_count == 1
+
+    async def reconcile(self) -> Optional[int]:
+        """Recalcule le total depuis les conversations ; retourne l'écart corrigé, None si un autre worker s'en charge"""
+        if not await self._acquire_lease():
+            return None
+        try:
+            for _ in range(MAX_RECONCILE_ATTEMPTS):
+                snapshot = await self.counters.find_one({"_id": COUNTER_ID}, {"total": 1})
+                rows = await self.db.private_conversations.aggregate([
+                    {"$group": {"_id": None, "total": {"$sum": "$unread_by_admin"}}}
+                ]).to_list(1)
+                actual = rows[0]["total"] if rows else 0
+                if await self._replace_if_unchanged(snapshot, actual):
+                    break
+                # Message envoyé ou lu pendant l'agrégation : le calcul est peut-être déjà périmé
+                self.conflicts += 1
+            else:
+                logger.warning("Admin unread reconciliation kept conflicting, retrying next run")
+                return 0
+        finally:
+            await self._release_lease()
+
+        drift = actual - ((snapshot or {}).get("total") or 0)
+        self.reconciliations += 1
+        if drift:
+            self.corrected_drift += abs(drift)
+            logger.warning(f"Admin unread counter drifted by {drift}, corrected")
+        return drift
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Admin unread reconciliation failed: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reconciliations": self.reconciliations,
+            "corrected_drift": self.corrected_drift,
+            "conflicts": self.conflicts,
+            "reconcile_interval_seconds": self.reconcile_interval,
+        }
@@ -34,7 +34,7 @@ async def create_admin_user():
         "is_active": True,
         "is_admin": True,
         "avatar_url": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "has_purchased": True,  # Admin a accès à tout
         "certificate_url": None,
         "last_login": None,
@@ -73,7 +73,7 @@ async def create_admin_user():
         "is_active": True,
         "is_admin": False,
         "avatar_url": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "has_purchased": True,  # A déjà acheté la formation
         "certificate_url": None,
         "last_login": None,
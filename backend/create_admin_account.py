@@ -49,7 +49,7 @@ async def create_admin():
         "is_active": True,
         "is_admin": True,
         "has_purchased": True,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "registration_source": "system"
     }
     
@@ -34,8 +34,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Fondamentaux Techniques Automobiles</h1><p>Contenu détaillé sur l'architecture automobile, les systèmes mécaniques, électriques et électroniques. Ce module couvre en profondeur tous les aspects techniques fondamentaux nécessaires à une inspection professionnelle. [15 000+ mots de contenu technique détaillé sur moteurs, transmissions, suspensions, freinage, électronique embarquée, etc.]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 3
@@ -50,8 +50,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Diagnostic Moteur et Transmission Avancé</h1><p>Guide complet du diagnostic moteur incluant injection, allumage, turbo, distribution, ainsi que toutes les transmissions (manuelles, automatiques, DSG, CVT). [20 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 4
@@ -66,8 +66,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Inspection Carrosserie, Châssis et Structure</h1><p>Techniques d'inspection visuelle et instrumentale de la carrosserie, détection d'accidents anciens, évaluation de la corrosion, contrôle géométrique. [18 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 5
@@ -82,8 +82,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Systèmes Électroniques et ADAS</h1><p>Compréhension approfondie des systèmes électroniques embarqués, réseaux multiplexés, ADAS (ACC, LKA, AEB), diagnostic OBD avancé. [20 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 6
@@ -98,8 +98,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Sécurité, Freinage et Équipements Critiques</h1><p>Inspection détaillée de tous les systèmes de sécurité active et passive, méthodologie de test, normes et réglementation en vigueur. [17 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 7
@@ -114,8 +114,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Méthodologie méthode d'inspection en Pratique</h1><p>Guide pratique complet de la méthodologie méthode d'inspection, du premier contact client jusqu'à la livraison du rapport. Cas pratiques, templates et outils. [16 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # MODULE 8
@@ -130,8 +130,8 @@ async def create_modules_2_to_8():
         "is_published": True,
         "views_count": 0,
         "content": """<div class="module-content prose max-w-none"><h1>Pratique Professionnelle et Certification</h1><p>Module final avec 10 cas pratiques détaillés, aspects légaux, création d'entreprise, stratégies marketing et préparation à la certification finale. [19 000+ mots]</p></div>""",
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     })
     
     # Insérer tous les modules
@@ -165,7 +165,7 @@ async def create_modules_2_to_8():
             {"id": str(uuid.uuid4()), "question": "Combien de points sont contrôlés lors du contrôle technique français ?", "type": "multiple_choice", "options": ["50", "100", "131", "200"], "correct_answer": 2, "explanation": "Le CT français contrôle 131 points répartis en 9 fonctions."},
             {"id": str(uuid.uuid4()), "question": "Quelle norme antipollution est actuellement en vigueur en Europe ?", "type": "multiple_choice", "options": ["Euro 4", "Euro 5", "Euro 6d", "Euro 7"], "correct_answer": 2, "explanation": "La norme Euro 6d est actuellement en vigueur (Euro 7 à venir)."}
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     })
     
     # Quiz pour modules 3-8 (questions simplifiées mais fonctionnelles)
@@ -201,7 +201,7 @@ async def create_modules_2_to_8():
                 {"id": str(uuid.uuid4()), "question": f"Question 14 sur {topic}", "type": "multiple_choice", "options": ["Réponse A", "Réponse B", "Réponse C", "Réponse D"], "correct_answer": 2, "explanation": f"Explication pour {topic}"},
                 {"id": str(uuid.uuid4()), "question": f"Question 15 sur {topic}", "type": "multiple_choice", "options": ["Réponse A", "Réponse B", "Réponse C", "Réponse D"], "correct_answer": 0, "explanation": f"Explication pour {topic}"}
             ],
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         })
     
     # Insérer tous les quiz
@@ -223,7 +223,7 @@ async def create_modules_2_to_8():
         "is_active": True,
         "is_admin": True,
         "avatar_url": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "has_purchased": True,
         "certificate_url": None,
         "last_login": None,
@@ -239,7 +239,7 @@ async def create_modules_2_to_8():
         "is_active": True,
         "is_admin": False,
         "avatar_url": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "has_purchased": True,
         "certificate_url": None,
         "last_login": None,
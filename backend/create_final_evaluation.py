@@ -233,7 +233,7 @@ async def create_final_evaluation():
                 "explanation": "Pour des raisons de sécurité, toujours vérifier le point mort et le frein à main avant de démarrer."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.quizzes.insert_one(final_quiz)
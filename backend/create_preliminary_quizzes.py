@@ -176,7 +176,7 @@ async def create_preliminary_quizzes():
                 "explanation": "Une approche marketing complète accélère significativement le développement."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     # Supprimer ancien si existe
@@ -351,7 +351,7 @@ async def create_preliminary_quizzes():
                 "explanation": "Le parallélisme est l'alignement horizontal des roues par rapport à l'axe longitudinal."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.quizzes.delete_one({"quiz_type": "mechanical_knowledge"})
@@ -30,7 +30,7 @@ async def create_test_student():
                 {"email": "eleve.test@inspecteur-auto.fr"},
                 {"$set": {
                     "has_purchased": True,
-                    "purchase_date": datetime.now(timezone.utc).isoformat()
+                    "purchase_date": datetime.now(timezone.utc)
                 }}
             )
             print("✅ Accès premium activé!")
@@ -48,8 +48,8 @@ async def create_test_student():
         "password": hashed_password.decode('utf-8'),
         "is_admin": False,
         "has_purchased": True,
-        "purchase_date": datetime.now(timezone.utc).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "purchase_date": datetime.now(timezone.utc),
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(test_student)
@@ -0,0 +1,22 @@
+"""
+Cellules des exports CSV admin (ouverts dans Excel).
+
+Les valeurs texte viennent en partie de formulaires publics : une cellule
+commençant par ``=``, ``+``, ``-``, ``@``, tabulation ou retour chariot serait
+interprétée comme une formule par le tableur. Elle est préfixée par ``'``.
+"""
+from datetime import datetime
+from typing import Any
+
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value: Any) -> Any:
+    """Valeur prête pour ``csv.writer`` : dates ISO, None vide, texte neutralisé"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
@@ -0,0 +1,325 @@
+"""
+Registre des index MongoDB de la plateforme.
+
+Chaque collection déclare ici les index dont ses routes ont besoin. Les index
+sont appliqués de manière idempotente au démarrage du serveur (voir
+``ensure_indexes`` dans server.py) et peuvent être vérifiés en ligne de
+commande :
+
+    python db_indexes.py apply   # crée les index manquants
+    python db_indexes.py check   # index manquants + explain() des requêtes canoniques, échoue sur COLLSCAN
+
+``create_indexes`` est tout-ou-rien par collection : en cas d'échec, les index
+sont recréés un par un pour qu'un seul index invalide (doublons sur un index
+unique, options modifiées...) ne prive pas la collection de tous les autres.
+Les échecs sont retournés par ``ensure_indexes`` et signalés par ``check``.
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+# Index déclarés par collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel(
+            [("has_purchased", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="purchased_created_at_id",
+        ),
+        # Scan d'inactivité par plage de dernière activité (voir student_status.py)
+        IndexModel(
+            [("has_purchased", ASCENDING), ("last_activity", ASCENDING), ("id", ASCENDING)],
+            name="purchased_last_activity_id",
+        ),
+        # Recherche admin (voir user_search.py)
+        IndexModel([("search_keys", ASCENDING)], name="search_keys"),
+        IndexModel([("search_grams", ASCENDING)], name="search_grams"),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], name="token_hash_unique", unique=True),
+        IndexModel([("family_id", ASCENDING)], name="family_id"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Suppression automatique des jetons expirés
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "modules": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("order_index", ASCENDING)], name="order_index"),
+    ],
+    "module_progress": [
+        IndexModel(
+            [("user_id", ASCENDING), ("module_id", ASCENDING), ("completed", ASCENDING)],
+            name="user_module_completed",
+        ),
+        # Une ligne par élève et module : l'upsert de complétion ne peut pas créer de doublon
+        IndexModel([("user_id", ASCENDING), ("module_id", ASCENDING)], name="user_module_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "quizzes": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("module_id", ASCENDING)], name="module_id"),
+    ],
+    "quiz_attempts": [
+        IndexModel(
+            [("user_id", ASCENDING), ("quiz_id", ASCENDING), ("passed", ASCENDING)],
+            name="user_quiz_passed",
+        ),
+    ],
+    "payment_transactions": [
+        IndexModel([("session_id", ASCENDING)], name="session_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel(
+            [("payment_status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="status_created_at_id",
+        ),
+    ],
+    "pre_registration_questionnaires": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Échoue seul tant que « python prospects.py dedupe » n'a pas fusionné les doublons
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel(
+            [("callback_status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="callback_status_created_at_id",
+        ),
+    ],
+    "private_conversations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("student_id", ASCENDING)], name="student_id"),
+        IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+    ],
+    "private_chat_messages": [
+        # Pagination par clé (created_at, id) et resynchronisation depuis un id de message
+        IndexModel(
+            [("conversation_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="conversation_created_at_id",
+        ),
+        IndexModel([("conversation_id", ASCENDING), ("id", ASCENDING)], name="conversation_id_message_id"),
+        # Rétention : lots des plus anciens messages (voir chat_retention.py)
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "admin_messages": [
+        IndexModel([("recipient_id", ASCENDING), ("created_at", DESCENDING)], name="recipient_created_at"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "ai_chat_messages": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    ],
+    "mechanical_assessments": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "satisfaction_surveys": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "forum_replies": [
+        IndexModel([("post_id", ASCENDING), ("created_at", ASCENDING)], name="post_created_at"),
+    ],
+    "student_status": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("user_id", DESCENDING)], name="created_at_user_id"),
+        IndexModel(
+            [("needs_reminder", ASCENDING), ("created_at", DESCENDING), ("user_id", DESCENDING)],
+            name="needs_reminder_created_at_user_id",
+        ),
+    ],
+    "reminder_queue": [
+        # Une relance par épisode d'inactivité
+        IndexModel(
+            [("user_id", ASCENDING), ("kind", ASCENDING), ("inactive_since", ASCENDING)],
+            name="user_kind_inactive_since_unique",
+            unique=True,
+        ),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    ],
+    "analytics_daily": [
+        IndexModel([("day", ASCENDING)], name="day"),
+    ],
+    "blog_posts": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING)], name="published_created_at"),
+    ],
+    "seo_pages": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("is_published", ASCENDING)], name="is_published"),
+    ],
+}
+
+
+# Requête canonique de chaque route chaude : (route, collection, filtre, tri)
+CANONICAL_QUERIES: List[Dict[str, Any]] = [
+    {"route": "get_current_user", "collection": "users", "filter": {"email": "check@example.com"}},
+    {"route": "POST /auth/register", "collection": "users", "filter": {"username": "check"}},
+    {"route": "GET /admin/users?search=", "collection": "users", "filter": {"search_keys": {"$regex": "^check"}}},
+    {"route": "PUT /admin/users/{user_id}", "collection": "users", "filter": {"id": "check"}},
+    {
+        "route": "GET /admin/students/progress",
+        "collection": "student_status",
+        "filter": {"needs_reminder": True},
+        "sort": [("created_at", DESCENDING), ("user_id", DESCENDING)],
+    },
+    {
+        "route": "inactivity scan",
+        "collection": "users",
+        "filter": {"has_purchased": True, "last_activity": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+        "sort": [("last_activity", ASCENDING), ("id", ASCENDING)],
+    },
+    {"route": "POST /auth/refresh", "collection": "refresh_tokens", "filter": {"token_hash": "check", "used_at": None, "revoked": False}},
+    {"route": "GET /modules/{module_id}", "collection": "modules", "filter": {"id": "check"}},
+    {"route": "GET /progress/check-access/{module_id}", "collection": "modules", "filter": {"order_index": 1}},
+    {
+        "route": "GET /progress/check-access/{module_id}",
+        "collection": "module_progress",
+        "filter": {"user_id": "check", "module_id": "check", "completed": True},
+    },
+    {"route": "GET /progress", "collection": "module_progress", "filter": {"user_id": "check"}},
+    {"route": "GET /quizzes/module/{module_id}", "collection": "quizzes", "filter": {"module_id": "check"}},
+    {
+        "route": "GET /progress/check-access/{module_id}",
+        "collection": "quiz_attempts",
+        "filter": {"user_id": "check", "quiz_id": "check", "passed": True},
+    },
+    {"route": "GET /payments/status/{session_id}", "collection": "payment_transactions", "filter": {"session_id": "check"}},
+    {
+        "route": "GET /admin/transactions",
+        "collection": "payment_transactions",
+        "filter": {"payment_status": "completed", "created_at": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+    },
+    {"route": "GET /pre-registration/check/{email}", "collection": "pre_registration_questionnaires", "filter": {"email": "check@example.com"}},
+    {"route": "GET /chat/conversation", "collection": "private_conversations", "filter": {"student_id": "check"}},
+    {
+        "route": "GET /chat/messages",
+        "collection": "private_chat_messages",
+        "filter": {"conversation_id": "check"},
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+    },
+    {
+        "route": "GET /messages",
+        "collection": "admin_messages",
+        "filter": {"recipient_id": "check"},
+        "sort": [("created_at", DESCENDING)],
+    },
+    {"route": "GET /admin/analytics", "collection": "analytics_daily", "filter": {"day": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}}},
+    {"route": "GET /blog/posts/{slug}", "collection": "blog_posts", "filter": {"slug": "check", "published": True}},
+    {"route": "GET /seo-pages/{slug}", "collection": "seo_pages", "filter": {"slug": "check", "is_published": True}},
+]
+
+
+async def ensure_indexes(db) -> Dict[str, Dict[str, Any]]:
+    """Crée les index déclarés (idempotent).
+
+    Retourne ``{"created": {collection: [noms]}, "failed": {collection: {nom: erreur}}}``.
+    """
+    created: Dict[str, List[str]] = {}
+    failed: Dict[str, Dict[str, str]] = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = await db[collection].create_indexes(indexes)
+            continue
+        except OperationFailure:
+            pass
+        # Échec groupé : un index à la fois pour isoler le ou les index fautifs
+        created[collection] = []
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                created[collection] += await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                # Données existantes incompatibles (doublons sur un index unique, options modifiées...)
+                logger.error(f"Index '{name}' creation failed on '{collection}': {e}")
+                failed.setdefault(collection, {})[name] = str(e)
+    return {"created": created, "failed": failed}
+
+
+async def missing_indexes(db) -> Dict[str, List[str]]:
+    """Index déclarés absents de la base, par collection"""
+    missing: Dict[str, List[str]] = {}
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        absent = [index.document["name"] for index in indexes if index.document["name"] not in existing]
+        if absent:
+            missing[collection] = absent
+    return missing
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Liste récursivement les étapes d'un plan d'exécution"""
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def check_query_plans(db) -> List[Dict[str, Any]]:
+    """Exécute explain() sur chaque requête canonique et retourne celles qui font un COLLSCAN"""
+    failures = []
+    for query in CANONICAL_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            failures.append({**query, "stages": stages})
+    return failures
+
+
+async def main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True, tzinfo=timezone.utc)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if command == "apply":
+            report = await ensure_indexes(db)
+            for collection, names in report["created"].items():
+                print(f"✅ {collection}: {', '.join(names)}")
+            for collection, errors in report["failed"].items():
+                for name, error in errors.items():
+                    print(f"❌ {collection}.{name}: {error}")
+            return 1 if report["failed"] else 0
+
+        if command == "check":
+            missing = await missing_indexes(db)
+            for collection, names in missing.items():
+                print(f"❌ Index manquant(s) sur {collection}: {', '.join(names)}")
+            failures = await check_query_plans(db)
+            for failure in failures:
+                print(f"❌ COLLSCAN: {failure['route']} -> {failure['collection']} {failure['filter']}")
+            if missing or failures:
+                return 1
+            print(f"✅ {len(CANONICAL_QUERIES)} requêtes canoniques utilisent un index")
+            return 0
+
+        print("Usage: python db_indexes.py [apply|check]")
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "check")))
@@ -0,0 +1,78 @@
+"""
+Réponses JSON rapides (orjson).
+
+Par défaut FastAPI passe chaque valeur retournée par ``jsonable_encoder`` puis,
+si ``response_model`` est déclaré, revalide chaque document. Pour les listes
+lues directement depuis MongoDB avec une projection connue, c'est du travail en
+double : ``fast_response`` sérialise le contenu tel quel avec orjson
+(datetimes, dicts imbriqués, modèles pydantic) et, comme il retourne une
+``Response``, FastAPI saute la validation du ``response_model``.
+
+``TrustedProjection`` construit la projection MongoDB correspondant à un modèle
+et complète les valeurs par défaut manquantes, pour que la sortie reste
+identique à celle du chemin validé.
+"""
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+
+def _default(value: Any) -> Any:
+    """Types que orjson ne sait pas sérialiser nativement"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    # OPT_UTC_Z : même format de date que la sérialisation pydantic ("...Z")
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Sérialise directement ``content`` sans jsonable_encoder ni revalidation du response_model"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+class TrustedProjection:
+    """Projection MongoDB dérivée d'un modèle pydantic, avec ses valeurs par défaut"""
+
+    def __init__(self, model: Type[BaseModel], exclude: Iterable[str] = ()):
+        excluded = set(exclude)
+        self.model = model
+        self.fields = [name for name in model.model_fields if name not in excluded]
+        self.projection: Dict[str, int] = {"_id": 0, **{name: 1 for name in self.fields}}
+        # Seules les valeurs par défaut statiques sont complétées (les default_factory
+        # produisent id / created_at, toujours présents en base)
+        self._defaults = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if name not in excluded and field.default is not PydanticUndefined
+        }
+
+    def prepare(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        for name, default in self._defaults.items():
+            if name not in doc:
+                doc[name] = copy.copy(default) if isinstance(default, (list, dict)) else default
+        return doc
+
+    def prepare_many(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for doc in docs:
+            self.prepare(doc)
+        return docs
@@ -41,7 +41,7 @@ async def init_landing_content():
         "feature_3_description": "Rejoignez une communauté de 1000+ inspecteurs et échangez sur vos expériences.",
         "feature_4_title": "Revenus Attractifs",
         "feature_4_description": "Générez 50 à 300€ par inspection avec un potentiel jusqu'à 4000€/mois.",
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.landing_page_content.insert_one(default_content)
@@ -0,0 +1,104 @@
+"""
+Migration : convertit les dates stockées en chaînes ISO en datetime BSON natif.
+
+Les documents sont parcourus par lots, dans l'ordre de ``_id``. Après chaque
+lot, le dernier ``_id`` traité est enregistré dans la collection
+``migrations`` : une exécution interrompue reprend là où elle s'était arrêtée.
+
+    python migrate_dates_to_bson.py            # migre toutes les collections
+    python migrate_dates_to_bson.py --dry-run  # compte seulement les documents à convertir
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, UpdateOne
+
+from storage_codec import DATE_FIELDS, MOTOR_CLIENT_OPTIONS, to_datetime
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MIGRATION_ID = "dates_to_bson"
+BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', '500'))
+
+
+async def migrate_collection(db, collection: str, fields, dry_run: bool = False) -> int:
+    """Convertit les champs date d'une collection. Retourne le nombre de documents modifiés."""
+    string_filter = {"$or": [{field: {"$type": "string"}} for field in fields]}
+
+    if dry_run:
+        return await db[collection].count_documents(string_filter)
+
+    checkpoint = await db.migrations.find_one({"_id": f"{MIGRATION_ID}:{collection}"})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    modified = 0
+
+    while True:
+        query = dict(string_filter)
+        if last_id is not None:
+            query = {"$and": [string_filter, {"_id": {"$gt": last_id}}]}
+
+        batch = await db[collection].find(
+            query, {field: 1 for field in fields}
+        ).sort("_id", ASCENDING).limit(BATCH_SIZE).to_list(BATCH_SIZE)
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            updates = {}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    converted = to_datetime(value)
+                    if converted is not None:
+                        updates[field] = converted
+                    else:
+                        print(f"⚠️  {collection} {doc['_id']}: {field}={value!r} illisible, ignoré")
+            if updates:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+
+        if operations:
+            result = await db[collection].bulk_write(operations, ordered=False)
+            modified += result.modified_count
+
+        last_id = batch[-1]["_id"]
+        await db.migrations.update_one(
+            {"_id": f"{MIGRATION_ID}:{collection}"},
+            {"$set": {"last_id": last_id, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    await db.migrations.update_one(
+        {"_id": f"{MIGRATION_ID}:{collection}"},
+        {"$set": {"completed": True, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    return modified
+
+
+async def main(dry_run: bool = False):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], **MOTOR_CLIENT_OPTIONS)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        for collection, fields in DATE_FIELDS.items():
+            count = await migrate_collection(db, collection, fields, dry_run=dry_run)
+            if dry_run:
+                print(f"🔎 {collection}: {count} document(s) à convertir")
+            else:
+                print(f"✅ {collection}: {count} document(s) converti(s)")
+    finally:
+        client.close()
+
+    print("\n🎉 Migration terminée!" if not dry_run else "\n🔎 Simulation terminée")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(dry_run="--dry-run" in sys.argv))
@@ -0,0 +1,35 @@
+"""
+Modèles partagés hors de server.py.
+
+Les modèles importés par d'autres scripts (benchmarks, outils en ligne de
+commande) sont définis ici : les importer ne charge pas l'application
+(client MongoDB, variables d'environnement, Stripe, reportlab...).
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Module(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    description: str
+    content: str
+    order_index: int
+    duration_minutes: int = 60
+    is_free: bool = False
+    is_published: bool = True  # Added for admin control
+    views_count: int = 0  # Track module popularity
+    
+    # Vidéos intégrées pour rendre les cours plus ludiques
+    video_intro_url: Optional[str] = None  # Vidéo d'introduction (début du module)
+    video_middle_url: Optional[str] = None  # Vidéo au milieu du contenu
+    video_middle_position: int = 50  # Position de la vidéo milieu en % (par défaut 50%)
+    video_end_url: Optional[str] = None  # Vidéo de conclusion (fin du module)
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
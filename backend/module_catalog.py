@@ -0,0 +1,124 @@
+"""
+Catalogue des modules en mémoire, versionné.
+
+Les modules ne changent que lorsqu'un admin édite la formation : le catalogue
+les charge une fois (triés par ``order_index``) avec les index dérivés
+(par id, par ordre, gratuits / payants, total) et les lectures deviennent des
+accès dictionnaire.
+
+La version est partagée entre workers via un petit document MongoDB
+(``cache_versions``, ``_id = "modules"``). ``bump()`` l'incrémente après chaque
+écriture ; les autres workers la relisent au plus toutes les
+``check_interval`` secondes et rechargent le catalogue si elle a changé. Un
+rechargement complet a aussi lieu après ``max_age`` secondes pour couvrir les
+modifications faites hors serveur (scripts de seed).
+
+Les documents du catalogue sont partagés entre requêtes : ne pas les modifier.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+VERSION_KEY = "modules"
+
+
+class CatalogSnapshot:
+    """Vue immuable du catalogue à une version donnée"""
+
+    def __init__(self, modules: List[Dict[str, Any]], version: int, published: Optional[List[Dict[str, Any]]] = None):
+        self.version = version
+        self.modules = modules
+        self.by_id: Dict[str, Dict[str, Any]] = {m["id"]: m for m in modules}
+        # order_index en double : le premier module dans l'ordre de tri, comme find_one sur la requête triée
+        self.by_order: Dict[int, Dict[str, Any]] = {}
+        for m in modules:
+            self.by_order.setdefault(m.get("order_index"), m)
+        # Même filtre que {"is_published": True} : un module sans le champ n'est pas publié
+        self.published = published if published is not None else [m for m in modules if m.get("is_published") is True]
+        self.free = [m for m in modules if m.get("is_free", False)]
+        self.paid = [m for m in modules if not m.get("is_free", False)]
+        self.total = len(modules)
+
+
+class ModuleCatalog:
+    def __init__(
+        self,
+        collection,
+        versions_collection,
+        projection: Optional[Dict[str, int]] = None,
+        prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        check_interval: float = 5.0,
+        max_age: float = 300.0,
+    ):
+        self.collection = collection
+        self.versions_collection = versions_collection
+        self.projection = projection or {"_id": 0}
+        self.prepare = prepare
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.reloads = 0
+        self.version_checks = 0
+
+    async def _read_version(self) -> int:
+        self.version_checks += 1
+        doc = await self.versions_collection.find_one({"_id": VERSION_KEY})
+        return doc.get("version", 0) if doc else 0
+
+    async def _load(self, version: int):
+        modules = await self.collection.find({}, self.projection).sort("order_index", 1).to_list(None)
+        # Avant prepare, qui complète les champs absents avec les valeurs par défaut du modèle
+        published = [m.get("is_published") is True for m in modules]
+        if self.prepare:
+            modules = [self.prepare(m) for m in modules]
+        self._snapshot = CatalogSnapshot(modules, version, [m for m, flag in zip(modules, published) if flag])
+        self._loaded_at = self._checked_at = time.monotonic()
+        self.reloads += 1
+
+    async def get(self) -> CatalogSnapshot:
+        """Retourne le catalogue courant, rechargé si la version partagée a changé"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self.check_interval and now - self._loaded_at < self.max_age:
+            return snapshot
+
+        async with self._lock:
+            # Un autre appel a pu recharger pendant l'attente du verrou
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._checked_at < self.check_interval and now - self._loaded_at < self.max_age:
+                return self._snapshot
+
+            version = await self._read_version()
+            if self._snapshot is None or version != self._snapshot.version or now - self._loaded_at >= self.max_age:
+                await self._load(version)
+            else:
+                self._checked_at = now
+            return self._snapshot
+
+    async def bump(self) -> int:
+        """Incrémente la version partagée après une écriture et recharge localement"""
+        doc = await self.versions_collection.find_one_and_update(
+            {"_id": VERSION_KEY},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        async with self._lock:
+            await self._load(doc["version"])
+        return doc["version"]
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "modules": snapshot.total if snapshot else 0,
+            "reloads": self.reloads,
+            "version_checks": self.version_checks,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if snapshot else None,
+        }
+
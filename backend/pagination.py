@@ -0,0 +1,68 @@
+"""
+Curseurs opaques pour la pagination par clé (keyset).
+
+Le curseur encode les valeurs de tri du dernier élément renvoyé ; la page
+suivante filtre sur les éléments strictement « après » ces valeurs, ce qui
+reste rapide quelle que soit la profondeur (contrairement à ``skip``).
+
+Le curseur vient du client : ses valeurs sont limitées à des scalaires JSON
+et à ``{"$date": "..."}``, pour qu'un curseur forgé ne puisse pas injecter
+d'opérateur MongoDB (``{"$ne": null}``...) dans le filtre.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou falsifié"""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    payload = {
+        key: {"$date": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, SCALAR_TYPES):
+        return value
+    if isinstance(value, dict) and list(value) == ["$date"] and isinstance(value["$date"], str):
+        return datetime.fromisoformat(value["$date"])
+    raise ValueError("cursor values must be scalars or dates")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError("cursor payload must be an object")
+        return {key: _decode_value(value) for key, value in payload.items()}
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def keyset_filter(sort: List[Tuple[str, int]], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filtre MongoDB sélectionnant les documents situés après ``values`` dans l'ordre ``sort``.
+
+    Ex. pour [("created_at", -1), ("id", -1)] :
+        {"$or": [{"created_at": {"$lt": c}}, {"created_at": c, "id": {"$lt": i}}]}
+    """
+    missing = [field for field, _ in sort if field not in values]
+    if missing:
+        raise InvalidCursor(f"cursor is missing {', '.join(missing)}")
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[prev_field] for prev_field, _ in sort[:i]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
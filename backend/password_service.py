@@ -0,0 +1,99 @@
+"""
+Hachage bcrypt hors de la boucle d'événements.
+
+Chaque appel bcrypt bloque ~100-300 ms : les opérations passent donc par un
+pool de threads dédié et de taille fixe. Au-delà de ``max_pending`` opérations
+en attente, ``PasswordQueueSaturated`` est levée pour que l'appelant réponde
+503 plutôt que d'empiler les connexions.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordQueueSaturated(Exception):
+    """Trop d'opérations bcrypt en attente"""
+
+
+class PasswordService:
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, rounds: int = 12):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        # min = max = default : tout hash d'un autre coût est signalé comme à recalculer
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    async def _run(self, func, *args) -> Any:
+        # _pending n'est modifié que depuis la boucle d'événements
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordQueueSaturated()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, func, *args)
+        except Exception:
+            # Hash stocké illisible, erreur bcrypt... : compté à part
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifie un mot de passe.
+
+        Returns:
+            (valide, nouveau_hash) - nouveau_hash est renseigné quand le hash stocké
+            utilise un ancien coût et doit être remplacé
+        """
+        valid, new_hash = await self._run(self.pwd_context.verify_and_update, plain_password, hashed_password)
+        if valid and new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._pending,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "bcrypt_rounds": self.rounds,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+# Instance globale
+password_service = PasswordService(
+    max_workers=int(os.environ.get('BCRYPT_WORKERS', '2')),
+    max_pending=int(os.environ.get('BCRYPT_MAX_PENDING', '32')),
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+)
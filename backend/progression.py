@@ -0,0 +1,97 @@
+"""
+Progression séquentielle : accès aux modules d'un élève.
+
+Un module payant n'est accessible que si le module précédent (``order_index``
+- 1) est complété et, s'il a un quiz, que ce quiz est réussi. L'état de
+progression de l'élève (modules complétés, quiz réussis, quiz de chaque
+module) est lu en une seule agrégation, puis ``compute_access`` calcule
+l'accès de tous les modules en mémoire.
+"""
+from typing import Any, Dict, Iterable, Set
+
+
+class ProgressionState:
+    def __init__(self, completed_modules: Set[str], passed_quizzes: Set[str], quiz_by_module: Dict[str, str]):
+        self.completed_modules = completed_modules
+        self.passed_quizzes = passed_quizzes
+        self.quiz_by_module = quiz_by_module
+
+
+async def load_progression_state(db, user_id: str) -> ProgressionState:
+    """Lit modules complétés, quiz réussis et quiz par module en un aller-retour"""
+    pipeline = [
+        {"$match": {"user_id": user_id, "completed": True}},
+        {"$group": {"_id": "completed_modules", "ids": {"$addToSet": "$module_id"}}},
+        {"$unionWith": {
+            "coll": "quiz_attempts",
+            "pipeline": [
+                {"$match": {"user_id": user_id, "passed": True}},
+                {"$group": {"_id": "passed_quizzes", "ids": {"$addToSet": "$quiz_id"}}}
+            ]
+        }},
+        {"$unionWith": {
+            "coll": "quizzes",
+            "pipeline": [
+                {"$group": {"_id": "quizzes", "pairs": {"$push": {"module_id": "$module_id", "id": "$id"}}}}
+            ]
+        }}
+    ]
+    results = {doc["_id"]: doc async for doc in db.module_progress.aggregate(pipeline)}
+
+    quiz_by_module: Dict[str, str] = {}
+    for pair in results.get("quizzes", {}).get("pairs", []):
+        # Premier quiz trouvé, comme find_one({"module_id": ...})
+        quiz_by_module.setdefault(pair.get("module_id"), pair.get("id"))
+
+    return ProgressionState(
+        completed_modules=set(results.get("completed_modules", {}).get("ids", [])),
+        passed_quizzes=set(results.get("passed_quizzes", {}).get("ids", [])),
+        quiz_by_module=quiz_by_module,
+    )
+
+
+def module_gate(module: Dict[str, Any], by_order: Dict[int, Dict[str, Any]], has_purchased: bool, state: ProgressionState) -> Dict[str, Any]:
+    """Accès à un module (même réponse que /progress/check-access/{module_id})"""
+    # Module gratuit toujours accessible
+    if module.get("is_free", False):
+        return {"can_access": True, "reason": "free_module"}
+
+    if not has_purchased:
+        return {"can_access": False, "reason": "purchase_required"}
+
+    target_order = module.get("order_index", 999)
+
+    # Module 1 (gratuit) toujours accessible
+    if target_order == 1:
+        return {"can_access": True, "reason": "first_module"}
+
+    previous_module = by_order.get(target_order - 1)
+    if not previous_module:
+        return {"can_access": True, "reason": "no_previous_module"}
+
+    if previous_module["id"] not in state.completed_modules:
+        return {
+            "can_access": False,
+            "reason": "previous_module_not_completed",
+            "required_module": previous_module["title"]
+        }
+
+    previous_quiz = state.quiz_by_module.get(previous_module["id"])
+    if previous_quiz and previous_quiz not in state.passed_quizzes:
+        return {
+            "can_access": False,
+            "reason": "previous_quiz_not_passed",
+            "required_module": previous_module["title"]
+        }
+
+    return {"can_access": True, "reason": "prerequisites_met"}
+
+
+def compute_access(
+    modules: Iterable[Dict[str, Any]],
+    by_order: Dict[int, Dict[str, Any]],
+    has_purchased: bool,
+    state: ProgressionState
+) -> Dict[str, Dict[str, Any]]:
+    """Accès de chaque module, indexé par id de module"""
+    return {module["id"]: module_gate(module, by_order, has_purchased, state) for module in modules}
@@ -0,0 +1,150 @@
+"""
+Prospects (questionnaires de pré-inscription) : liste admin, export, dédoublonnage.
+
+La liste admin est filtrée côté serveur (statut de rappel, période), paginée
+par curseur et n'inclut pas les ``answers``. Les compteurs par statut, renvoyés
+avec la première page, sont des comptages sur l'index ``callback_status`` (un
+par statut) plutôt qu'un ``$group`` sur toute la collection. L'export CSV écrit
+les lignes au fil de la lecture du curseur.
+
+Un index unique sur ``email`` permet à la soumission du questionnaire de
+faire un upsert. Sur une base contenant des doublons, sa création échoue au
+démarrage sans bloquer les autres index de la collection (voir db_indexes.py) ;
+les doublons sont fusionnés puis l'index créé par :
+
+    python prospects.py dedupe
+"""
+import asyncio
+import csv
+import io
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from csv_export import csv_cell
+
+PROSPECT_SORT = [("created_at", -1), ("id", -1)]
+CALLBACK_STATUSES = ["pending", "called", "interested", "not_interested", "no_answer", "converted"]
+# Vue liste : les réponses détaillées ne sont chargées que dans la fiche prospect
+LIST_PROJECTION = {"_id": 0, "answers": 0}
+EXPORT_BATCH_SIZE = 500
+CSV_COLUMNS = [
+    "id", "created_at", "full_name", "email", "phone", "has_driving_license", "professional_project",
+    "has_disability", "has_smartphone", "profile_validated", "validation_score",
+    "callback_status", "callback_notes", "callback_updated_at",
+]
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def prospect_filter(callback_status: Optional[str] = None, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if callback_status:
+        # Les anciens questionnaires sans statut sont « pending »
+        query["callback_status"] = {"$in": ["pending", None]} if callback_status == "pending" else callback_status
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from if date_from.tzinfo else date_from.replace(tzinfo=timezone.utc)
+        if date_to:
+            query["created_at"]["$lt"] = date_to if date_to.tzinfo else date_to.replace(tzinfo=timezone.utc)
+    return query
+
+
+async def status_counts(db) -> Dict[str, int]:
+    """Nombre de prospects par statut de rappel (toute la base, indépendamment des filtres)"""
+    collection = db.pre_registration_questionnaires
+    counts = await asyncio.gather(*(collection.count_documents(prospect_filter(status)) for status in CALLBACK_STATUSES))
+    return dict(zip(CALLBACK_STATUSES, counts))
+
+
+async def export_prospects_csv(db, query: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Génère le CSV des prospects ligne par ligne"""
+    cursor = db.pre_registration_questionnaires.find(query, LIST_PROJECTION).sort(PROSPECT_SORT).batch_size(EXPORT_BATCH_SIZE)
+
+    # BOM + « ; » : ouverture directe dans Excel (locale française)
+    yield ("\ufeff" + ";".join(CSV_COLUMNS) + "\r\n").encode("utf-8")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    rows = 0
+    async for prospect in cursor:
+        writer.writerow([csv_cell(prospect.get(column)) for column in CSV_COLUMNS])
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def dedupe(db) -> int:
+    """
+    Fusionne les questionnaires en double par email : garde le plus récent et
+    reporte le suivi de rappel le plus récent. Retourne le nombre de documents supprimés.
+    """
+    collection = db.pre_registration_questionnaires
+    removed = 0
+    duplicates = collection.aggregate([
+        {"$group": {"_id": {"$toLower": "$email"}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    async for group in duplicates:
+        docs = await collection.find({"_id": {"$in": group["ids"]}}).sort("created_at", -1).to_list(None)
+        keep, others = docs[0], docs[1:]
+
+        updates = {"email": group["_id"]}
+        followed = [d for d in docs if d.get("callback_status") not in (None, "pending")]
+        if followed and keep.get("callback_status") in (None, "pending"):
+            latest = max(followed, key=lambda d: d.get("callback_updated_at") or d.get("created_at"))
+            updates.update({
+                "callback_status": latest.get("callback_status"),
+                "callback_notes": latest.get("callback_notes", ""),
+                "callback_updated_at": latest.get("callback_updated_at"),
+            })
+        await collection.update_one({"_id": keep["_id"]}, {"$set": updates})
+        result = await collection.delete_many({"_id": {"$in": [d["_id"] for d in others]}})
+        removed += result.deleted_count
+
+    # Emails restants en casse mixte
+    async for doc in collection.find({"email": {"$regex": "[A-Z]"}}, {"_id": 1, "email": 1}):
+        await collection.update_one({"_id": doc["_id"]}, {"$set": {"email": normalize_email(doc["email"])}})
+
+    # L'ancien index non unique porte la même clé : il doit disparaître avant email_unique
+    indexes = await collection.index_information()
+    if "email" in indexes:
+        await collection.drop_index("email")
+    return removed
+
+
+async def main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from db_indexes import INDEXES
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True, tzinfo=timezone.utc)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if command == "dedupe":
+            removed = await dedupe(db)
+            await db.pre_registration_questionnaires.create_indexes(INDEXES["pre_registration_questionnaires"])
+            print(f"✅ {removed} doublon(s) supprimé(s), index unique sur email créé")
+            return 0
+
+        print("Usage: python prospects.py dedupe")
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "dedupe")))
@@ -0,0 +1,132 @@
+"""
+Jetons de rafraîchissement rotatifs.
+
+Seul le SHA-256 du jeton est stocké (collection ``refresh_tokens``, index TTL
+sur ``expires_at``). Chaque utilisation consomme le jeton et en émet un nouveau
+dans la même famille ; présenter un jeton déjà consommé révoque toute la famille
+(vol probable).
+
+Exception : deux onglets (ou une requête rejouée) qui rafraîchissent avec le
+même jeton au même moment. Un jeton consommé depuis moins de
+``reuse_grace_seconds`` est refusé (« concurrent ») sans révoquer la famille ;
+le client reprend les jetons obtenus par la requête gagnante.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+
+class RefreshTokenError(Exception):
+    """Jeton de rafraîchissement invalide, expiré ou réutilisé"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _hash_token(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+class RefreshTokenService:
+    def __init__(self, collection, expire_days: int = 30, reuse_grace_seconds: float = 10.0):
+        self.collection = collection
+        self.expire_days = expire_days
+        self.reuse_grace_seconds = reuse_grace_seconds
+        self.issued = 0
+        self.rotated = 0
+        self.reuse_detected = 0
+        self.concurrent_refreshes = 0
+
+    async def issue(self, user_id: str, family_id: Optional[str] = None) -> str:
+        """Crée un jeton (nouvelle famille si family_id est None) et retourne sa valeur brute"""
+        raw_token = secrets.token_urlsafe(48)
+        now = datetime.now(timezone.utc)
+        await self.collection.insert_one({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "family_id": family_id or str(uuid.uuid4()),
+            "token_hash": _hash_token(raw_token),
+            "created_at": now,
+            "expires_at": now + timedelta(days=self.expire_days),
+            "used_at": None,
+            "revoked": False
+        })
+        self.issued += 1
+        return raw_token
+
+    async def rotate(self, raw_token: str) -> Tuple[str, str]:
+        """
+        Consomme un jeton et en émet un nouveau dans la même famille.
+
+        Returns:
+            (user_id, nouveau_jeton)
+        """
+        token_hash = _hash_token(raw_token)
+        now = datetime.now(timezone.utc)
+
+        # Consommation atomique : un seul appel peut gagner
+        token = await self.collection.find_one_and_update(
+            {"token_hash": token_hash, "used_at": None, "revoked": False},
+            {"$set": {"used_at": now}}
+        )
+
+        if token is None:
+            existing = await self.collection.find_one({"token_hash": token_hash}, {"family_id": 1, "used_at": 1, "revoked": 1})
+            if existing is None:
+                raise RefreshTokenError("invalid")
+            used_at = existing.get("used_at")
+            if used_at is not None and used_at.tzinfo is None:
+                used_at = used_at.replace(tzinfo=timezone.utc)
+            if (
+                not existing.get("revoked")
+                and used_at is not None
+                and now - used_at <= timedelta(seconds=self.reuse_grace_seconds)
+            ):
+                # Rafraîchissement simultané du même jeton : refus sans déconnecter les autres appareils
+                self.concurrent_refreshes += 1
+                raise RefreshTokenError("concurrent")
+            # Jeton déjà utilisé ou révoqué : on coupe toute la famille
+            self.reuse_detected += 1
+            await self.revoke_family(existing["family_id"])
+            raise RefreshTokenError("reused")
+
+        expires_at = token["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= now:
+            raise RefreshTokenError("expired")
+
+        new_token = await self.issue(token["user_id"], family_id=token["family_id"])
+        self.rotated += 1
+        return token["user_id"], new_token
+
+    async def revoke(self, raw_token: str) -> bool:
+        """Révoque la famille du jeton (déconnexion)"""
+        token = await self.collection.find_one({"token_hash": _hash_token(raw_token)}, {"family_id": 1})
+        if token is None:
+            return False
+        await self.revoke_family(token["family_id"])
+        return True
+
+    async def revoke_family(self, family_id: str):
+        await self.collection.update_many(
+            {"family_id": family_id, "revoked": False},
+            {"$set": {"revoked": True}}
+        )
+
+    async def revoke_user(self, user_id: str):
+        await self.collection.update_many(
+            {"user_id": user_id, "revoked": False},
+            {"$set": {"revoked": True}}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "issued": self.issued,
+            "rotated": self.rotated,
+            "reuse_detected": self.reuse_detected,
+            "concurrent_refreshes": self.concurrent_refreshes,
+        }
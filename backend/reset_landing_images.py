@@ -37,7 +37,7 @@ async def reset_landing_images():
         'features_image_url': 'https://images.unsplash.com/photo-1486262715619-67b85e0b08d3?w=1200&q=80',
         'training_image_url': 'https://images.unsplash.com/photo-1581092160562-40aa08e78837?w=1200&q=80',
         'social_proof_image_url': 'https://images.unsplash.com/photo-1573164574572-cb89e39749b4?w=1200&q=80',
-        'updated_at': datetime.now(timezone.utc).isoformat()
+        'updated_at': datetime.now(timezone.utc)
     }
     
     await db.landing_page_content.insert_one(new_content)
@@ -555,8 +555,8 @@ async def seed_database():
     </div>
 </div>
         """,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     # Insert module 1
@@ -766,7 +766,7 @@ async def seed_database():
                 "explanation": "Un kit de base pour démarrer l'activité d'inspecteur automobile coûte entre 2 000 et 3 000 €, incluant valise de diagnostic, outils manuels et testeur de peinture."
             }
         ],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.quizzes.insert_one(quiz1)
@@ -194,8 +194,8 @@ async def seed_database():
                 </div>
             </div>
             """,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         
         {
@@ -447,8 +447,8 @@ async def seed_database():
                 <p><strong>Dans le module suivant</strong>, nous approfondirons le diagnostic du groupe motopropulseur, élément central de tout véhicule.</p>
             </div>
             """,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         
         {
@@ -890,8 +890,8 @@ async def seed_database():
                 <p>Dans le module suivant, nous aborderons l'inspection de la carrosserie et du châssis, aspects cruciaux pour la sécurité et la valeur résiduelle du véhicule.</p>
             </div>
             """,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
         # ... (we can add more modules here following the same pattern)
     ]
@@ -906,8 +906,8 @@ async def seed_database():
             "duration_minutes": 85,
             "is_free": False,
             "content": "<div class='module-content'><h1>Inspection Carrosserie et Châssis</h1><p>Module complet sur l'inspection structurelle des véhicules...</p></div>",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -917,8 +917,8 @@ async def seed_database():
             "duration_minutes": 95,
             "is_free": False,
             "content": "<div class='module-content'><h1>Systèmes Électroniques et ADAS</h1><p>Diagnostic approfondi des systèmes électroniques modernes...</p></div>",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -928,8 +928,8 @@ async def seed_database():
             "duration_minutes": 80,
             "is_free": False,
             "content": "<div class='module-content'><h1>Sécurité et Équipements</h1><p>Inspection complète des systèmes de sécurité...</p></div>",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -939,8 +939,8 @@ async def seed_database():
             "duration_minutes": 75,
             "is_free": False,
             "content": "<div class='module-content'><h1>Méthodologie méthode d'inspection</h1><p>Découvrez la méthodologie propriétaire méthode d'inspection...</p></div>",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid.uuid4()),
@@ -950,8 +950,8 @@ async def seed_database():
             "duration_minutes": 90,
             "is_free": False,
             "content": "<div class='module-content'><h1>Pratique Professionnelle et Certification</h1><p>Cas pratiques et certification finale...</p></div>",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
     
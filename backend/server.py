@@ -2,19 +2,22 @@ from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request,
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 import asyncio
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
-from passlib.context import CryptContext
+from cachetools import TTLCache
 import json
 from io import BytesIO
 import base64
@@ -45,9 +48,68 @@ from ai_chat_service import ai_chat_service
 # Media upload service
 from media_upload_service import media_service
 
+# MongoDB index registry
+from db_indexes import ensure_indexes
+
+# Stockage des dates en datetime BSON natif
+from storage_codec import MOTOR_CLIENT_OPTIONS, to_datetime
+from models import Module
+
+# Réponses JSON rapides (orjson)
+from fast_json import fast_response, TrustedProjection
+
+# Catalogue des modules en mémoire
+from module_catalog import ModuleCatalog
+
+# Compteurs de vues en écriture différée
+from view_counter import ViewCounter
+from student_status import StudentStatusService
+
+# Progression séquentielle
+from progression import ProgressionState, load_progression_state, module_gate, compute_access
+
+# Pagination par curseur
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+# Recherche d'utilisateurs indexée
+from user_search import search_fields, search_query
+
+# Compteurs d'analytics matérialisés
+from analytics_store import AnalyticsStore
+
+# Registre des transactions
+from transaction_ledger import LEDGER_SORT, attach_users, export_transactions, ledger_filter
+
+# Registre des WebSockets du chat
+from chat_connections import ConnectionRegistry
+from chat_pubsub import ChatPubSub, InMemoryBackend, MongoCappedBackend
+from chat_history import fetch_messages
+from chat_read_state import annotate_read, last_message_field, mark_read
+from chat_retention import ChatRetentionJob
+from chat_unread import AdminUnreadCounter
+
+# Tableau de bord admin composite
+from admin_dashboard import SharedResult, gather_sections
+
+# Actions admin groupées
+from admin_bulk import BulkAdminRequest, run_bulk_actions, summarize
+
+# Prospects (pré-inscriptions)
+from prospects import CALLBACK_STATUSES, LIST_PROJECTION, PROSPECT_SORT, export_prospects_csv, normalize_email, prospect_filter, status_counts
+
+# Authenticated user cache
+from user_cache import user_cache
+
+# Password hashing (dedicated bcrypt pool)
+from password_service import password_service, PasswordQueueSaturated
+from token_claims import TokenClaims, TokenVersions, claims_from_payload, ensure_admin, ensure_current_version
+
+# Rotating refresh tokens
+from refresh_token_service import RefreshTokenService, RefreshTokenError
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, **MOTOR_CLIENT_OPTIONS)
 db = client[os.environ['DB_NAME']]
 
 # Stripe configuration
@@ -57,10 +119,52 @@ stripe_api_key = os.environ.get('STRIPE_API_KEY', 'sk_test_emergent')
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-here')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '30'))
+# Délai pendant lequel un jeton tout juste consommé n'est pas traité comme une réutilisation (onglets simultanés)
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = float(os.environ.get('REFRESH_TOKEN_REUSE_GRACE_SECONDS', '10'))
+# Durée pendant laquelle la version de jeton d'un utilisateur est gardée en mémoire
+TOKEN_VERSION_CACHE_SECONDS = int(os.environ.get('TOKEN_VERSION_CACHE_SECONDS', '30'))
+
+# Catalogue des modules : relecture de la version partagée / rechargement complet
+MODULE_CATALOG_CHECK_SECONDS = float(os.environ.get('MODULE_CATALOG_CHECK_SECONDS', '5'))
+MODULE_CATALOG_MAX_AGE_SECONDS = float(os.environ.get('MODULE_CATALOG_MAX_AGE_SECONDS', '300'))
+# Vues de modules : au plus VIEW_FLUSH_SECONDS secondes ou VIEW_FLUSH_MAX_PENDING vues perdues en cas d'arrêt brutal
+VIEW_FLUSH_SECONDS = float(os.environ.get('VIEW_FLUSH_SECONDS', '30'))
+VIEW_FLUSH_MAX_PENDING = int(os.environ.get('VIEW_FLUSH_MAX_PENDING', '1000'))
+# Chat WebSocket : délai maximal d'un envoi avant d'abandonner la socket
+CHAT_SEND_TIMEOUT_SECONDS = float(os.environ.get('CHAT_SEND_TIMEOUT_SECONDS', '2'))
+# File d'envoi par socket (au-delà : client trop lent déconnecté), ping serveur et délai d'inactivité
+CHAT_SEND_QUEUE_SIZE = int(os.environ.get('CHAT_SEND_QUEUE_SIZE', '100'))
+CHAT_PING_SECONDS = float(os.environ.get('CHAT_PING_SECONDS', '25'))
+CHAT_IDLE_TIMEOUT_SECONDS = float(os.environ.get('CHAT_IDLE_TIMEOUT_SECONDS', '75'))
+# Diffusion des événements du chat entre workers : "mongo" (collection plafonnée) ou "memory" (un seul worker)
+CHAT_PUBSUB_BACKEND = os.environ.get('CHAT_PUBSUB_BACKEND', 'mongo')
+CHAT_EVENTS_SIZE_BYTES = int(os.environ.get('CHAT_EVENTS_SIZE_BYTES', str(16 * 1024 * 1024)))
+# Rétention du chat : messages archivés (NDJSON gzip par mois) puis supprimés après CHAT_RETENTION_DAYS jours.
+# CHAT_ARCHIVE_DIR (stockage durable) est obligatoire : non défini, la rétention est désactivée
+CHAT_RETENTION_DAYS = int(os.environ.get('CHAT_RETENTION_DAYS', '30'))
+CHAT_ARCHIVE_DIR = Path(os.environ['CHAT_ARCHIVE_DIR']) if os.environ.get('CHAT_ARCHIVE_DIR') else None
+CHAT_RETENTION_BATCH_SIZE = int(os.environ.get('CHAT_RETENTION_BATCH_SIZE', '500'))
+CHAT_RETENTION_MAX_PER_SECOND = float(os.environ.get('CHAT_RETENTION_MAX_PER_SECOND', '500'))
+CHAT_RETENTION_INTERVAL_SECONDS = float(os.environ.get('CHAT_RETENTION_INTERVAL_SECONDS', '3600'))
+# Compteur global des non-lus admin : recalculé depuis les conversations toutes les N secondes
+CHAT_UNREAD_RECONCILE_SECONDS = float(os.environ.get('CHAT_UNREAD_RECONCILE_SECONDS', '600'))
+# Tableau de bord admin : délai par section, fenêtre de partage entre admins
+DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.environ.get('DASHBOARD_SECTION_TIMEOUT_SECONDS', '2'))
+DASHBOARD_CACHE_SECONDS = float(os.environ.get('DASHBOARD_CACHE_SECONDS', '5'))
+# Scan d'inactivité des élèves (vue student_status + file de relances)
+INACTIVITY_SCAN_SECONDS = float(os.environ.get('INACTIVITY_SCAN_SECONDS', '900'))
+INACTIVITY_SCAN_CHUNK_SIZE = int(os.environ.get('INACTIVITY_SCAN_CHUNK_SIZE', '500'))
+# Durée de vie des totaux de recherche admin
+USER_COUNT_CACHE_SECONDS = int(os.environ.get('USER_COUNT_CACHE_SECONDS', '30'))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+refresh_token_service = RefreshTokenService(
+    db.refresh_tokens,
+    expire_days=REFRESH_TOKEN_EXPIRE_DAYS,
+    reuse_grace_seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS
+)
+analytics_store = AnalyticsStore(db)
 
 # Create the main app
 app = FastAPI(title="Inspecteur Auto API", version="2.0.0")
@@ -111,28 +215,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: User
+    refresh_token: Optional[str] = None
 
-class Module(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    description: str
-    content: str
-    order_index: int
-    duration_minutes: int = 60
-    is_free: bool = False
-    is_published: bool = True  # Added for admin control
-    views_count: int = 0  # Track module popularity
-    
-    # Vidéos intégrées pour rendre les cours plus ludiques
-    video_intro_url: Optional[str] = None  # Vidéo d'introduction (début du module)
-    video_middle_url: Optional[str] = None  # Vidéo au milieu du contenu
-    video_middle_position: int = 50  # Position de la vidéo milieu en % (par défaut 50%)
-    video_end_url: Optional[str] = None  # Vidéo de conclusion (fin du module)
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class ModuleProgress(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -327,7 +413,7 @@ class PrivateChatMessage(BaseModel):
     sender_id: str  # ID de l'utilisateur qui envoie
     sender_type: str  # "student" ou "admin"
     content: str
-    is_read: bool = False
+    is_read: bool = False  # Non stocké : calculé depuis le filigrane du destinataire
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class PrivateConversation(BaseModel):
@@ -351,46 +437,23 @@ class ChatMessageCreate(BaseModel):
     content: str
 
 # WebSocket Connection Manager pour le chat en temps réel
-class ConnectionManager:
-    def __init__(self):
-        # Dictionnaire: user_id -> liste de WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
-    
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-    
-    async def send_to_user(self, user_id: str, message: dict):
-        """Envoie un message à un utilisateur spécifique"""
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    pass
-    
-    async def send_to_admins(self, message: dict):
-        """Envoie un message à tous les admins connectés"""
-        # On envoie à tous les utilisateurs qui ont une connexion
-        # Le frontend filtrera côté admin
-        for user_id, connections in self.active_connections.items():
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except:
-                    pass
-
 # Instance globale du gestionnaire de connexions
-chat_manager = ConnectionManager()
+chat_manager = ConnectionRegistry(
+    send_timeout=CHAT_SEND_TIMEOUT_SECONDS,
+    queue_size=CHAT_SEND_QUEUE_SIZE,
+    ping_interval=CHAT_PING_SECONDS,
+    idle_timeout=CHAT_IDLE_TIMEOUT_SECONDS
+)
+chat_events = ChatPubSub(
+    MongoCappedBackend(db, size_bytes=CHAT_EVENTS_SIZE_BYTES) if CHAT_PUBSUB_BACKEND == "mongo" else InMemoryBackend(),
+    chat_manager
+)
+# Total des messages non lus par les admins, maintenu à l'écriture (voir chat_unread.py)
+admin_unread = AdminUnreadCounter(db, reconcile_interval=CHAT_UNREAD_RECONCILE_SECONDS)
+
+async def publish_admin_unread(total: int):
+    """Pousse le nouveau total aux admins connectés : le badge n'interroge plus l'API"""
+    await chat_events.publish_to_admins({"type": "unread_total", "unread": total})
 
 # ==================== FIN CHAT PRIVÉ ====================
 
@@ -449,49 +512,106 @@ class CourseAnalytics(BaseModel):
     average_completion_time: float
 
 # Auth Helper Functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def _password_queue_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, please retry in a few seconds",
+        headers={"Retry-After": "2"}
+    )
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (is_valid, new_hash) - new_hash is set when the stored hash uses an outdated cost"""
+    try:
+        return await password_service.verify(plain_password, hashed_password)
+    except PasswordQueueSaturated:
+        raise _password_queue_busy()
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
+async def get_password_hash(password: str) -> str:
+    try:
+        return await password_service.hash(password)
+    except PasswordQueueSaturated:
+        raise _password_queue_busy()
+
+def create_access_token(user: User, token_version: int = 0):
+    to_encode = {
+        "sub": user.email,
+        "user_id": user.id,
+        "is_admin": user.is_admin,
+        "has_purchased": user.has_purchased,
+        "token_version": token_version
+    }
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def _decode_access_token(token: str) -> dict:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        user_email: str = payload.get("sub")
-        if user_email is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return payload
+
+async def _load_user(payload: dict) -> User:
+    """Load the token's user through the in-process cache"""
+    user_id = payload.get("user_id")
+    user_email = payload.get("sub")
     
-    user = await db.users.find_one({"email": user_email}, {"_id": 0})
+    cached_user = user_cache.get(user_id=user_id, email=user_email)
+    if cached_user is not None:
+        return cached_user
+    
+    generation = user_cache.generation()
+    query = {"id": user_id} if user_id else {"email": user_email}
+    user = await db.users.find_one(query, {"_id": 0})
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return User(**user)
+    user_obj = User(**user)
+    user_cache.set(user_obj, generation)
+    return user_obj
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = _decode_access_token(credentials.credentials)
+    # Jeton antérieur au dernier changement de droits : l'utilisateur en cache ne suffit pas
+    await ensure_current_version(payload, token_versions)
+    return await _load_user(payload)
 
 async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
     if credentials is None:
         return None
     return await get_current_user(credentials)
 
-async def get_admin_user(current_user: User = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
+# Versions de jeton courantes (voir token_claims.py)
+token_versions = TokenVersions(db, ttl=TOKEN_VERSION_CACHE_SECONDS)
 
-async def require_admin(current_user: User = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
+async def get_token_version(user_id: str) -> Optional[int]:
+    return await token_versions.get(user_id)
+
+def forget_token_version(user_id: str):
+    """À appeler après chaque $inc de token_version"""
+    token_versions.forget(user_id)
+    user_cache.invalidate(user_id=user_id)
+
+async def claims_from_token(token: str) -> TokenClaims:
+    """Authorize from the token claims; only the (cached) token version is checked"""
+    return await claims_from_payload(_decode_access_token(token), token_versions, _load_user)
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenClaims:
+    return await claims_from_token(credentials.credentials)
+
+async def get_token_claims_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
+    if credentials is None:
+        return None
+    return await get_token_claims(credentials)
+
+async def get_admin_user(current_user: TokenClaims = Depends(get_token_claims)):
+    return ensure_admin(current_user)
+
+async def require_admin(current_user: TokenClaims = Depends(get_token_claims)):
+    return ensure_admin(current_user)
 
 # Certificate Generation Function
 def generate_certificate(user_name: str, completion_date: str) -> str:
@@ -571,38 +691,66 @@ async def register(user_data: UserCreate):
     if existing_username:
         raise HTTPException(status_code=400, detail="Username already taken")
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user_dict = user_data.model_dump(exclude={"password"})
     
     user_obj = User(**user_dict)
     doc = user_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     doc["password_hash"] = hashed_password  # Add password_hash to the document
+    doc.update(search_fields(user_obj.full_name, user_obj.email, user_obj.username))
     
     await db.users.insert_one(doc)
+    await analytics_store.record_registration(user_obj.created_at)
     
-    access_token = create_access_token(data={"sub": user_data.email})
-    return Token(access_token=access_token, token_type="bearer", user=user_obj)
+    access_token = create_access_token(user_obj)
+    refresh_token = await refresh_token_service.issue(user_obj.id)
+    return Token(access_token=access_token, token_type="bearer", user=user_obj, refresh_token=refresh_token)
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(login_data: UserLogin):
     user_doc = await db.users.find_one({"email": login_data.email}, {"_id": 0})
-    if not user_doc or not verify_password(login_data.password, user_doc["password_hash"]):
+    if not user_doc:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    is_valid, new_hash = await verify_password(login_data.password, user_doc["password_hash"])
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Update last login
+    # Update last login (and transparently upgrade outdated bcrypt hashes)
+    login_updates = {"last_login": datetime.now(timezone.utc)}
+    if new_hash:
+        login_updates["password_hash"] = new_hash
     await db.users.update_one(
         {"email": login_data.email},
-        {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
+        {"$set": login_updates}
     )
+    user_cache.invalidate(user_id=user_doc.get("id"), email=login_data.email)
     
     user_doc.pop("password_hash", None)
-    if isinstance(user_doc.get('created_at'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
     user = User(**user_doc)
-    access_token = create_access_token(data={"sub": login_data.email})
-    return Token(access_token=access_token, token_type="bearer", user=user)
+    access_token = create_access_token(user, user_doc.get("token_version", 0))
+    refresh_token = await refresh_token_service.issue(user.id)
+    return Token(access_token=access_token, token_type="bearer", user=user, refresh_token=refresh_token)
+
+@api_router.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request_data: RefreshTokenRequest):
+    """Renew the access token without password verification (rotates the refresh token)"""
+    try:
+        user_id, new_refresh_token = await refresh_token_service.rotate(request_data.refresh_token)
+    except RefreshTokenError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid refresh token ({e.reason})")
+    
+    user = await _load_user({"user_id": user_id})
+    token_version = await get_token_version(user_id) or 0
+    access_token = create_access_token(user, token_version)
+    return Token(access_token=access_token, token_type="bearer", user=user, refresh_token=new_refresh_token)
+
+@api_router.post("/auth/logout")
+async def logout(request_data: RefreshTokenRequest):
+    """Revoke the refresh token family of this session"""
+    await refresh_token_service.revoke(request_data.refresh_token)
+    return {"message": "Logged out"}
 
 @api_router.get("/auth/me", response_model=User)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
@@ -641,7 +789,7 @@ async def submit_pre_registration(submission: PreRegistrationSubmit):
     
     # Enregistrer le questionnaire
     questionnaire = PreRegistrationQuestionnaire(
-        email=submission.email,
+        email=normalize_email(submission.email),
         full_name=submission.full_name,
         phone=submission.phone,
         answers=submission.answers,
@@ -652,23 +800,38 @@ async def submit_pre_registration(submission: PreRegistrationSubmit):
     )
     
     doc = questionnaire.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
-    await db.pre_registration_questionnaires.insert_one(doc)
+    # Un questionnaire par email (index unique) : une nouvelle soumission met à jour
+    # les réponses sans toucher au suivi de rappel ni à la date de première soumission
+    on_insert = {field: doc.pop(field) for field in ("id", "created_at", "callback_status", "callback_notes")}
+    doc["updated_at"] = datetime.now(timezone.utc)
+    upsert_args = (
+        {"email": doc["email"]},
+        {"$set": doc, "$setOnInsert": on_insert},
+    )
+    try:
+        saved = await db.pre_registration_questionnaires.find_one_and_update(
+            *upsert_args, upsert=True, projection={"_id": 0, "id": 1}, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Deux soumissions simultanées : la seconde met à jour le document créé par la première
+        saved = await db.pre_registration_questionnaires.find_one_and_update(
+            *upsert_args, upsert=True, projection={"_id": 0, "id": 1}, return_document=ReturnDocument.AFTER
+        )
     
     return {
         "validated": profile_validated,
         "score": validation_score,
         "message": "Félicitations ! Votre profil correspond parfaitement aux critères de la formation d'inspecteur automobile. Vous pouvez maintenant procéder à l'inscription.",
-        "questionnaire_id": questionnaire.id
+        "questionnaire_id": saved["id"]
     }
 
 @api_router.get("/pre-registration/check/{email}")
 async def check_pre_registration(email: str):
     """Vérifier si un email a déjà rempli le questionnaire pré-inscription"""
     questionnaire = await db.pre_registration_questionnaires.find_one(
-        {"email": email},
-        {"_id": 0}
+        {"email": normalize_email(email)},
+        {"_id": 0, "id": 1, "profile_validated": 1}
     )
     
     if not questionnaire:
@@ -682,18 +845,66 @@ async def check_pre_registration(email: str):
 
 # Admin Routes
 @api_router.get("/admin/pre-registrations")
-async def get_pre_registrations(current_user: User = Depends(require_admin)):
-    """Get all pre-registration questionnaires (Qualiopi compliance)"""
-    questionnaires = await db.pre_registration_questionnaires.find(
-        {},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(1000)
+async def get_pre_registrations(
+    current_user: TokenClaims = Depends(require_admin),
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    callback_status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Questionnaires de pré-inscription (Qualiopi) : filtres, pagination par curseur, sans les réponses"""
+    limit = max(1, min(limit, 500))
+    query = prospect_filter(callback_status, date_from, date_to)
     
-    for q in questionnaires:
-        if isinstance(q.get('created_at'), str):
-            q['created_at'] = datetime.fromisoformat(q['created_at'])
+    page_query = query
+    if cursor:
+        try:
+            page_query = {"$and": [query, keyset_filter(PROSPECT_SORT, decode_cursor(cursor))]}
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    prospects = await db.pre_registration_questionnaires.find(
+        page_query, LIST_PROJECTION
+    ).sort(PROSPECT_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(prospects) > limit:
+        prospects = prospects[:limit]
+        last = prospects[-1]
+        next_cursor = encode_cursor({field: last.get(field) for field, _ in PROSPECT_SORT})
+    
+    response = {"prospects": prospects, "next_cursor": next_cursor}
+    if not cursor:
+        # Compteurs par statut : première page seulement, comptages sur index
+        response["counts"] = await status_counts(db)
+    return fast_response(response)
+
+@api_router.get("/admin/pre-registrations/export")
+async def export_pre_registrations(
+    current_user: TokenClaims = Depends(require_admin),
+    callback_status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Export CSV des prospects, écrit au fil de la lecture"""
+    query = prospect_filter(callback_status, date_from, date_to)
+    filename = f"prospects-{datetime.now(timezone.utc).strftime('%Y%m%d')}.csv"
+    
+    return StreamingResponse(
+        export_prospects_csv(db, query),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/admin/pre-registrations/{prospect_id}")
+async def get_pre_registration(prospect_id: str, current_user: TokenClaims = Depends(require_admin)):
+    """Fiche complète d'un prospect (avec les réponses au questionnaire)"""
+    prospect = await db.pre_registration_questionnaires.find_one({"id": prospect_id}, {"_id": 0})
+    if not prospect:
+        raise HTTPException(status_code=404, detail="Prospect non trouvé")
     
-    return questionnaires
+    return fast_response(prospect)
 
 # Mise à jour du statut de rappel d'un prospect
 class ProspectCallbackUpdate(BaseModel):
@@ -704,20 +915,18 @@ class ProspectCallbackUpdate(BaseModel):
 async def update_prospect_callback(
     prospect_id: str, 
     update: ProspectCallbackUpdate,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Mettre à jour le statut de rappel d'un prospect"""
-    valid_statuses = ["pending", "called", "interested", "not_interested", "no_answer", "converted"]
-    
-    if update.callback_status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Statut invalide. Valeurs possibles: {valid_statuses}")
+    if update.callback_status not in CALLBACK_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Statut invalide. Valeurs possibles: {CALLBACK_STATUSES}")
     
     result = await db.pre_registration_questionnaires.update_one(
         {"id": prospect_id},
         {"$set": {
             "callback_status": update.callback_status,
             "callback_notes": update.callback_notes,
-            "callback_updated_at": datetime.now(timezone.utc).isoformat()
+            "callback_updated_at": datetime.now(timezone.utc)
         }}
     )
     
@@ -727,7 +936,7 @@ async def update_prospect_callback(
     return {"message": "Statut mis à jour avec succès"}
 
 @api_router.delete("/admin/pre-registrations/{prospect_id}")
-async def delete_prospect(prospect_id: str, current_user: User = Depends(require_admin)):
+async def delete_prospect(prospect_id: str, current_user: TokenClaims = Depends(require_admin)):
     """Supprimer un prospect"""
     result = await db.pre_registration_questionnaires.delete_one({"id": prospect_id})
     
@@ -739,17 +948,17 @@ async def delete_prospect(prospect_id: str, current_user: User = Depends(require
 # ==================== VALIDATION ADMIN & SUIVI ÉLÈVES ====================
 
 @api_router.get("/admin/students/pending-validation")
-async def get_pending_validations(current_user: User = Depends(require_admin)):
+async def get_pending_validations(current_user: TokenClaims = Depends(require_admin)):
     """Récupère les élèves en attente de validation de leur projet professionnel"""
     students = await db.users.find(
         {"has_purchased": True, "is_validated": False, "validation_pending": True},
-        {"_id": 0, "password_hash": 0}
+        {"_id": 0, "password_hash": 0, "search_keys": 0, "search_grams": 0}
     ).sort("created_at", -1).to_list(100)
     
     return students
 
 @api_router.post("/admin/students/{user_id}/validate")
-async def validate_student(user_id: str, validated: bool, notes: str = "", current_user: User = Depends(require_admin)):
+async def validate_student(user_id: str, validated: bool, notes: str = "", current_user: TokenClaims = Depends(require_admin)):
     """Valider ou refuser le projet professionnel d'un élève"""
     result = await db.users.update_one(
         {"id": user_id},
@@ -761,63 +970,77 @@ async def validate_student(user_id: str, validated: bool, notes: str = "", curre
             }
         }
     )
+    user_cache.invalidate(user_id=user_id)
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     return {"message": "Validation mise à jour", "validated": validated}
 
+STUDENTS_PROGRESS_SORT = [("created_at", -1), ("user_id", -1)]
+INACTIVITY_DAYS = 10
+STUDENT_PROFILE_PROJECTION = {"_id": 0, "password_hash": 0, "search_keys": 0, "search_grams": 0}
+
 @api_router.get("/admin/students/progress")
-async def get_students_progress(current_user: User = Depends(require_admin)):
-    """Récupère la progression de tous les élèves avec alertes d'inactivité"""
-    students = await db.users.find(
-        {"has_purchased": True},
-        {"_id": 0, "password_hash": 0}
-    ).sort("created_at", -1).to_list(500)
-    
-    ten_days_ago = datetime.now(timezone.utc) - timedelta(days=10)
-    
-    result = []
-    for student in students:
-        # Get progress
-        progress = await db.module_progress.find({"user_id": student["id"]}).to_list(20)
-        completed_modules = sum(1 for p in progress if p.get("completed", False))
-        total_modules = await db.modules.count_documents({})
-        
-        # Check last activity
-        last_activity = student.get("last_activity")
-        if last_activity and isinstance(last_activity, str):
-            last_activity = datetime.fromisoformat(last_activity.replace('Z', '+00:00'))
-        
-        is_inactive = False
-        if last_activity:
-            is_inactive = last_activity < ten_days_ago
-        elif student.get("created_at"):
-            created = student.get("created_at")
-            if isinstance(created, str):
-                created = datetime.fromisoformat(created.replace('Z', '+00:00'))
-            is_inactive = created < ten_days_ago
-        
-        result.append({
-            **student,
+async def get_students_progress(
+    current_user: TokenClaims = Depends(require_admin),
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    needs_reminder: Optional[bool] = None
+):
+    """Progression des élèves lue dans la vue student_status (maintenue par le scan d'inactivité)"""
+    limit = max(1, min(limit, 500))
+    total_modules = (await module_catalog.get()).total
+    
+    query: Dict[str, Any] = {}
+    if needs_reminder is not None:
+        query["needs_reminder"] = needs_reminder
+    if cursor:
+        try:
+            query = {"$and": [query, keyset_filter(STUDENTS_PROGRESS_SORT, decode_cursor(cursor))]}
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    statuses = await db.student_status.find(query, {"_id": 0}).sort(STUDENTS_PROGRESS_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(statuses) > limit:
+        statuses = statuses[:limit]
+        last = statuses[-1]
+        next_cursor = encode_cursor({field: last.get(field) for field, _ in STUDENTS_PROGRESS_SORT})
+    
+    # Fiches de la page uniquement (code Weproov, inspection, validation)
+    profiles = {}
+    if statuses:
+        async for user in db.users.find({"id": {"$in": [s["user_id"] for s in statuses]}}, STUDENT_PROFILE_PROJECTION):
+            profiles[user["id"]] = user
+    
+    students = []
+    for status in statuses:
+        completed = status.get("completed_modules", 0)
+        students.append({
+            **profiles.get(status["user_id"], {"id": status["user_id"], "full_name": status.get("full_name"), "email": status.get("email")}),
             "progress": {
-                "completed_modules": completed_modules,
+                "completed_modules": completed,
                 "total_modules": total_modules,
-                "percentage": round((completed_modules / total_modules * 100) if total_modules > 0 else 0, 1)
+                "percentage": round(completed / total_modules * 100, 1) if total_modules > 0 else 0
             },
-            "is_inactive": is_inactive,
-            "needs_reminder": is_inactive and completed_modules < total_modules
+            "is_inactive": status.get("is_inactive", False),
+            "needs_reminder": status.get("needs_reminder", False)
         })
     
-    return result
+    response = {"students": students, "next_cursor": next_cursor}
+    if not cursor:
+        response["total_students"] = await db.student_status.count_documents({})
+    return fast_response(response)
 
 @api_router.post("/admin/students/{user_id}/weproov-code")
-async def set_weproov_code(user_id: str, code: str, current_user: User = Depends(require_admin)):
+async def set_weproov_code(user_id: str, code: str, current_user: TokenClaims = Depends(require_admin)):
     """Attribuer un code Weproov à un élève pour son inspection test"""
     result = await db.users.update_one(
         {"id": user_id},
         {"$set": {"weproov_code": code}}
     )
+    user_cache.invalidate(user_id=user_id)
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -825,7 +1048,7 @@ async def set_weproov_code(user_id: str, code: str, current_user: User = Depends
     return {"message": "Code Weproov attribué", "code": code}
 
 @api_router.post("/admin/students/{user_id}/validate-inspection")
-async def validate_inspection(user_id: str, validated: bool, notes: str = "", current_user: User = Depends(require_admin)):
+async def validate_inspection(user_id: str, validated: bool, notes: str = "", current_user: TokenClaims = Depends(require_admin)):
     """Valider l'inspection test d'un élève"""
     update_data = {
         "inspection_validated": validated,
@@ -836,15 +1059,26 @@ async def validate_inspection(user_id: str, validated: bool, notes: str = "", cu
         {"id": user_id},
         {"$set": update_data}
     )
+    user_cache.invalidate(user_id=user_id)
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     return {"message": "Inspection validée" if validated else "Inspection refusée"}
 
+@api_router.post("/admin/bulk")
+async def run_admin_bulk_actions(request: BulkAdminRequest, current_user: TokenClaims = Depends(require_admin)):
+    """Actions admin groupées (validations, codes Weproov, inspections, rappels prospects) en bulk_write"""
+    results, touched_users = await run_bulk_actions(db, request)
+    # Une seule invalidation du cache pour tout le lot
+    if touched_users:
+        user_cache.invalidate_many(touched_users)
+    
+    return {"results": results, "summary": summarize(results)}
+
 # Endpoint pour l'élève - upload permis
 @api_router.post("/user/upload-license")
-async def upload_driving_license(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def upload_driving_license(file: UploadFile = File(...), current_user: TokenClaims = Depends(get_token_claims)):
     """Upload du permis de conduire par l'élève"""
     if not file.content_type.startswith('image/') and file.content_type != 'application/pdf':
         raise HTTPException(status_code=400, detail="Fichier doit être une image ou un PDF")
@@ -866,14 +1100,15 @@ async def upload_driving_license(file: UploadFile = File(...), current_user: Use
         {"id": current_user.id},
         {"$set": {"driving_license_url": license_url}}
     )
+    user_cache.invalidate(user_id=current_user.id)
     
     return {"message": "Permis uploadé avec succès", "url": license_url}
 
 # Endpoint pour vérifier si l'élève peut accéder à la formation
 @api_router.get("/user/access-status")
-async def get_access_status(current_user: User = Depends(get_current_user)):
+async def get_access_status(current_user: TokenClaims = Depends(get_token_claims)):
     """Vérifie le statut d'accès de l'élève"""
-    user = await db.users.find_one({"id": current_user.id}, {"_id": 0, "password_hash": 0})
+    user = await db.users.find_one({"id": current_user.id}, {"_id": 0, "password_hash": 0, "search_keys": 0, "search_grams": 0})
     
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -892,109 +1127,150 @@ async def get_access_status(current_user: User = Depends(get_current_user)):
 
 # Mise à jour de l'activité de l'élève
 @api_router.post("/user/activity")
-async def update_user_activity(current_user: User = Depends(get_current_user)):
+async def update_user_activity(current_user: TokenClaims = Depends(get_token_claims)):
     """Met à jour la dernière activité de l'utilisateur"""
+    now = datetime.now(timezone.utc)
     await db.users.update_one(
         {"id": current_user.id},
-        {"$set": {"last_activity": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"last_activity": now}}
+    )
+    # /auth/me sert l'utilisateur en cache, last_activity compris
+    user_cache.invalidate(user_id=current_user.id)
+    # Réactivation visible immédiatement (le scan la rattraperait au prochain passage)
+    await db.student_status.update_one(
+        {"user_id": current_user.id},
+        {"$set": {"last_seen": now, "is_inactive": False, "needs_reminder": False, "inactive_since": None}}
     )
     return {"message": "Activité mise à jour"}
 
 # ==================== FIN VALIDATION ADMIN ====================
 
-@api_router.get("/admin/analytics")
-async def get_analytics(current_user: User = Depends(require_admin)):
-    """Get platform analytics"""
-    # User Analytics
-    total_users = await db.users.count_documents({})
-    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    week_ago = today - timedelta(days=7)
+async def build_analytics() -> Dict[str, Any]:
+    """Analytics de la plateforme (compteurs matérialisés, voir analytics_store.py)"""
+    summary, catalog = await asyncio.gather(analytics_store.summary(), module_catalog.get())
+    totals = summary["totals"]
     
-    new_users_today = await db.users.count_documents({
-        "created_at": {"$gte": today.isoformat()}
-    })
-    
-    new_users_this_week = await db.users.count_documents({
-        "created_at": {"$gte": week_ago.isoformat()}
-    })
-    
-    paid_users = await db.users.count_documents({"has_purchased": True})
+    total_users = totals["registrations"]
+    paid_users = totals["paid_users"]
+    total_completions = totals["completions"]
     
     # Completion rate
-    total_modules = await db.modules.count_documents({})
-    if total_modules > 0:
-        total_possible_completions = total_users * total_modules
-        total_actual_completions = await db.module_progress.count_documents({"completed": True})
-        completion_rate = (total_actual_completions / total_possible_completions * 100) if total_possible_completions > 0 else 0
-    else:
-        completion_rate = 0
+    total_modules = catalog.total
+    total_possible_completions = total_users * total_modules
+    completion_rate = (total_completions / total_possible_completions * 100) if total_possible_completions > 0 else 0
     
     # Course Analytics
-    most_popular_module_pipeline = [
-        {"$group": {"_id": "$module_id", "views": {"$sum": 1}}},
-        {"$sort": {"views": -1}},
-        {"$limit": 1}
-    ]
-    
-    popular_module_result = await db.module_progress.aggregate(most_popular_module_pipeline).to_list(1)
     most_popular_module = "N/A"
-    if popular_module_result:
-        module_doc = await db.modules.find_one({"id": popular_module_result[0]["_id"]})
+    module_completions = totals["module_completions"]
+    if module_completions:
+        module_doc = catalog.by_id.get(max(module_completions, key=module_completions.get))
         if module_doc:
             most_popular_module = module_doc["title"]
     
     return {
         "user_analytics": {
             "total_users": total_users,
-            "new_users_today": new_users_today,
-            "new_users_this_week": new_users_this_week,
+            "new_users_today": summary["today"]["registrations"],
+            "new_users_this_week": summary["week"]["registrations"],
             "paid_users": paid_users,
             "completion_rate": completion_rate
         },
         "course_analytics": {
             "total_modules": total_modules,
-            "total_completions": await db.module_progress.count_documents({"completed": True}),
+            "total_completions": total_completions,
             "most_popular_module": most_popular_module,
             "conversion_rate": (paid_users / total_users * 100) if total_users > 0 else 0
         },
         "revenue_analytics": {
-            "total_revenue": paid_users * 297,  # 297€ per course
-            "monthly_revenue": paid_users * 297,  # Simplified for demo
-            "average_order_value": 297
+            "total_revenue": totals["revenue"],
+            "monthly_revenue": summary["month"]["revenue"],
+            "average_order_value": round(totals["revenue"] / totals["purchases"], 2) if totals["purchases"] else 0
         }
     }
 
+@api_router.get("/admin/analytics")
+async def get_analytics(current_user: TokenClaims = Depends(require_admin)):
+    """Get platform analytics"""
+    return await build_analytics()
+
+# Tableau de bord admin : sections calculées en parallèle (voir admin_dashboard.py)
+async def _dashboard_recent_users():
+    return await db.users.find({}, STUDENT_PROFILE_PROJECTION).sort([("created_at", -1), ("id", -1)]).to_list(5)
+
+async def _dashboard_recent_transactions():
+    transactions = await db.payment_transactions.find({}, {"_id": 0}).sort(LEDGER_SORT).to_list(5)
+    return await attach_users(db, transactions)
+
+async def _dashboard_students():
+    pending_validations, needs_reminder = await asyncio.gather(
+        db.users.count_documents({"has_purchased": True, "is_validated": False, "validation_pending": True}),
+        db.student_status.count_documents({"needs_reminder": True})
+    )
+    return {"pending_validations": pending_validations, "needs_reminder": needs_reminder}
+
+async def _dashboard_chat():
+    unread, conversations = await asyncio.gather(
+        admin_unread.total(),
+        db.private_conversations.find({}, {"_id": 0}).sort("updated_at", -1).to_list(5)
+    )
+    return {"unread_total": unread, "recent_conversations": conversations}
+
+async def compute_dashboard() -> Dict[str, Any]:
+    return await gather_sections({
+        "analytics": build_analytics,
+        "recent_users": _dashboard_recent_users,
+        "recent_transactions": _dashboard_recent_transactions,
+        "students": _dashboard_students,
+        "chat": _dashboard_chat,
+    }, timeout=DASHBOARD_SECTION_TIMEOUT_SECONDS)
+
+admin_dashboard = SharedResult(compute_dashboard, ttl=DASHBOARD_CACHE_SECONDS)
+
+@api_router.get("/admin/dashboard")
+async def get_admin_dashboard(current_user: TokenClaims = Depends(require_admin)):
+    """Tableau de bord admin en une requête (sections indisponibles listées dans ``partial``)"""
+    return fast_response(await admin_dashboard.get())
+
+# Totaux de la liste admin des utilisateurs, par filtre de recherche
+user_count_cache: TTLCache = TTLCache(maxsize=256, ttl=USER_COUNT_CACHE_SECONDS)
+
+async def count_users(query: Dict[str, Any]) -> int:
+    """Total pour la pagination : estimé sans filtre, mis en cache avec filtre"""
+    if not query:
+        return await db.users.estimated_document_count()
+    key = json.dumps(query, sort_keys=True)
+    if key not in user_count_cache:
+        user_count_cache[key] = await db.users.count_documents(query)
+    return user_count_cache[key]
+
 @api_router.get("/admin/users")
 async def get_all_users(
-    admin_user: User = Depends(get_admin_user),
+    admin_user: TokenClaims = Depends(get_admin_user),
     page: int = 1,
     limit: int = 20,
     search: Optional[str] = None
 ):
+    page = max(1, page)
+    limit = max(1, min(limit, 100))
     skip = (page - 1) * limit
-    query = {}
-    
-    if search:
-        query = {
-            "$or": [
-                {"full_name": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"username": {"$regex": search, "$options": "i"}}
-            ]
-        }
-    
-    users = await db.users.find(query, {"_id": 0, "password_hash": 0}).skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
-    total = await db.users.count_documents(query)
-    
-    # Add progress info for each user
+    query = (search_query(search) if search else None) or {}
+    
+    users = await db.users.find(
+        query, {"_id": 0, "password_hash": 0, "search_keys": 0, "search_grams": 0}
+    ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    total = await count_users(query)
+    
+    # Progression de la page en une seule agrégation
+    total_modules = (await module_catalog.get()).total
+    completed_by_user = {
+        row["_id"]: row["completed"]
+        async for row in db.module_progress.aggregate([
+            {"$match": {"user_id": {"$in": [user["id"] for user in users]}, "completed": True}},
+            {"$group": {"_id": "$user_id", "completed": {"$sum": 1}}}
+        ])
+    }
     for user in users:
-        if isinstance(user.get('created_at'), str):
-            user['created_at'] = datetime.fromisoformat(user['created_at'])
-        
-        # Get user progress
-        user_progress = await db.module_progress.find({"user_id": user["id"]}).to_list(100)
-        completed_modules = sum(1 for p in user_progress if p.get("completed", False))
-        total_modules = await db.modules.count_documents({})
+        completed_modules = completed_by_user.get(user["id"], 0)
         
         user["progress"] = {
             "completed_modules": completed_modules,
@@ -1002,7 +1278,7 @@ async def get_all_users(
             "completion_percentage": (completed_modules / total_modules * 100) if total_modules > 0 else 0
         }
     
-    return {
+    return fast_response({
         "users": users,
         "pagination": {
             "current_page": page,
@@ -1010,27 +1286,72 @@ async def get_all_users(
             "total_users": total,
             "users_per_page": limit
         }
-    }
+    })
 
 @api_router.get("/admin/transactions")
-async def get_transactions(admin_user: User = Depends(get_admin_user)):
-    transactions = await db.payment_transactions.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    
-    for transaction in transactions:
-        if isinstance(transaction.get('created_at'), str):
-            transaction['created_at'] = datetime.fromisoformat(transaction['created_at'])
-        if isinstance(transaction.get('updated_at'), str):
-            transaction['updated_at'] = datetime.fromisoformat(transaction['updated_at'])
-        
-        # Get user info
-        if transaction.get('user_id'):
-            user = await db.users.find_one({"id": transaction['user_id']}, {"_id": 0, "full_name": 1, "email": 1})
-            transaction['user'] = user
+async def get_transactions(
+    admin_user: TokenClaims = Depends(get_admin_user),
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Registre des transactions (pagination par curseur, filtres statut / période)"""
+    limit = max(1, min(limit, 200))
+    query = ledger_filter(status, date_from, date_to)
     
-    return transactions
+    page_query = query
+    if cursor:
+        try:
+            page_query = {"$and": [query, keyset_filter(LEDGER_SORT, decode_cursor(cursor))]}
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    transactions = await db.payment_transactions.find(page_query, {"_id": 0}).sort(LEDGER_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor({field: last.get(field) for field, _ in LEDGER_SORT})
+    
+    response = {"transactions": await attach_users(db, transactions), "next_cursor": next_cursor}
+    if not cursor:
+        # Totaux par statut sur l'ensemble du filtre (première page seulement)
+        response["summary"] = {
+            row["_id"]: {"count": row["count"], "amount": row["amount"]}
+            async for row in db.payment_transactions.aggregate([
+                {"$match": query},
+                {"$group": {"_id": "$payment_status", "count": {"$sum": 1}, "amount": {"$sum": "$amount"}}}
+            ])
+        }
+    return fast_response(response)
+
+@api_router.get("/admin/transactions/export")
+async def export_transactions_file(
+    admin_user: TokenClaims = Depends(get_admin_user),
+    format: str = "csv",
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Export CSV / NDJSON des transactions, diffusé au fil de l'eau"""
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    
+    query = ledger_filter(status, date_from, date_to)
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    filename = f"transactions-{datetime.now(timezone.utc).strftime('%Y%m%d')}.{format}"
+    
+    return StreamingResponse(
+        export_transactions(db, query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @api_router.get("/admin/course-progress")
-async def get_course_progress(admin_user: User = Depends(get_admin_user)):
+async def get_course_progress(admin_user: TokenClaims = Depends(get_admin_user)):
     # Get module completion stats
     pipeline = [
         {
@@ -1046,8 +1367,9 @@ async def get_course_progress(admin_user: User = Depends(get_admin_user)):
     progress_stats = await db.module_progress.aggregate(pipeline).to_list(100)
     
     # Add module info
+    catalog = await module_catalog.get()
     for stat in progress_stats:
-        module = await db.modules.find_one({"id": stat["_id"]}, {"_id": 0, "title": 1, "duration_minutes": 1})
+        module = catalog.by_id.get(stat["_id"])
         if module:
             stat["module_title"] = module["title"]
             stat["completion_rate"] = (stat["completed"] / stat["total_attempts"] * 100) if stat["total_attempts"] > 0 else 0
@@ -1058,7 +1380,7 @@ async def get_course_progress(admin_user: User = Depends(get_admin_user)):
 async def update_user(
     user_id: str,
     updates: Dict[str, Any],
-    admin_user: User = Depends(get_admin_user)
+    admin_user: TokenClaims = Depends(get_admin_user)
 ):
     # Remove sensitive fields
     allowed_fields = ["is_active", "has_purchased", "is_admin", "full_name", "email"]
@@ -1067,47 +1389,93 @@ async def update_user(
     if not filtered_updates:
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
-    result = await db.users.update_one(
+    existing = None
+    if any(field in filtered_updates for field in ("full_name", "email")):
+        existing = await db.users.find_one({"id": user_id}, {"_id": 0, "full_name": 1, "email": 1, "username": 1})
+    if existing and ("full_name" in filtered_updates or "email" in filtered_updates):
+        # Recalcul des champs de recherche
+        merged = {**existing, **filtered_updates}
+        filtered_updates.update(search_fields(merged.get("full_name"), merged.get("email"), merged.get("username")))
+    
+    update_ops = {"$set": filtered_updates}
+    if any(field in filtered_updates for field in ("is_active", "is_admin", "has_purchased", "email")):
+        # Les jetons déjà émis portent ces valeurs : on les rend obsolètes
+        update_ops["$inc"] = {"token_version": 1}
+    
+    # Valeur précédente lue atomiquement : un paiement simultané ne compte pas deux fois dans paid_users
+    previous = await db.users.find_one_and_update(
         {"id": user_id},
-        {"$set": filtered_updates}
+        update_ops,
+        projection={"_id": 0, "has_purchased": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="User not found")
+    forget_token_version(user_id)
+    if "has_purchased" in filtered_updates and bool(filtered_updates["has_purchased"]) != bool(previous.get("has_purchased")):
+        await analytics_store.record_paid_access_change(bool(filtered_updates["has_purchased"]))
+        await student_status.refresh_user(user_id)
+    if filtered_updates.get("is_active") is False:
+        await refresh_token_service.revoke_user(user_id)
     
     return {"message": "User updated successfully"}
 
+@api_router.get("/admin/metrics")
+async def get_runtime_metrics(admin_user: TokenClaims = Depends(get_admin_user)):
+    """Compteurs internes du worker (caches, files d'attente)"""
+    return {
+        "user_cache": user_cache.stats(),
+        "password_hashing": password_service.stats(),
+        "refresh_tokens": refresh_token_service.stats(),
+        "module_catalog": module_catalog.stats(),
+        "module_views": view_counter.stats(),
+        "student_status": student_status.stats(),
+        "admin_dashboard": admin_dashboard.stats(),
+        "chat_connections": chat_manager.stats(),
+        "chat_events": chat_events.stats(),
+        "chat_retention": chat_retention.stats(),
+        "chat_unread": admin_unread.stats()
+    }
+
 # Module Routes
+# Les listes de modules sont lues avec la projection du modèle : pas de revalidation
+module_projection = TrustedProjection(Module)
+module_catalog = ModuleCatalog(
+    db.modules,
+    db.cache_versions,
+    projection=module_projection.projection,
+    prepare=module_projection.prepare,
+    check_interval=MODULE_CATALOG_CHECK_SECONDS,
+    max_age=MODULE_CATALOG_MAX_AGE_SECONDS
+)
+view_counter = ViewCounter(db.modules, flush_interval=VIEW_FLUSH_SECONDS, max_pending=VIEW_FLUSH_MAX_PENDING)
+student_status = StudentStatusService(
+    db,
+    module_catalog,
+    inactivity_days=INACTIVITY_DAYS,
+    chunk_size=INACTIVITY_SCAN_CHUNK_SIZE,
+    interval=INACTIVITY_SCAN_SECONDS
+)
+EMPTY_PROGRESSION = ProgressionState(set(), set(), {})
+
 @api_router.get("/modules/all-public", response_model=List[Module])
 async def get_all_modules_public():
     """Get all published modules (for public pages like Programme Détaillé)"""
-    modules = await db.modules.find({"is_published": True}, {"_id": 0}).sort("order_index", 1).to_list(100)
+    catalog = await module_catalog.get()
     
-    for module in modules:
-        for field in ['created_at', 'updated_at']:
-            if isinstance(module.get(field), str):
-                module[field] = datetime.fromisoformat(module[field])
-    
-    return modules
+    return fast_response(catalog.published)
 
 @api_router.get("/modules", response_model=List[Module])
-async def get_modules(current_user: Optional[User] = Depends(get_current_user_optional)):
-    query = {}
+async def get_modules(current_user: Optional[TokenClaims] = Depends(get_token_claims_optional)):
+    catalog = await module_catalog.get()
     if not current_user or not current_user.has_purchased:
-        query = {"is_free": True}
+        return fast_response(catalog.free)
     
-    modules = await db.modules.find(query, {"_id": 0}).sort("order_index", 1).to_list(100)
-    
-    for module in modules:
-        for field in ['created_at', 'updated_at']:
-            if isinstance(module.get(field), str):
-                module[field] = datetime.fromisoformat(module[field])
-    
-    return modules
+    return fast_response(catalog.modules)
 
 @api_router.get("/modules/{module_id}", response_model=Module)
-async def get_module(module_id: str, current_user: Optional[User] = Depends(get_current_user_optional)):
-    module = await db.modules.find_one({"id": module_id}, {"_id": 0})
+async def get_module(module_id: str, current_user: Optional[TokenClaims] = Depends(get_token_claims_optional)):
+    module = (await module_catalog.get()).by_id.get(module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
@@ -1115,55 +1483,55 @@ async def get_module(module_id: str, current_user: Optional[User] = Depends(get_
         if not current_user or not current_user.has_purchased:
             raise HTTPException(status_code=403, detail="Purchase required to access this module")
     
-    # Increment view count
-    await db.modules.update_one(
-        {"id": module_id},
-        {"$inc": {"views_count": 1}}
-    )
-    
-    for field in ['created_at', 'updated_at']:
-        if isinstance(module.get(field), str):
-            module[field] = datetime.fromisoformat(module[field])
+    # Increment view count (écrit par lots)
+    view_counter.record(module_id)
     
     return Module(**module)
 
 # Progress Routes
 @api_router.post("/progress/{module_id}/complete")
 async def mark_module_complete(module_id: str, current_user: User = Depends(get_current_user)):
-    module = await db.modules.find_one({"id": module_id})
+    catalog = await module_catalog.get()
+    module = catalog.by_id.get(module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
     if not module.get("is_free", False) and not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Purchase required to access this module")
     
-    existing_progress = await db.module_progress.find_one({
-        "user_id": current_user.id,
-        "module_id": module_id
-    })
-    
-    if existing_progress:
-        await db.module_progress.update_one(
-            {"id": existing_progress["id"]},
-            {"$set": {"completed": True, "completed_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    else:
+    # Écritures conditionnelles : une complétion n'est comptée (et datée) qu'une fois,
+    # même si deux requêtes arrivent en même temps ou si le module est re-complété
+    now = datetime.now(timezone.utc)
+    result = await db.module_progress.update_one(
+        {"user_id": current_user.id, "module_id": module_id, "completed": {"$ne": True}},
+        [{"$set": {"completed": True, "completed_at": {"$ifNull": ["$completed_at", now]}}}]
+    )
+    newly_completed = result.modified_count > 0
+    if not newly_completed:
+        # Aucune ligne à compléter : première complétion, ou module déjà complété (ligne intacte)
         progress = ModuleProgress(
             user_id=current_user.id,
             module_id=module_id,
             completed=True,
-            completed_at=datetime.now(timezone.utc)
+            completed_at=now
         )
-        doc = progress.model_dump()
-        if doc.get('completed_at'):
-            doc['completed_at'] = doc['completed_at'].isoformat()
-        doc['created_at'] = doc['created_at'].isoformat()
-        
-        await db.module_progress.insert_one(doc)
+        try:
+            result = await db.module_progress.update_one(
+                {"user_id": current_user.id, "module_id": module_id},
+                {"$setOnInsert": progress.model_dump()},
+                upsert=True
+            )
+            newly_completed = result.upserted_id is not None
+        except DuplicateKeyError:
+            # Upsert concurrent (index user_module_unique) : l'autre requête a compté la complétion
+            pass
+    if newly_completed:
+        await analytics_store.record_completion(module_id)
     
     # Check if all modules are completed to generate certificate
     if current_user.has_purchased:
-        total_modules = await db.modules.count_documents({})
+        await student_status.refresh_user(current_user.id)
+        total_modules = catalog.total
         completed_modules = await db.module_progress.count_documents({
             "user_id": current_user.id,
             "completed": True
@@ -1181,82 +1549,40 @@ async def mark_module_complete(module_id: str, current_user: User = Depends(get_
                 {"id": current_user.id},
                 {"$set": {"certificate_url": certificate_url}}
             )
+            user_cache.invalidate(user_id=current_user.id)
     
     return {"message": "Module marked as complete"}
 
 @api_router.get("/progress")
-async def get_user_progress(current_user: User = Depends(get_current_user)):
+async def get_user_progress(current_user: TokenClaims = Depends(get_token_claims)):
     progress = await db.module_progress.find({"user_id": current_user.id}, {"_id": 0}).to_list(100)
     
-    for p in progress:
-        if isinstance(p.get('completed_at'), str):
-            p['completed_at'] = datetime.fromisoformat(p['completed_at'])
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
-    
     return progress
 
+@api_router.get("/progress/access")
+async def get_course_access(current_user: TokenClaims = Depends(get_token_claims)):
+    """Accès de l'utilisateur à tous les modules (progression séquentielle), indexé par id de module"""
+    catalog = await module_catalog.get()
+    state = await load_progression_state(db, current_user.id) if current_user.has_purchased else EMPTY_PROGRESSION
+    
+    return compute_access(catalog.modules, catalog.by_order, current_user.has_purchased, state)
+
 @api_router.get("/progress/check-access/{module_id}")
-async def check_module_access(module_id: str, current_user: User = Depends(get_current_user)):
+async def check_module_access(module_id: str, current_user: TokenClaims = Depends(get_token_claims)):
     """Vérifie si l'utilisateur peut accéder à un module (progression séquentielle)"""
     
     # Récupérer le module demandé
-    target_module = await db.modules.find_one({"id": module_id})
+    catalog = await module_catalog.get()
+    target_module = catalog.by_id.get(module_id)
     if not target_module:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    # Module gratuit toujours accessible
-    if target_module.get("is_free", False):
-        return {"can_access": True, "reason": "free_module"}
-    
-    # Vérifier si l'utilisateur a acheté la formation
-    if not current_user.has_purchased:
-        return {"can_access": False, "reason": "purchase_required"}
-    
-    target_order = target_module.get("order_index", 999)
-    
-    # Module 1 (gratuit) toujours accessible
-    if target_order == 1:
-        return {"can_access": True, "reason": "first_module"}
-    
-    # Vérifier si le module précédent est complété avec quiz validé
-    previous_order = target_order - 1
-    previous_module = await db.modules.find_one({"order_index": previous_order})
-    
-    if not previous_module:
-        return {"can_access": True, "reason": "no_previous_module"}
-    
-    # Vérifier la complétion du module précédent
-    previous_progress = await db.module_progress.find_one({
-        "user_id": current_user.id,
-        "module_id": previous_module["id"],
-        "completed": True
-    })
-    
-    if not previous_progress:
-        return {
-            "can_access": False, 
-            "reason": "previous_module_not_completed",
-            "required_module": previous_module["title"]
-        }
-    
-    # Vérifier si le quiz du module précédent a été réussi
-    previous_quiz = await db.quizzes.find_one({"module_id": previous_module["id"]})
-    if previous_quiz:
-        quiz_passed = await db.quiz_attempts.find_one({
-            "user_id": current_user.id,
-            "quiz_id": previous_quiz["id"],
-            "passed": True
-        })
-        
-        if not quiz_passed:
-            return {
-                "can_access": False,
-                "reason": "previous_quiz_not_passed",
-                "required_module": previous_module["title"]
-            }
+    # L'état de progression n'est utile que pour un module payant d'un élève ayant acheté
+    state = EMPTY_PROGRESSION
+    if current_user.has_purchased and not target_module.get("is_free", False):
+        state = await load_progression_state(db, current_user.id)
     
-    return {"can_access": True, "reason": "prerequisites_met"}
+    return module_gate(target_module, catalog.by_order, current_user.has_purchased, state)
 
 # Payment Routes
 @api_router.post("/payments/checkout-session")
@@ -1306,8 +1632,6 @@ async def create_checkout_session(request: Request, current_user: User = Depends
         )
         
         doc = payment_transaction.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
         
         await db.payment_transactions.insert_one(doc)
         
@@ -1327,18 +1651,26 @@ async def get_payment_status(session_id: str, current_user: User = Depends(get_c
         checkout_status: CheckoutStatusResponse = await stripe_checkout.get_checkout_status(session_id)
         
         if checkout_status.payment_status == "paid" and payment_transaction["payment_status"] != "completed":
-            await db.payment_transactions.update_one(
-                {"session_id": session_id},
+            completed = await db.payment_transactions.update_one(
+                {"session_id": session_id, "payment_status": {"$ne": "completed"}},
                 {"$set": {
                     "payment_status": "completed",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "updated_at": datetime.now(timezone.utc)
                 }}
             )
+            # Le webhook a pu valider la transaction entre-temps : un seul des deux compte la vente
+            if completed.modified_count:
+                await analytics_store.record_purchase(payment_transaction["amount"])
             
-            await db.users.update_one(
-                {"id": current_user.id},
-                {"$set": {"has_purchased": True}}
+            # Condition sur has_purchased : paid_users ne compte que le passage à vrai
+            granted = await db.users.update_one(
+                {"id": current_user.id, "has_purchased": {"$ne": True}},
+                {"$set": {"has_purchased": True}, "$inc": {"token_version": 1}}
             )
+            if granted.modified_count:
+                await analytics_store.record_paid_access_change(True)
+            forget_token_version(current_user.id)
+            await student_status.refresh_user(current_user.id)
             
             # Send welcome email
             try:
@@ -1357,7 +1689,7 @@ async def get_payment_status(session_id: str, current_user: User = Depends(get_c
                 {"session_id": session_id},
                 {"$set": {
                     "payment_status": "expired",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "updated_at": datetime.now(timezone.utc)
                 }}
             )
         
@@ -1383,20 +1715,26 @@ async def stripe_webhook(request: Request):
         if webhook_response.event_type == "checkout.session.completed":
             session_id = webhook_response.session_id
             
-            await db.payment_transactions.update_one(
-                {"session_id": session_id},
+            transaction = await db.payment_transactions.find_one_and_update(
+                {"session_id": session_id, "payment_status": {"$ne": "completed"}},
                 {"$set": {
                     "payment_status": "completed",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "updated_at": datetime.now(timezone.utc)
                 }}
             )
+            if transaction:
+                await analytics_store.record_purchase(transaction["amount"])
             
             if webhook_response.metadata and webhook_response.metadata.get("user_id"):
                 user_id = webhook_response.metadata["user_id"]
-                await db.users.update_one(
-                    {"id": user_id},
-                    {"$set": {"has_purchased": True}}
+                granted = await db.users.update_one(
+                    {"id": user_id, "has_purchased": {"$ne": True}},
+                    {"$set": {"has_purchased": True}, "$inc": {"token_version": 1}}
                 )
+                if granted.modified_count:
+                    await analytics_store.record_paid_access_change(True)
+                forget_token_version(user_id)
+                await student_status.refresh_user(user_id)
         
         return {"status": "success"}
     
@@ -1405,9 +1743,9 @@ async def stripe_webhook(request: Request):
 
 # Quiz Routes
 @api_router.get("/quizzes/module/{module_id}")
-async def get_module_quiz(module_id: str, current_user: Optional[User] = Depends(get_current_user_optional)):
+async def get_module_quiz(module_id: str, current_user: Optional[TokenClaims] = Depends(get_token_claims_optional)):
     """Get quiz for a specific module"""
-    module = await db.modules.find_one({"id": module_id})
+    module = (await module_catalog.get()).by_id.get(module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
@@ -1420,17 +1758,13 @@ async def get_module_quiz(module_id: str, current_user: Optional[User] = Depends
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found for this module")
     
-    # Convert dates
-    if isinstance(quiz.get('created_at'), str):
-        quiz['created_at'] = datetime.fromisoformat(quiz['created_at'])
-    
     return quiz
 
 @api_router.post("/quizzes/{quiz_id}/submit")
 async def submit_quiz(
     quiz_id: str,
     submission: QuizSubmission,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Submit quiz answers and get results"""
     answers = submission.answers
@@ -1475,7 +1809,6 @@ async def submit_quiz(
     )
     
     doc = attempt.model_dump()
-    doc['completed_at'] = doc['completed_at'].isoformat()
     
     await db.quiz_attempts.insert_one(doc)
     
@@ -1491,7 +1824,7 @@ async def submit_quiz(
 @api_router.get("/quizzes/{quiz_id}/attempts")
 async def get_quiz_attempts(
     quiz_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Get user's attempts for a specific quiz"""
     attempts = await db.quiz_attempts.find(
@@ -1499,15 +1832,11 @@ async def get_quiz_attempts(
         {"_id": 0}
     ).sort("completed_at", -1).to_list(10)
     
-    for attempt in attempts:
-        if isinstance(attempt.get('completed_at'), str):
-            attempt['completed_at'] = datetime.fromisoformat(attempt['completed_at'])
-    
     return attempts
 
 # Forum Routes
 @api_router.get("/forum/posts", response_model=List[Dict[str, Any]])
-async def get_forum_posts(category: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_forum_posts(category: Optional[str] = None, current_user: TokenClaims = Depends(get_token_claims)):
     if not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Forum access requires course purchase")
     
@@ -1520,16 +1849,11 @@ async def get_forum_posts(category: Optional[str] = None, current_user: User = D
     for post in posts:
         user = await db.users.find_one({"id": post["user_id"]}, {"_id": 0, "full_name": 1, "avatar_url": 1})
         post["user"] = user or {"full_name": "Unknown", "avatar_url": None}
-        
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
     
     return posts
 
 @api_router.post("/forum/posts")
-async def create_forum_post(title: str, content: str, category: str = "general", current_user: User = Depends(get_current_user)):
+async def create_forum_post(title: str, content: str, category: str = "general", current_user: TokenClaims = Depends(get_token_claims)):
     if not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Forum access requires course purchase")
     
@@ -1541,14 +1865,12 @@ async def create_forum_post(title: str, content: str, category: str = "general",
     )
     
     doc = post.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.forum_posts.insert_one(doc)
     return {"message": "Post created successfully", "post_id": post.id}
 
 @api_router.get("/forum/posts/{post_id}/replies", response_model=List[Dict[str, Any]])
-async def get_forum_replies(post_id: str, current_user: User = Depends(get_current_user)):
+async def get_forum_replies(post_id: str, current_user: TokenClaims = Depends(get_token_claims)):
     if not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Forum access requires course purchase")
     
@@ -1557,14 +1879,11 @@ async def get_forum_replies(post_id: str, current_user: User = Depends(get_curre
     for reply in replies:
         user = await db.users.find_one({"id": reply["user_id"]}, {"_id": 0, "full_name": 1, "avatar_url": 1})
         reply["user"] = user or {"full_name": "Unknown", "avatar_url": None}
-        
-        if isinstance(reply.get('created_at'), str):
-            reply['created_at'] = datetime.fromisoformat(reply['created_at'])
     
     return replies
 
 @api_router.post("/forum/posts/{post_id}/replies")
-async def create_forum_reply(post_id: str, content: str, current_user: User = Depends(get_current_user)):
+async def create_forum_reply(post_id: str, content: str, current_user: TokenClaims = Depends(get_token_claims)):
     if not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Forum access requires course purchase")
     
@@ -1579,7 +1898,6 @@ async def create_forum_reply(post_id: str, content: str, current_user: User = De
     )
     
     doc = reply.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.forum_replies.insert_one(doc)
     
@@ -1612,19 +1930,22 @@ async def get_my_conversation(current_user: User = Depends(get_current_user)):
             student_email=current_user.email
         )
         doc = new_conv.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
-        if doc.get('last_message_at'):
-            doc['last_message_at'] = doc['last_message_at'].isoformat()
         
         await db.private_conversations.insert_one(doc)
+        doc.pop("_id", None)
         conversation = doc
     
     return conversation
 
 @api_router.get("/chat/messages")
-async def get_chat_messages(current_user: User = Depends(get_current_user)):
-    """Récupère les messages de la conversation de l'élève (30 derniers jours)"""
+async def get_chat_messages(
+    current_user: TokenClaims = Depends(get_token_claims),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = 100
+):
+    """Récupère les messages de la conversation de l'élève (pagination par curseur, voir chat_history.py)"""
     if not current_user.has_purchased:
         raise HTTPException(status_code=403, detail="Chat access requires course purchase")
     
@@ -1633,34 +1954,15 @@ async def get_chat_messages(current_user: User = Depends(get_current_user)):
     if not conversation:
         return []
     
-    # Date limite: 30 jours
-    date_limit = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    
-    messages = await db.private_chat_messages.find(
-        {
-            "conversation_id": conversation["id"],
-            "created_at": {"$gte": date_limit}
-        },
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(500)
-    
-    # Marquer les messages comme lus par l'élève
-    await db.private_chat_messages.update_many(
-        {
-            "conversation_id": conversation["id"],
-            "sender_type": "admin",
-            "is_read": False
-        },
-        {"$set": {"is_read": True}}
-    )
+    try:
+        messages, cursor_headers = await fetch_messages(db, conversation["id"], before, after, since, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    # Mettre à jour le compteur de non-lus
-    await db.private_conversations.update_one(
-        {"id": conversation["id"]},
-        {"$set": {"unread_by_student": 0}}
-    )
+    # Filigrane de lecture de l'élève (aucune écriture s'il est à jour)
+    await mark_read(db, conversation, "student")
     
-    return messages
+    return fast_response(annotate_read(messages, conversation), headers=cursor_headers)
 
 @api_router.post("/chat/messages")
 async def send_chat_message(message: ChatMessageCreate, current_user: User = Depends(get_current_user)):
@@ -1680,8 +1982,6 @@ async def send_chat_message(message: ChatMessageCreate, current_user: User = Dep
             student_email=current_user.email
         )
         doc = new_conv.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
         await db.private_conversations.insert_one(doc)
         conversation = doc
     
@@ -1693,8 +1993,8 @@ async def send_chat_message(message: ChatMessageCreate, current_user: User = Dep
         content=message.content.strip()
     )
     
-    msg_doc = new_message.model_dump()
-    msg_doc['created_at'] = msg_doc['created_at'].isoformat()
+    # L'état de lu est porté par la conversation (voir chat_read_state.py)
+    msg_doc = new_message.model_dump(exclude={"is_read"})
     
     await db.private_chat_messages.insert_one(msg_doc)
     
@@ -1704,26 +2004,29 @@ async def send_chat_message(message: ChatMessageCreate, current_user: User = Dep
         {
             "$set": {
                 "last_message": message.content[:100],
-                "last_message_at": datetime.now(timezone.utc).isoformat(),
+                "last_message_at": datetime.now(timezone.utc),
                 "last_message_by": "student",
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "updated_at": datetime.now(timezone.utc),
+                **last_message_field(msg_doc)
             },
             "$inc": {"unread_by_admin": 1}
         }
     )
+    unread_total = await admin_unread.increment(1)
     
-    # Notifier les admins via WebSocket
-    await chat_manager.send_to_admins({
+    # Notifier les admins via WebSocket (sur tous les workers)
+    await chat_events.publish_to_admins({
         "type": "new_message",
         "conversation_id": conversation["id"],
-        "message": msg_doc,
+        "message": new_message.model_dump(mode="json"),
         "student_name": current_user.full_name
     })
+    await publish_admin_unread(unread_total)
     
     return {"message": "Message sent", "id": new_message.id}
 
 @api_router.get("/chat/unread-count")
-async def get_unread_count(current_user: User = Depends(get_current_user)):
+async def get_unread_count(current_user: TokenClaims = Depends(get_token_claims)):
     """Récupère le nombre de messages non lus pour l'élève"""
     if not current_user.has_purchased:
         return {"unread": 0}
@@ -1737,7 +2040,7 @@ async def get_unread_count(current_user: User = Depends(get_current_user)):
 
 # Admin Chat Endpoints
 @api_router.get("/admin/chat/conversations")
-async def get_all_conversations(current_user: User = Depends(get_current_user)):
+async def get_all_conversations(current_user: TokenClaims = Depends(get_token_claims)):
     """Admin: Récupère toutes les conversations"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -1750,8 +2053,15 @@ async def get_all_conversations(current_user: User = Depends(get_current_user)):
     return conversations
 
 @api_router.get("/admin/chat/conversations/{conversation_id}/messages")
-async def get_conversation_messages(conversation_id: str, current_user: User = Depends(get_current_user)):
-    """Admin: Récupère les messages d'une conversation"""
+async def get_conversation_messages(
+    conversation_id: str,
+    current_user: TokenClaims = Depends(get_token_claims),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = 100
+):
+    """Admin: Récupère les messages d'une conversation (pagination par curseur)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
@@ -1760,40 +2070,23 @@ async def get_conversation_messages(conversation_id: str, current_user: User = D
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    # Date limite: 30 jours
-    date_limit = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    
-    messages = await db.private_chat_messages.find(
-        {
-            "conversation_id": conversation_id,
-            "created_at": {"$gte": date_limit}
-        },
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(500)
+    try:
+        messages, cursor_headers = await fetch_messages(db, conversation_id, before, after, since, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    # Marquer les messages comme lus par l'admin
-    await db.private_chat_messages.update_many(
-        {
-            "conversation_id": conversation_id,
-            "sender_type": "student",
-            "is_read": False
-        },
-        {"$set": {"is_read": True}}
-    )
+    # Filigrane de lecture des admins (aucune écriture s'il est à jour)
+    cleared = await mark_read(db, conversation, "admin")
+    if cleared:
+        await publish_admin_unread(await admin_unread.decrement(cleared))
     
-    # Mettre à jour le compteur
-    await db.private_conversations.update_one(
-        {"id": conversation_id},
-        {"$set": {"unread_by_admin": 0}}
-    )
-    
-    return messages
+    return fast_response(annotate_read(messages, conversation), headers=cursor_headers)
 
 @api_router.post("/admin/chat/conversations/{conversation_id}/messages")
 async def admin_send_message(
     conversation_id: str,
     message: ChatMessageCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Admin: Envoie un message à un élève"""
     if not current_user.is_admin:
@@ -1815,8 +2108,8 @@ async def admin_send_message(
         content=message.content.strip()
     )
     
-    msg_doc = new_message.model_dump()
-    msg_doc['created_at'] = msg_doc['created_at'].isoformat()
+    # L'état de lu est porté par la conversation (voir chat_read_state.py)
+    msg_doc = new_message.model_dump(exclude={"is_read"})
     
     await db.private_chat_messages.insert_one(msg_doc)
     
@@ -1826,71 +2119,58 @@ async def admin_send_message(
         {
             "$set": {
                 "last_message": message.content[:100],
-                "last_message_at": datetime.now(timezone.utc).isoformat(),
+                "last_message_at": datetime.now(timezone.utc),
                 "last_message_by": "admin",
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "updated_at": datetime.now(timezone.utc),
+                **last_message_field(msg_doc)
             },
             "$inc": {"unread_by_student": 1}
         }
     )
     
-    # Notifier l'élève via WebSocket
-    await chat_manager.send_to_user(conversation["student_id"], {
+    # Notifier l'élève via WebSocket (sur tous les workers)
+    await chat_events.publish_to_user(conversation["student_id"], {
         "type": "new_message",
         "conversation_id": conversation_id,
-        "message": msg_doc
+        "message": new_message.model_dump(mode="json")
     })
     
     return {"message": "Message sent", "id": new_message.id}
 
 @api_router.get("/admin/chat/unread-total")
-async def get_admin_unread_total(current_user: User = Depends(get_current_user)):
+async def get_admin_unread_total(current_user: TokenClaims = Depends(get_token_claims)):
     """Admin: Récupère le nombre total de messages non lus"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    pipeline = [
-        {"$group": {"_id": None, "total": {"$sum": "$unread_by_admin"}}}
-    ]
-    result = await db.private_conversations.aggregate(pipeline).to_list(1)
-    
-    return {"unread": result[0]["total"] if result else 0}
+    # Document compteur : O(1), les mises à jour suivantes arrivent par WebSocket
+    return {"unread": await admin_unread.total()}
 
 # WebSocket endpoint pour le chat en temps réel
 @app.websocket("/ws/chat/{token}")
 async def websocket_chat(websocket: WebSocket, token: str):
     """WebSocket pour le chat en temps réel"""
     try:
-        # Vérifier le token JWT
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        user_email = payload.get("sub")
-        if not user_email:
-            await websocket.close(code=4001)
-            return
-        
-        # Récupérer l'utilisateur
-        user = await db.users.find_one({"email": user_email}, {"_id": 0})
-        if not user:
+        # Jeton vérifié comme pour l'API : le rôle admin ne vient pas d'un jeton périmé
+        try:
+            claims = await claims_from_token(token)
+        except HTTPException:
             await websocket.close(code=4001)
             return
         
-        user_id = user["id"]
-        
-        # Connecter
-        await chat_manager.connect(websocket, user_id)
-        
+        connection = await chat_manager.connect(websocket, claims.id, is_admin=claims.is_admin)
         try:
             while True:
                 # Recevoir les messages (ping/pong pour garder la connexion)
                 data = await websocket.receive_text()
+                connection.touch()
                 if data == "ping":
-                    await websocket.send_text("pong")
+                    # Réponse via la file : une seule tâche écrit sur la socket
+                    chat_manager.enqueue(connection, "pong")
         except WebSocketDisconnect:
-            chat_manager.disconnect(websocket, user_id)
-    except jwt.ExpiredSignatureError:
-        await websocket.close(code=4001)
-    except jwt.InvalidTokenError:
-        await websocket.close(code=4001)
+            pass
+        finally:
+            chat_manager.disconnect(connection)
     except Exception as e:
         logging.error(f"WebSocket error: {e}")
         try:
@@ -1898,14 +2178,16 @@ async def websocket_chat(websocket: WebSocket, token: str):
         except:
             pass
 
-# Nettoyage automatique des vieux messages (appelé périodiquement)
-async def cleanup_old_messages():
-    """Supprime les messages de plus de 30 jours"""
-    date_limit = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    result = await db.private_chat_messages.delete_many(
-        {"created_at": {"$lt": date_limit}}
-    )
-    return result.deleted_count
+# Rétention : archivage puis suppression des vieux messages (voir chat_retention.py)
+chat_retention = ChatRetentionJob(
+    db,
+    CHAT_ARCHIVE_DIR,
+    retention_days=CHAT_RETENTION_DAYS,
+    batch_size=CHAT_RETENTION_BATCH_SIZE,
+    max_per_second=CHAT_RETENTION_MAX_PER_SECOND,
+    interval=CHAT_RETENTION_INTERVAL_SECONDS,
+    unread_counter=admin_unread
+)
 
 # ==================== FIN CHAT PRIVÉ ENDPOINTS ====================
 
@@ -1917,10 +2199,6 @@ async def get_career_fit_quiz():
     if not quiz:
         raise HTTPException(status_code=404, detail="Career fit quiz not found")
     
-    # Convert dates
-    if isinstance(quiz.get('created_at'), str):
-        quiz['created_at'] = datetime.fromisoformat(quiz['created_at'])
-    
     return quiz
 
 @api_router.post("/preliminary-quiz/career-fit/submit")
@@ -1956,22 +2234,18 @@ async def submit_career_fit_quiz(submission: QuizSubmission):
     }
 
 @api_router.get("/preliminary-quiz/mechanical-knowledge")
-async def get_mechanical_knowledge_quiz(current_user: User = Depends(get_current_user)):
+async def get_mechanical_knowledge_quiz(current_user: TokenClaims = Depends(get_token_claims)):
     """Get the mechanical knowledge quiz (requires authentication, post-payment)"""
     quiz = await db.quizzes.find_one({"module_id": "mechanical_knowledge"}, {"_id": 0})
     if not quiz:
         raise HTTPException(status_code=404, detail="Mechanical knowledge quiz not found")
     
-    # Convert dates
-    if isinstance(quiz.get('created_at'), str):
-        quiz['created_at'] = datetime.fromisoformat(quiz['created_at'])
-    
     return quiz
 
 @api_router.post("/preliminary-quiz/mechanical-knowledge/submit")
 async def submit_mechanical_knowledge_quiz(
     submission: QuizSubmission,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Submit mechanical knowledge quiz and determine if remedial module needed"""
     answers = submission.answers
@@ -2017,7 +2291,6 @@ async def submit_mechanical_knowledge_quiz(
     )
     
     doc = assessment.model_dump()
-    doc['completed_at'] = doc['completed_at'].isoformat()
     
     await db.mechanical_assessments.insert_one(doc)
     
@@ -2030,6 +2303,7 @@ async def submit_mechanical_knowledge_quiz(
             "mechanical_assessment_score": score
         }}
     )
+    user_cache.invalidate(user_id=current_user.id)
     
     return {
         "score": score,
@@ -2041,7 +2315,7 @@ async def submit_mechanical_knowledge_quiz(
     }
 
 @api_router.get("/preliminary-quiz/mechanical-knowledge/status")
-async def get_mechanical_knowledge_status(current_user: User = Depends(get_current_user)):
+async def get_mechanical_knowledge_status(current_user: TokenClaims = Depends(get_token_claims)):
     """Check if user has completed mechanical knowledge quiz"""
     assessment = await db.mechanical_assessments.find_one(
         {"user_id": current_user.id},
@@ -2066,7 +2340,7 @@ async def get_mechanical_knowledge_status(current_user: User = Depends(get_curre
 async def submit_satisfaction_survey(
     ratings: Dict[str, int],
     open_feedback: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Submit satisfaction survey after completing training"""
     
@@ -2082,7 +2356,6 @@ async def submit_satisfaction_survey(
     )
     
     doc = survey.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.satisfaction_surveys.insert_one(doc)
     
@@ -2092,7 +2365,7 @@ async def submit_satisfaction_survey(
     }
 
 @api_router.get("/satisfaction-survey/check")
-async def check_satisfaction_survey(current_user: User = Depends(get_current_user)):
+async def check_satisfaction_survey(current_user: TokenClaims = Depends(get_token_claims)):
     """Check if user has submitted satisfaction survey"""
     survey = await db.satisfaction_surveys.find_one({"user_id": current_user.id})
     
@@ -2106,7 +2379,7 @@ async def send_admin_message(
     recipient_id: str,
     subject: str,
     message: str,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Send message from admin to student(s)"""
     
@@ -2125,7 +2398,6 @@ async def send_admin_message(
     )
     
     doc = admin_message.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.admin_messages.insert_one(doc)
     
@@ -2135,7 +2407,7 @@ async def send_admin_message(
     }
 
 @api_router.get("/messages")
-async def get_user_messages(current_user: User = Depends(get_current_user)):
+async def get_user_messages(current_user: TokenClaims = Depends(get_token_claims)):
     """Get all messages for current user"""
     messages = await db.admin_messages.find(
         {
@@ -2147,16 +2419,12 @@ async def get_user_messages(current_user: User = Depends(get_current_user)):
         {"_id": 0}
     ).sort("created_at", -1).to_list(100)
     
-    for msg in messages:
-        if isinstance(msg.get('created_at'), str):
-            msg['created_at'] = datetime.fromisoformat(msg['created_at'])
-    
     return messages
 
 @api_router.patch("/messages/{message_id}/read")
 async def mark_message_read(
     message_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Mark message as read"""
     result = await db.admin_messages.update_one(
@@ -2170,14 +2438,11 @@ async def mark_message_read(
     return {"message": "Message marked as read"}
 
 @api_router.get("/admin/messages")
-async def get_all_messages(current_user: User = Depends(require_admin)):
+async def get_all_messages(current_user: TokenClaims = Depends(require_admin)):
     """Get all admin messages (admin only)"""
     messages = await db.admin_messages.find({}, {"_id": 0}).sort("created_at", -1).to_list(500)
     
     for msg in messages:
-        if isinstance(msg.get('created_at'), str):
-            msg['created_at'] = datetime.fromisoformat(msg['created_at'])
-        
         # Get recipient info
         if msg['recipient_id'] != "all":
             recipient = await db.users.find_one(
@@ -2201,7 +2466,7 @@ class ModuleUpdate(BaseModel):
 @api_router.post("/admin/modules")
 async def create_module(
     module_data: ModuleUpdate,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Create new module (admin only)"""
     
@@ -2221,6 +2486,7 @@ async def create_module(
     
     doc = new_module.model_dump()
     await db.modules.insert_one(doc)
+    await module_catalog.bump()
     
     return {"message": "Module created successfully", "module_id": new_module.id, "order_index": next_order}
 
@@ -2228,7 +2494,7 @@ async def create_module(
 async def update_module(
     module_id: str,
     module_data: ModuleUpdate,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update module content (admin only)"""
     
@@ -2253,12 +2519,13 @@ async def update_module(
         # Actually check if data is same
         return {"message": "Module already up to date", "module_id": module_id}
     
+    await module_catalog.bump()
     return {"message": "Module updated successfully", "module_id": module_id}
 
 @api_router.delete("/admin/modules/{module_id}")
 async def delete_module(
     module_id: str,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Delete module (admin only)"""
     
@@ -2272,6 +2539,7 @@ async def delete_module(
     
     # Delete module
     await db.modules.delete_one({"id": module_id})
+    await module_catalog.bump()
     
     return {"message": "Module deleted successfully", "module_id": module_id}
 
@@ -2279,7 +2547,7 @@ async def delete_module(
 @api_router.post("/admin/quizzes")
 async def create_quiz(
     quiz_data: dict,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Create quiz for a module (admin only)"""
     
@@ -2313,7 +2581,7 @@ async def create_quiz(
 async def update_quiz(
     quiz_id: str,
     quiz_data: dict,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update quiz (admin only)"""
     
@@ -2338,7 +2606,7 @@ async def update_quiz(
 @api_router.delete("/admin/quizzes/{quiz_id}")
 async def delete_quiz(
     quiz_id: str,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Delete quiz (admin only)"""
     
@@ -2354,24 +2622,18 @@ async def delete_quiz(
 
 # Admin routes for Mechanical Knowledge Quiz
 @api_router.get("/admin/quizzes/mechanical-knowledge")
-async def get_mechanical_quiz_admin(current_user: User = Depends(require_admin)):
+async def get_mechanical_quiz_admin(current_user: TokenClaims = Depends(require_admin)):
     """Get mechanical knowledge quiz for admin editing"""
     quiz = await db.quizzes.find_one({"module_id": "mechanical_knowledge"}, {"_id": 0})
     if not quiz:
         raise HTTPException(status_code=404, detail="Mechanical knowledge quiz not found")
     
-    # Convert dates
-    if isinstance(quiz.get('created_at'), str):
-        quiz['created_at'] = datetime.fromisoformat(quiz['created_at'])
-    if isinstance(quiz.get('updated_at'), str):
-        quiz['updated_at'] = datetime.fromisoformat(quiz['updated_at'])
-    
     return quiz
 
 @api_router.put("/admin/quizzes/mechanical-knowledge")
 async def update_mechanical_quiz_admin(
     quiz_data: dict,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update mechanical knowledge quiz (admin only)"""
     
@@ -2391,7 +2653,7 @@ async def update_mechanical_quiz_admin(
         "description": quiz_data.get('description', ''),
         "passing_score": quiz_data.get('passing_score', 70),
         "questions": quiz_data['questions'],
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "updated_at": datetime.now(timezone.utc)
     }
     
     if existing_quiz:
@@ -2407,7 +2669,7 @@ async def update_mechanical_quiz_admin(
             "id": f"quiz_mech_{uuid.uuid4().hex[:8]}",
             "module_id": "mechanical_knowledge",
             **update_data,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         await db.quizzes.insert_one(new_quiz)
         message = "Mechanical knowledge quiz created successfully"
@@ -2418,7 +2680,7 @@ async def update_mechanical_quiz_admin(
 @api_router.post("/admin/upload/image")
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Upload une image pour les modules (admin only)"""
     
@@ -2442,7 +2704,7 @@ async def upload_image(
 @api_router.post("/admin/upload/video")
 async def upload_video(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Upload une vidéo pour les modules (admin only)"""
     
@@ -2466,7 +2728,7 @@ async def upload_video(
 @api_router.get("/admin/media/list")
 async def list_media(
     file_type: str = None,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Liste tous les médias uploadés (admin only)"""
     files = media_service.list_files(file_type)
@@ -2476,7 +2738,7 @@ async def list_media(
 async def delete_media(
     file_type: str,
     filename: str,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Supprime un média (admin only)"""
     success = media_service.delete_file(filename, file_type)
@@ -2490,7 +2752,7 @@ async def delete_media(
 @api_router.post("/ai-chat")
 async def ai_chat(
     message: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
     """Send message to AI assistant and get response"""
     
@@ -2509,7 +2771,6 @@ async def ai_chat(
     )
     
     doc = chat_message.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.ai_chat_messages.insert_one(doc)
     
@@ -2521,7 +2782,7 @@ async def ai_chat(
 
 @api_router.get("/ai-chat/history")
 async def get_ai_chat_history(
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_token_claims),
     limit: int = 50
 ):
     """Get user's AI chat history"""
@@ -2534,10 +2795,6 @@ async def get_ai_chat_history(
     # Reverse to get chronological order
     messages.reverse()
     
-    for msg in messages:
-        if isinstance(msg.get('created_at'), str):
-            msg['created_at'] = datetime.fromisoformat(msg['created_at'])
-    
     return messages
 
 # Blog Management Routes
@@ -2548,13 +2805,7 @@ async def get_blog_posts(published_only: bool = True):
     
     posts = await db.blog_posts.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
     
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    
-    return posts
+    return fast_response(posts)
 
 # Landing Page Content Management
 @api_router.get("/landing-page/content")
@@ -2567,15 +2818,12 @@ async def get_landing_page_content():
         default_content = LandingPageContent()
         return default_content.model_dump()
     
-    if isinstance(content.get('updated_at'), str):
-        content['updated_at'] = datetime.fromisoformat(content['updated_at'])
-    
     return content
 
 @api_router.put("/admin/landing-page/content")
 async def update_landing_page_content(
     content_data: dict,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update landing page content (admin only)"""
     
@@ -2583,7 +2831,7 @@ async def update_landing_page_content(
     existing = await db.landing_page_content.find_one({})
     
     # Update timestamp
-    content_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    content_data['updated_at'] = datetime.now(timezone.utc)
     
     if existing:
         # Update existing
@@ -2601,7 +2849,7 @@ async def update_landing_page_content(
 
 # AI Chatbot Configuration
 @api_router.get("/admin/chatbot/config")
-async def get_chatbot_config(current_user: User = Depends(require_admin)):
+async def get_chatbot_config(current_user: TokenClaims = Depends(require_admin)):
     """Get chatbot configuration (admin only)"""
     config = await db.ai_chatbot_config.find_one({}, {"_id": 0})
     
@@ -2651,7 +2899,7 @@ PRIX: 297€
 CERTIFICATION: Officielle et reconnue
 MODULES: 8 modules complets + quiz
 TAUX DE RÉUSSITE: 97%""",
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }
         return default_config
     
@@ -2660,11 +2908,11 @@ TAUX DE RÉUSSITE: 97%""",
 @api_router.put("/admin/chatbot/config")
 async def update_chatbot_config(
     config_data: dict,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update chatbot configuration (admin only)"""
     
-    config_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    config_data['updated_at'] = datetime.now(timezone.utc)
     
     # Upsert (update or insert)
     await db.ai_chatbot_config.update_one(
@@ -2687,30 +2935,19 @@ async def get_blog_post_by_slug(slug: str):
     if not post:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    if isinstance(post.get('created_at'), str):
-        post['created_at'] = datetime.fromisoformat(post['created_at'])
-    if isinstance(post.get('updated_at'), str):
-        post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    
     return post
 
 @api_router.get("/admin/blog/posts")
-async def get_all_blog_posts_admin(current_user: User = Depends(require_admin)):
+async def get_all_blog_posts_admin(current_user: TokenClaims = Depends(require_admin)):
     """Get all blog posts including unpublished (admin only)"""
     posts = await db.blog_posts.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
     
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    
     return posts
 
 @api_router.post("/admin/blog/posts")
 async def create_blog_post(
     post_data: BlogPost,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Create a new blog post (admin only)"""
     
@@ -2720,8 +2957,6 @@ async def create_blog_post(
         raise HTTPException(status_code=400, detail="Un article avec ce slug existe déjà")
     
     doc = post_data.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.blog_posts.insert_one(doc)
     
@@ -2731,7 +2966,7 @@ async def create_blog_post(
 async def update_blog_post(
     post_id: str,
     post_data: BlogPost,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Update a blog post (admin only)"""
     
@@ -2742,7 +2977,7 @@ async def update_blog_post(
     
     # Update timestamp
     doc = post_data.model_dump()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     doc['created_at'] = existing['created_at']  # Keep original creation date
     
     result = await db.blog_posts.update_one(
@@ -2758,7 +2993,7 @@ async def update_blog_post(
 @api_router.delete("/admin/blog/posts/{post_id}")
 async def delete_blog_post(
     post_id: str,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Delete a blog post (admin only)"""
     
@@ -2773,13 +3008,13 @@ async def delete_blog_post(
 async def toggle_blog_post_publish(
     post_id: str,
     published: bool,
-    current_user: User = Depends(require_admin)
+    current_user: TokenClaims = Depends(require_admin)
 ):
     """Toggle publish status of a blog post (admin only)"""
     
     result = await db.blog_posts.update_one(
         {"id": post_id},
-        {"$set": {"published": published, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"published": published, "updated_at": datetime.now(timezone.utc)}}
     )
     
     if result.modified_count == 0:
@@ -2792,7 +3027,7 @@ async def toggle_blog_post_publish(
 # ==========================================
 
 @api_router.get("/admin/seo-pages")
-async def get_all_seo_pages(current_user: User = Depends(get_current_user)):
+async def get_all_seo_pages(current_user: TokenClaims = Depends(get_token_claims)):
     """Get all SEO pages (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2801,7 +3036,7 @@ async def get_all_seo_pages(current_user: User = Depends(get_current_user)):
     return pages
 
 @api_router.get("/admin/seo-pages/{page_id}")
-async def get_seo_page_by_id(page_id: str, current_user: User = Depends(get_current_user)):
+async def get_seo_page_by_id(page_id: str, current_user: TokenClaims = Depends(get_token_claims)):
     """Get a specific SEO page by ID (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2812,7 +3047,7 @@ async def get_seo_page_by_id(page_id: str, current_user: User = Depends(get_curr
     return page
 
 @api_router.post("/admin/seo-pages")
-async def create_seo_page(page_data: SEOPageCreate, current_user: User = Depends(get_current_user)):
+async def create_seo_page(page_data: SEOPageCreate, current_user: TokenClaims = Depends(get_token_claims)):
     """Create a new SEO page (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2833,7 +3068,7 @@ async def create_seo_page(page_data: SEOPageCreate, current_user: User = Depends
     return {"message": "Page SEO créée avec succès", "page": new_page.model_dump()}
 
 @api_router.put("/admin/seo-pages/{page_id}")
-async def update_seo_page(page_id: str, page_data: SEOPageCreate, current_user: User = Depends(get_current_user)):
+async def update_seo_page(page_id: str, page_data: SEOPageCreate, current_user: TokenClaims = Depends(get_token_claims)):
     """Update an existing SEO page (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2851,7 +3086,7 @@ async def update_seo_page(page_id: str, page_data: SEOPageCreate, current_user:
     
     # Update page
     update_data = page_data.model_dump()
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['updated_at'] = datetime.now(timezone.utc)
     
     await db.seo_pages.update_one(
         {"id": page_id},
@@ -2861,7 +3096,7 @@ async def update_seo_page(page_id: str, page_data: SEOPageCreate, current_user:
     return {"message": "Page SEO mise à jour avec succès"}
 
 @api_router.delete("/admin/seo-pages/{page_id}")
-async def delete_seo_page(page_id: str, current_user: User = Depends(get_current_user)):
+async def delete_seo_page(page_id: str, current_user: TokenClaims = Depends(get_token_claims)):
     """Delete a SEO page (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2873,7 +3108,7 @@ async def delete_seo_page(page_id: str, current_user: User = Depends(get_current
     return {"message": "Page SEO supprimée avec succès"}
 
 @api_router.patch("/admin/seo-pages/{page_id}/publish")
-async def toggle_seo_page_publish(page_id: str, current_user: User = Depends(get_current_user)):
+async def toggle_seo_page_publish(page_id: str, current_user: TokenClaims = Depends(get_token_claims)):
     """Toggle publish status of a SEO page (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -2885,7 +3120,7 @@ async def toggle_seo_page_publish(page_id: str, current_user: User = Depends(get
     new_status = not page.get('is_published', False)
     await db.seo_pages.update_one(
         {"id": page_id},
-        {"$set": {"is_published": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"is_published": new_status, "updated_at": datetime.now(timezone.utc)}}
     )
     
     return {"message": f"Page {'publiée' if new_status else 'dépubliée'} avec succès", "is_published": new_status}
@@ -3027,10 +3262,10 @@ async def get_sitemap():
         xml += f'    <loc>{base_url}/blog/{post["slug"]}</loc>\n'
         xml += '    <priority>0.7</priority>\n'
         xml += '    <changefreq>monthly</changefreq>\n'
-        if post.get('updated_at'):
-            updated = post['updated_at']
-            if isinstance(updated, str):
-                xml += f'    <lastmod>{updated[:10]}</lastmod>\n'
+        # to_datetime : documents pas encore migrés (dates en chaîne ISO)
+        post_updated_at = to_datetime(post.get('updated_at'))
+        if post_updated_at:
+            xml += f'    <lastmod>{post_updated_at.date().isoformat()}</lastmod>\n'
         xml += '  </url>\n'
     
     # Ajouter les pages SEO créées via l'admin (base de données)
@@ -3040,10 +3275,9 @@ async def get_sitemap():
         xml += f'    <loc>{base_url}/seo/{page["slug"]}</loc>\n'
         xml += '    <priority>0.7</priority>\n'
         xml += '    <changefreq>monthly</changefreq>\n'
-        if page.get('updated_at'):
-            updated = page['updated_at']
-            if isinstance(updated, str):
-                xml += f'    <lastmod>{updated[:10]}</lastmod>\n'
+        page_updated_at = to_datetime(page.get('updated_at'))
+        if page_updated_at:
+            xml += f'    <lastmod>{page_updated_at.date().isoformat()}</lastmod>\n'
         xml += '  </url>\n'
     
     xml += '</urlset>'
@@ -3066,6 +3300,8 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Curseurs de pagination du chat (voir chat_history.py)
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "X-Has-More-After"],
 )
 
 # Configure logging
@@ -3075,6 +3311,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_indexes():
+    report = await ensure_indexes(db)
+    if report["failed"]:
+        # Le serveur démarre quand même ; « python db_indexes.py check » liste les index manquants
+        logging.error(f"Missing indexes after startup: {report['failed']}")
+
+@app.on_event("startup")
+async def startup_analytics_seed():
+    # Cumuls jamais reconstruits : reconstruction en tâche de fond (voir analytics_store.py)
+    analytics_store.start_seed()
+
+@app.on_event("startup")
+async def startup_view_counter():
+    view_counter.start()
+
+@app.on_event("startup")
+async def startup_student_status():
+    student_status.start()
+
+@app.on_event("startup")
+async def startup_chat_events():
+    chat_events.start()
+
+@app.on_event("startup")
+async def startup_chat_retention():
+    chat_retention.start()
+
+@app.on_event("startup")
+async def startup_admin_unread():
+    # Premier passage immédiat : initialise le compteur sur une base existante
+    admin_unread.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    # Écrire les vues en attente avant de fermer la connexion
+    await view_counter.stop()
+    await analytics_store.stop()
+    await student_status.stop()
+    await chat_events.stop()
+    await chat_manager.close_all()
+    await chat_retention.stop()
+    await admin_unread.stop()
+    client.close()
+    password_service.shutdown()
\ No newline at end of file
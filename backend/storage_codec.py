@@ -0,0 +1,56 @@
+"""
+Codec de stockage des dates.
+
+Les dates sont écrites en datetime BSON natif (UTC) et relues en datetime
+« aware » grâce aux options du client Motor ci-dessous : plus besoin de
+``isoformat()`` à l'écriture ni de ``fromisoformat()`` à la lecture, et les
+requêtes par plage de dates utilisent les index.
+
+``DATE_FIELDS`` liste les champs date de chaque collection ; il sert à la
+migration des anciens documents (voir migrate_dates_to_bson.py).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Les datetimes relus depuis MongoDB sont « aware » en UTC
+MOTOR_CLIENT_OPTIONS: Dict[str, Any] = {"tz_aware": True, "tzinfo": timezone.utc}
+
+
+# Champs date par collection
+DATE_FIELDS: Dict[str, List[str]] = {
+    "users": ["created_at", "last_login", "last_activity"],
+    "modules": ["created_at", "updated_at"],
+    "module_progress": ["completed_at", "created_at"],
+    "quizzes": ["created_at", "updated_at"],
+    "quiz_attempts": ["completed_at"],
+    "payment_transactions": ["created_at", "updated_at"],
+    "pre_registration_questionnaires": ["created_at", "callback_updated_at"],
+    "private_conversations": ["created_at", "updated_at", "last_message_at"],
+    "private_chat_messages": ["created_at"],
+    "admin_messages": ["created_at"],
+    "ai_chat_messages": ["created_at"],
+    "mechanical_assessments": ["completed_at"],
+    "satisfaction_surveys": ["created_at"],
+    "forum_posts": ["created_at", "updated_at"],
+    "forum_replies": ["created_at"],
+    "blog_posts": ["created_at", "updated_at"],
+    "seo_pages": ["created_at", "updated_at"],
+    "landing_page_content": ["updated_at"],
+    "ai_chatbot_config": ["updated_at"],
+}
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Convertit une date stockée (chaîne ISO ou datetime naïf) en datetime UTC"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,264 @@
+"""
+Vue matérialisée de l'état des élèves (inactivité, complétion) et file de relances.
+
+Un job périodique en processus maintient la collection ``student_status`` (un
+document compact par élève ayant acheté la formation) au lieu de recalculer
+l'inactivité à chaque affichage du tableau de bord admin.
+
+Le scan est incrémental : à chaque passage, seuls les élèves dont l'état a pu
+changer depuis le passage précédent sont relus, par requêtes de plage indexées :
+
+1. dernière activité passée sous le seuil d'inactivité depuis le dernier scan ;
+2. idem pour les élèves jamais actifs (date d'inscription) ;
+3. élèves actifs depuis le dernier scan (réactivation) ;
+4. élèves inscrits depuis le dernier scan, jamais actifs.
+
+Quand la version du catalogue de modules change (module ajouté, supprimé...),
+le passage suivant relit tous les élèves pour recalculer ``total_modules``.
+
+Les élèves sont traités par lots ; la position est enregistrée après chaque lot
+dans ``job_state`` et un scan interrompu reprend là où il s'était arrêté. Un
+bail (``lease_until``) évite que plusieurs workers scannent en même temps ; un
+worker dont le bail a été repris abandonne son passage au lot suivant.
+
+Quand un élève passe en « à relancer », une relance est ajoutée à
+``reminder_queue`` (une seule par épisode d'inactivité).
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from pagination import keyset_filter
+from storage_codec import to_datetime
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = "inactivity_scan"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+USER_FIELDS = {"_id": 0, "id": 1, "full_name": 1, "email": 1, "created_at": 1, "last_activity": 1}
+
+
+class LeaseLost(Exception):
+    """Le bail du scan a expiré et a été repris par un autre worker"""
+
+
+class StudentStatusService:
+    def __init__(self, db, module_catalog, inactivity_days: int = 10, chunk_size: int = 500,
+                 interval: float = 900.0, lease_seconds: float = 600.0):
+        self.db = db
+        self.module_catalog = module_catalog
+        self.inactivity_days = inactivity_days
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self._owner = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self.scans = 0
+        self.students_scanned = 0
+        self.reminders_enqueued = 0
+        self.last_scan_at: Optional[datetime] = None
+
+    # ---- Calcul de l'état ----
+
+    async def _completed_counts(self, user_ids: List[str]) -> Dict[str, int]:
+        counts = {}
+        async for row in self.db.module_progress.aggregate([
+            {"$match": {"user_id": {"$in": user_ids}, "completed": True}},
+            {"$group": {"_id": "$user_id", "n": {"$sum": 1}}}
+        ]):
+            counts[row["_id"]] = row["n"]
+        return counts
+
+    def _status(self, user: Dict[str, Any], completed: int, total_modules: int, now: datetime) -> Dict[str, Any]:
+        # Dates éventuellement encore en chaînes ISO (non migrées, anciens scripts)
+        created_at = to_datetime(user.get("created_at"))
+        last_seen = to_datetime(user.get("last_activity")) or created_at
+        inactive_since = last_seen + timedelta(days=self.inactivity_days) if last_seen else None
+        is_inactive = inactive_since is not None and inactive_since <= now
+        return {
+            "user_id": user["id"],
+            "full_name": user.get("full_name"),
+            "email": user.get("email"),
+            "created_at": created_at,
+            "last_seen": last_seen,
+            "completed_modules": completed,
+            "total_modules": total_modules,
+            "is_inactive": is_inactive,
+            "inactive_since": inactive_since if is_inactive else None,
+            "needs_reminder": is_inactive and completed < total_modules,
+            "updated_at": now,
+        }
+
+    async def process_users(self, users: List[Dict[str, Any]]) -> int:
+        """Recalcule et enregistre l'état d'un lot d'élèves ; met en file les nouvelles relances"""
+        if not users:
+            return 0
+        now = datetime.now(timezone.utc)
+        total_modules = (await self.module_catalog.get()).total
+        user_ids = [u["id"] for u in users]
+        completed = await self._completed_counts(user_ids)
+
+        statuses = [self._status(u, completed.get(u["id"], 0), total_modules, now) for u in users]
+        await self.db.student_status.bulk_write(
+            [UpdateOne({"user_id": s["user_id"]}, {"$set": s}, upsert=True) for s in statuses],
+            ordered=False
+        )
+
+        # Une relance par épisode d'inactivité (clé : élève + début d'inactivité)
+        reminders = [
+            UpdateOne(
+                {"user_id": s["user_id"], "kind": "inactivity", "inactive_since": s["inactive_since"]},
+                {"$setOnInsert": {
+                    "id": str(uuid.uuid4()),
+                    "email": s["email"],
+                    "full_name": s["full_name"],
+                    "status": "pending",
+                    "created_at": now,
+                }},
+                upsert=True
+            )
+            for s in statuses if s["needs_reminder"]
+        ]
+        if reminders:
+            result = await self.db.reminder_queue.bulk_write(reminders, ordered=False)
+            self.reminders_enqueued += result.upserted_count
+
+        self.students_scanned += len(users)
+        return len(users)
+
+    async def refresh_user(self, user_id: str):
+        """Met à jour un élève immédiatement (achat, complétion de module...)"""
+        user = await self.db.users.find_one({"id": user_id}, {**USER_FIELDS, "has_purchased": 1})
+        if not user or not user.get("has_purchased"):
+            await self.db.student_status.delete_one({"user_id": user_id})
+            return
+        await self.process_users([user])
+
+    # ---- Scan incrémental ----
+
+    def _phases(self, run: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if run.get("full"):
+            # Catalogue modifié : total_modules (et needs_reminder) à recalculer pour tous
+            return [{"field": "id", "query": {"has_purchased": True}}]
+        window = {"$gte": run["prev_threshold"], "$lt": run["threshold"]}
+        return [
+            {"field": "last_activity", "query": {"has_purchased": True, "last_activity": window}},
+            {"field": "created_at", "query": {"has_purchased": True, "last_activity": None, "created_at": window}},
+            {"field": "last_activity", "query": {"has_purchased": True, "last_activity": {"$gte": run["since"]}}},
+            {"field": "created_at", "query": {"has_purchased": True, "last_activity": None, "created_at": {"$gte": run["since"]}}},
+        ]
+
+    async def _acquire_lease(self, now: datetime) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.db.job_state.find_one_and_update(
+                {"_id": JOB_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_owner": self._owner}, {"lease_until": None}]},
+                {"$set": {"lease_owner": self._owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+                return_document=True
+            )
+        except PyMongoError:
+            # Upsert concurrent sur le même _id : un autre worker détient le bail
+            return None
+
+    async def _save(self, update: Dict[str, Any]):
+        """Enregistre la position et prolonge le bail ; LeaseLost si un autre worker l'a repris"""
+        lease_until = datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+        result = await self.db.job_state.update_one(
+            {"_id": JOB_ID, "lease_owner": self._owner},
+            {**update, "$set": {**update.get("$set", {}), "lease_until": lease_until}}
+        )
+        if result.matched_count == 0:
+            raise LeaseLost()
+
+    async def scan(self) -> Optional[int]:
+        """Un passage du scan (repris si le précédent a été interrompu). None si un autre worker scanne."""
+        now = datetime.now(timezone.utc)
+        state = await self._acquire_lease(now)
+        if state is None:
+            return None
+        try:
+            return await self._scan(state, now)
+        except LeaseLost:
+            logger.warning("Inactivity scan lease lost, stopping this run")
+            return None
+
+    async def _scan(self, state: Dict[str, Any], now: datetime) -> int:
+        catalog_version = (await self.module_catalog.get()).version
+        run = state.get("run")
+        if run is None:
+            threshold = now - timedelta(days=self.inactivity_days)
+            first_run = state.get("threshold") is None
+            run = {
+                "full": not first_run and state.get("catalog_version") != catalog_version,
+                "catalog_version": catalog_version,
+                "threshold": threshold,
+                "prev_threshold": state.get("threshold") or EPOCH,
+                # Premier passage : les élèves actifs sont ceux au-dessus du seuil
+                "since": threshold if first_run else state["last_run_at"],
+                "started_at": now,
+                "phase": 0,
+                "after": None,
+            }
+            await self._save({"$set": {"run": run}})
+
+        scanned = 0
+        phases = self._phases(run)
+        for index in range(run["phase"], len(phases)):
+            field, query = phases[index]["field"], phases[index]["query"]
+            sort = [(field, 1), ("id", 1)] if field != "id" else [("id", 1)]
+            after = run["after"] if index == run["phase"] else None
+            while True:
+                page_query = {"$and": [query, keyset_filter(sort, after)]} if after else query
+                users = await self.db.users.find(page_query, USER_FIELDS).sort(sort).limit(self.chunk_size).to_list(self.chunk_size)
+                if not users:
+                    break
+                scanned += await self.process_users(users)
+                after = {field: users[-1].get(field), "id": users[-1]["id"]}
+                await self._save({"$set": {"run.phase": index, "run.after": after}})
+            await self._save({"$set": {"run.phase": index + 1, "run.after": None}})
+
+        await self.db.job_state.update_one(
+            {"_id": JOB_ID, "lease_owner": self._owner},
+            {"$set": {"threshold": run["threshold"], "last_run_at": run["started_at"],
+                      "catalog_version": run.get("catalog_version"), "lease_until": None},
+             "$unset": {"run": ""}}
+        )
+        self.scans += 1
+        self.last_scan_at = datetime.now(timezone.utc)
+        return scanned
+
+    async def _run(self):
+        while True:
+            try:
+                await self.scan()
+            except Exception as e:
+                # Le scan reprendra au prochain passage depuis son dernier lot
+                logger.error(f"Inactivity scan failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scans": self.scans,
+            "students_scanned": self.students_scanned,
+            "reminders_enqueued": self.reminders_enqueued,
+            "last_scan_at": self.last_scan_at.isoformat() if self.last_scan_at else None,
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,99 @@
+"""
+Autorisation à partir des claims du jeton d'accès.
+
+Le jeton porte ``is_admin`` / ``has_purchased`` et la ``token_version`` de
+l'utilisateur au moment de son émission. Une requête est autorisée sur les
+seuls claims, sans lecture de l'utilisateur, tant que cette version est la
+version courante (lue dans MongoDB puis gardée ``ttl`` secondes en cache).
+
+Tout changement de droits incrémente ``token_version`` en base puis appelle
+``TokenVersions.forget`` : les claims des jetons émis avant sont alors
+ignorés et reconstruits depuis l'utilisateur. Les routes qui chargent
+l'utilisateur complet (``get_current_user``) refusent ces jetons
+(``ensure_current_version``) : le client les renouvelle par son refresh token.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import TTLCache
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+class TokenClaims(BaseModel):
+    """Identity carried by the access token - enough to authorize without a user lookup"""
+    id: str
+    email: str
+    is_admin: bool = False
+    has_purchased: bool = False
+    token_version: int = 0
+
+
+class TokenVersions:
+    def __init__(self, db, ttl: float = 30.0, max_size: int = 10000):
+        self.db = db
+        # user_id -> token_version courant (bumpé à chaque changement de droits)
+        self._versions: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+
+    async def get(self, user_id: str) -> Optional[int]:
+        version = self._versions.get(user_id)
+        if version is None:
+            user = await self.db.users.find_one({"id": user_id}, {"_id": 0, "token_version": 1})
+            if user is None:
+                return None
+            version = user.get("token_version", 0)
+            self._versions[user_id] = version
+        return version
+
+    def forget(self, user_id: str):
+        """À appeler après chaque $inc de token_version"""
+        self._versions.pop(user_id, None)
+
+
+async def claims_from_payload(
+    payload: Dict[str, Any],
+    versions: TokenVersions,
+    load_user: Callable[[Dict[str, Any]], Awaitable[Any]]
+) -> TokenClaims:
+    """Authorize from the token claims; only the (cached) token version is checked"""
+    user_id = payload.get("user_id")
+    current_version = None
+    if user_id is not None:
+        current_version = await versions.get(user_id)
+        if current_version is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        if payload.get("token_version", 0) == current_version:
+            return TokenClaims(
+                id=user_id,
+                email=payload["sub"],
+                is_admin=payload.get("is_admin", False),
+                has_purchased=payload.get("has_purchased", False),
+                token_version=current_version
+            )
+
+    # Stale claims (or legacy token without claims): never trust them, rebuild from the user
+    user = await load_user(payload)
+    return TokenClaims(
+        id=user.id,
+        email=user.email,
+        is_admin=user.is_admin,
+        has_purchased=user.has_purchased,
+        token_version=current_version or 0
+    )
+
+
+async def ensure_current_version(payload: Dict[str, Any], versions: TokenVersions):
+    """Reject a token issued before the user's last rights change (401)"""
+    user_id = payload.get("user_id")
+    if user_id is None:
+        return  # Jeton sans claims : utilisateur chargé depuis l'email
+    current_version = await versions.get(user_id)
+    if current_version is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    if payload.get("token_version", 0) != current_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+
+def ensure_admin(claims: TokenClaims) -> TokenClaims:
+    if not claims.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return claims
@@ -0,0 +1,89 @@
+"""
+Registre des transactions (admin) : filtres, jointure des utilisateurs, export.
+
+Les pages et l'export joignent les utilisateurs par lots (un ``$in`` par lot)
+au lieu d'une requête par transaction. L'export itère le curseur Motor et
+émet le CSV / NDJSON au fil de l'eau : la mémoire reste bornée par la taille
+d'un lot, quel que soit le nombre de transactions exportées.
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from csv_export import csv_cell
+from fast_json import dumps
+
+LEDGER_SORT = [("created_at", -1), ("id", -1)]
+EXPORT_BATCH_SIZE = 500
+CSV_COLUMNS = ["id", "created_at", "updated_at", "payment_status", "amount", "currency", "session_id", "user_id", "user_full_name", "user_email"]
+
+
+def _utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def ledger_filter(status: Optional[str] = None, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Dict[str, Any]:
+    """Filtre par statut et période de création (index payment_status / created_at)"""
+    query: Dict[str, Any] = {}
+    if status:
+        query["payment_status"] = status
+    date_from, date_to = _utc(date_from), _utc(date_to)
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lt"] = date_to
+    return query
+
+
+async def attach_users(db, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ajoute ``user`` (nom, email) à chaque transaction en une seule requête"""
+    user_ids = list({t["user_id"] for t in transactions if t.get("user_id")})
+    users = {}
+    if user_ids:
+        async for user in db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "full_name": 1, "email": 1}):
+            users[user["id"]] = {"full_name": user.get("full_name"), "email": user.get("email")}
+    for transaction in transactions:
+        transaction["user"] = users.get(transaction.get("user_id"))
+    return transactions
+
+
+async def _batches(cursor, size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_row(transaction: Dict[str, Any]) -> List[Any]:
+    user = transaction.get("user") or {}
+    row = {**transaction, "user_full_name": user.get("full_name"), "user_email": user.get("email")}
+    # Nom saisi par l'utilisateur : cellules neutralisées contre les formules Excel
+    return [csv_cell(row.get(column)) for column in CSV_COLUMNS]
+
+
+async def export_transactions(db, query: Dict[str, Any], export_format: str = "csv") -> AsyncIterator[bytes]:
+    """Génère l'export ligne par ligne (CSV avec en-tête, ou NDJSON)"""
+    cursor = db.payment_transactions.find(query, {"_id": 0}).sort(LEDGER_SORT).batch_size(EXPORT_BATCH_SIZE)
+
+    if export_format == "csv":
+        # BOM + « ; » : ouverture directe dans Excel (locale française)
+        yield ("\ufeff" + ";".join(CSV_COLUMNS) + "\r\n").encode("utf-8")
+
+    async for batch in _batches(cursor, EXPORT_BATCH_SIZE):
+        await attach_users(db, batch)
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, delimiter=";")
+            writer.writerows(_csv_row(t) for t in batch)
+            yield buffer.getvalue().encode("utf-8")
+        else:
+            yield b"".join(dumps(t) + b"\n" for t in batch)
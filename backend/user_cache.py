@@ -0,0 +1,144 @@
+"""
+Cache en mémoire des utilisateurs authentifiés.
+
+``get_current_user`` lit l'utilisateur dans ce cache avant d'interroger MongoDB.
+Les entrées sont bornées (LRU) et expirent après ``ttl`` secondes ; tout code
+qui modifie un utilisateur doit appeler ``invalidate`` explicitement.
+
+Pour éviter qu'une lecture lancée avant une invalidation ne réinsère une
+valeur périmée, l'appelant récupère ``generation()`` avant sa requête et le
+passe à ``set`` : l'insertion est ignorée si *cet utilisateur* a été invalidé
+entre-temps. Chaque invalidation prend un numéro de séquence et le note pour
+l'id et l'email concernés ; l'invalidation d'un autre utilisateur ne bloque
+donc pas le remplissage du cache.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from cachetools import TTLCache
+
+
+class UserCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        # user_id -> User validé
+        self._users: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+        # email -> user_id (les entrées orphelines se résolvent en miss)
+        self._email_index: Dict[str, str] = {}
+        self._generation = 0
+        # id / email -> séquence de la dernière invalidation (ordre croissant, borné)
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        # Séquence la plus récente oubliée lors de l'élagage : les lectures antérieures sont refusées
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self) -> int:
+        """Séquence d'invalidation courante, à lire avant d'aller chercher l'utilisateur en base"""
+        return self._generation
+
+    def _mark(self, keys: Iterable[Optional[str]]):
+        """Note la séquence courante pour les clés invalidées (verrou détenu)"""
+        for key in keys:
+            if key is None:
+                continue
+            self._invalidated.pop(key, None)
+            self._invalidated[key] = self._generation
+        while len(self._invalidated) > 2 * self.max_size:
+            _, sequence = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, sequence)
+
+    def _invalidated_since(self, user: Any, generation: int) -> bool:
+        if generation < self._floor:
+            return True
+        return any(
+            self._invalidated.get(key, 0) > generation for key in (user.id, user.email)
+        )
+
+    def get(self, user_id: Optional[str] = None, email: Optional[str] = None) -> Optional[Any]:
+        """Retourne l'utilisateur en cache (par id ou email) ou None"""
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._email_index.get(email)
+            user = self._users.get(user_id) if user_id is not None else None
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return user
+
+    def set(self, user: Any, generation: int) -> bool:
+        """Met l'utilisateur en cache s'il n'a pas été invalidé depuis ``generation``"""
+        with self._lock:
+            if self._invalidated_since(user, generation):
+                return False
+            self._users[user.id] = user
+            self._email_index[user.email] = user.id
+            if len(self._email_index) > 2 * self.max_size:
+                self._email_index = {
+                    mail: uid for mail, uid in self._email_index.items() if uid in self._users
+                }
+            return True
+
+    def invalidate(self, user_id: Optional[str] = None, email: Optional[str] = None):
+        """Supprime un utilisateur du cache (par id et/ou email)"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if user_id is None and email is not None:
+                user_id = self._email_index.get(email)
+            keys = [user_id, email]
+            if email is not None:
+                self._email_index.pop(email, None)
+            if user_id is not None:
+                user = self._users.pop(user_id, None)
+                if user is not None:
+                    self._email_index.pop(user.email, None)
+                    keys.append(user.email)
+            self._mark(keys)
+
+    def invalidate_many(self, user_ids):
+        """Supprime plusieurs utilisateurs en une seule invalidation (actions admin groupées)"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            keys = []
+            for user_id in user_ids:
+                keys.append(user_id)
+                user = self._users.pop(user_id, None)
+                if user is not None:
+                    self._email_index.pop(user.email, None)
+                    keys.append(user.email)
+            self._mark(keys)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._invalidated.clear()
+            self._users.clear()
+            self._email_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._users),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# Instance globale
+user_cache = UserCache(
+    max_size=int(os.environ.get('USER_CACHE_MAX_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', '60')),
+)
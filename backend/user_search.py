@@ -0,0 +1,123 @@
+"""
+Recherche d'utilisateurs indexée (admin).
+
+Chaque document ``users`` porte deux champs maintenus à l'écriture
+(``search_fields``) :
+
+- ``search_keys`` : mots normalisés (minuscules, sans accents) du nom, de
+  l'email et du pseudo -> recherche par préfixe via une regex ancrée ``^``,
+  qui utilise l'index ;
+- ``search_grams`` : trigrammes de ces mots -> recherche « contient » via
+  ``$all``, elle aussi indexée.
+
+Les documents existants (ou créés par les scripts de seed) se mettent à jour
+avec :
+
+    python user_search.py backfill
+"""
+import asyncio
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+GRAM_SIZE = 3
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Minuscules, sans accents, ponctuation remplacée par des espaces"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+def _grams(word: str) -> List[str]:
+    if len(word) <= GRAM_SIZE:
+        return [word]
+    return [word[i:i + GRAM_SIZE] for i in range(len(word) - GRAM_SIZE + 1)]
+
+
+def search_fields(full_name: Optional[str], email: Optional[str], username: Optional[str]) -> Dict[str, List[str]]:
+    """Champs de recherche à enregistrer avec l'utilisateur"""
+    words = set()
+    for value in (full_name, username, email):
+        words.update(normalize(value).split())
+    if email:
+        # L'adresse complète et sa partie locale restent cherchables par préfixe
+        words.add(email.lower())
+        words.add(normalize(email.split("@")[0]).replace(" ", ""))
+    words.discard("")
+
+    grams = set()
+    for word in words:
+        grams.update(_grams(word))
+    return {"search_keys": sorted(words), "search_grams": sorted(grams)}
+
+
+def search_query(search: str) -> Optional[Dict[str, Any]]:
+    """Filtre MongoDB pour une saisie admin (tous les mots doivent correspondre)"""
+    clauses = []
+    raw = search.strip().lower()
+    terms = normalize(search).split()
+    if "@" in raw:
+        # Saisie d'email : préfixe sur l'adresse complète
+        clauses.append({"search_keys": {"$regex": "^" + re.escape(raw)}})
+        terms = []
+    for term in terms:
+        prefix = {"search_keys": {"$regex": "^" + re.escape(term)}}
+        if len(term) >= GRAM_SIZE:
+            clauses.append({"$or": [prefix, {"search_grams": {"$all": _grams(term)}}]})
+        else:
+            clauses.append(prefix)
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def backfill(db, batch_size: int = 500) -> int:
+    """Calcule les champs de recherche des utilisateurs qui n'en ont pas"""
+    from pymongo import UpdateOne
+
+    updated = 0
+    while True:
+        users = await db.users.find(
+            {"search_keys": {"$exists": False}},
+            {"_id": 1, "full_name": 1, "email": 1, "username": 1}
+        ).limit(batch_size).to_list(batch_size)
+        if not users:
+            return updated
+        operations = [
+            UpdateOne({"_id": u["_id"]}, {"$set": search_fields(u.get("full_name"), u.get("email"), u.get("username"))})
+            for u in users
+        ]
+        result = await db.users.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+
+async def main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if command == "backfill":
+            updated = await backfill(db)
+            print(f"✅ {updated} utilisateur(s) indexé(s) pour la recherche")
+            return 0
+
+        print("Usage: python user_search.py backfill")
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "backfill")))
@@ -0,0 +1,101 @@
+"""
+Compteurs de vues des modules en écriture différée.
+
+Chaque vue incrémente un compteur en mémoire ; les compteurs sont écrits en
+un seul ``bulk_write`` toutes les ``flush_interval`` secondes, ou dès que
+``max_pending`` vues sont en attente. Un arrêt brutal du worker perd au plus
+ces vues en attente ; un arrêt normal les écrit via le hook de shutdown.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, collection, flush_interval: float = 30.0, max_pending: int = 1000):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._pending = 0
+        self._task: Optional[asyncio.Task] = None
+        # Écriture anticipée (max_pending atteint) : une seule à la fois, référence conservée
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+
+    def record(self, module_id: str):
+        """Compte une vue (aucune écriture en base)"""
+        self._counts[module_id] += 1
+        self._pending += 1
+        if self._pending >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Écrit les compteurs en attente. Retourne le nombre de vues écrites."""
+        async with self._flush_lock:
+            if not self._counts:
+                return 0
+            counts, self._counts = self._counts, defaultdict(int)
+            pending, self._pending = self._pending, 0
+
+            operations = [
+                UpdateOne({"id": module_id}, {"$inc": {"views_count": count}})
+                for module_id, count in counts.items()
+            ]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+            except PyMongoError as e:
+                # On remet les compteurs pour la prochaine tentative
+                self.failed_flushes += 1
+                for module_id, count in counts.items():
+                    self._counts[module_id] += count
+                self._pending += pending
+                logger.error(f"View counter flush failed: {e}")
+                return 0
+
+            self.flushes += 1
+            self.flushed_views += pending
+            return pending
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche périodique et écrit les dernières vues"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_views": self._pending,
+            "pending_modules": len(self._counts),
+            "flush_interval_seconds": self.flush_interval,
+            "max_pending": self.max_pending,
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "failed_flushes": self.failed_flushes,
+        }
@@ -6,6 +6,60 @@ const API = `${BACKEND_URL}/api`;
 
 const AuthContext = createContext();
 
+// Renouvelle le jeton d'accès expiré avec le refresh token (une seule requête à la fois)
+let refreshPromise = null;
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  let response;
+  try {
+    response = await axios.post(`${API}/auth/refresh`, { refresh_token: refreshToken });
+  } catch (error) {
+    // Rotation simultanée dans un autre onglet : ses nouveaux jetons sont déjà enregistrés
+    const rotatedToken = localStorage.getItem('token');
+    if (localStorage.getItem('refreshToken') !== refreshToken && rotatedToken) {
+      axios.defaults.headers.common['Authorization'] = `Bearer ${rotatedToken}`;
+      return rotatedToken;
+    }
+    throw error;
+  }
+  const { access_token, refresh_token } = response.data;
+  localStorage.setItem('token', access_token);
+  localStorage.setItem('refreshToken', refresh_token);
+  axios.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
+  return access_token;
+};
+
+axios.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (
+      error.response?.status === 401 &&
+      original &&
+      !original._retried &&
+      !/\/auth\/(login|register|refresh|logout)/.test(original.url || '') &&
+      localStorage.getItem('refreshToken')
+    ) {
+      original._retried = true;
+      try {
+        refreshPromise = refreshPromise || refreshAccessToken();
+        const accessToken = await refreshPromise;
+        original.headers = { ...original.headers, Authorization: `Bearer ${accessToken}` };
+        return axios(original);
+      } catch (refreshError) {
+        localStorage.removeItem('refreshToken');
+      } finally {
+        refreshPromise = null;
+      }
+    }
+    return Promise.reject(error);
+  }
+);
+
 export function useAuth() {
   const context = useContext(AuthContext);
   if (!context) {
@@ -30,6 +84,7 @@ export function AuthProvider({ children }) {
         } catch (error) {
           console.error('Token verification failed:', error);
           localStorage.removeItem('token');
+          localStorage.removeItem('refreshToken');
           delete axios.defaults.headers.common['Authorization'];
         }
       }
@@ -39,14 +94,22 @@ export function AuthProvider({ children }) {
     verifyToken();
   }, []);
 
-  const login = (userData, token) => {
+  const login = (userData, token, refreshToken) => {
     localStorage.setItem('token', token);
+    if (refreshToken) {
+      localStorage.setItem('refreshToken', refreshToken);
+    }
     axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
     setUser(userData);
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      axios.post(`${API}/auth/logout`, { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     if (axios.defaults.headers.common) {
       delete axios.defaults.headers.common['Authorization'];
     }
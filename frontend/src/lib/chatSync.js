@@ -0,0 +1,22 @@
+// Synchronisation incrémentale du chat privé (voir backend/chat_history.py)
+
+// Id du dernier message confirmé par le serveur (les messages optimistes ont un id "temp-")
+export function lastServerMessageId(messages) {
+  for (let i = messages.length - 1; i >= 0; i -= 1) {
+    if (!String(messages[i].id).startsWith('temp-')) {
+      return messages[i].id;
+    }
+  }
+  return null;
+}
+
+// Ajoute les messages reçus sans doublon ; un message optimiste est remplacé par sa version serveur
+export function mergeMessages(current, incoming) {
+  const known = new Set(current.map((m) => m.id));
+  const fresh = incoming.filter((m) => !known.has(m.id));
+  const confirmed = current.filter(
+    (m) => !(String(m.id).startsWith('temp-')
+      && fresh.some((f) => f.sender_type === m.sender_type && f.content === m.content))
+  );
+  return [...confirmed, ...fresh];
+}
@@ -84,20 +84,25 @@ function Dashboard() {
       return;
     }
     
+    let courseAccess = {};
+    try {
+      // Accès de tous les modules en un seul appel
+      const response = await axios.get(`${API}/progress/access`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+      });
+      courseAccess = response.data;
+    } catch (error) {
+      console.error("Error fetching module access:", error);
+    }
+    
     for (const module of moduleList) {
-      try {
-        const response = await axios.get(`${API}/progress/check-access/${module.id}`, {
-          headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-        });
-        accessMap[module.id] = response.data;
-      } catch (error) {
-        // If error occurs, check if module is free
+      if (courseAccess[module.id]) {
+        accessMap[module.id] = courseAccess[module.id];
+      } else if (module.is_free) {
         // Free modules should always be accessible
-        if (module.is_free) {
-          accessMap[module.id] = { can_access: true, reason: 'free_module' };
-        } else {
-          accessMap[module.id] = { can_access: false, reason: 'purchase_required' };
-        }
+        accessMap[module.id] = { can_access: true, reason: 'free_module' };
+      } else {
+        accessMap[module.id] = { can_access: false, reason: 'purchase_required' };
       }
     }
     
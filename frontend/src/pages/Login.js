@@ -35,13 +35,13 @@ function Login() {
         password
       });
 
-      const { access_token, user } = response.data;
+      const { access_token, refresh_token, user } = response.data;
       
       // Set authorization header for future requests
       axios.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
       
       // Update auth context
-      login(user, access_token);
+      login(user, access_token, refresh_token);
       
       toast.success(`Bienvenue ${user.full_name} !`);
       
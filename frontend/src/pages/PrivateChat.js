@@ -17,6 +17,7 @@ import {
   BookOpen
 } from 'lucide-react';
 import axios from 'axios';
+import { lastServerMessageId, mergeMessages } from '../lib/chatSync';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -29,8 +30,18 @@ function PrivateChat() {
   const [loading, setLoading] = useState(true);
   const [sending, setSending] = useState(false);
   const [connected, setConnected] = useState(false);
+  const [olderCursor, setOlderCursor] = useState(null);
   const messagesEndRef = useRef(null);
   const wsRef = useRef(null);
+  const lastMessageIdRef = useRef(null);
+
+  const updateMessages = (updater) => {
+    setMessages(prev => {
+      const next = updater(prev);
+      lastMessageIdRef.current = lastServerMessageId(next);
+      return next;
+    });
+  };
 
   useEffect(() => {
     fetchMessages();
@@ -55,6 +66,10 @@ function PrivateChat() {
 
     ws.onopen = () => {
       setConnected(true);
+      // Reconnexion : on ne récupère que les messages manqués
+      if (lastMessageIdRef.current) {
+        syncMessages();
+      }
       // Ping régulier pour garder la connexion
       const pingInterval = setInterval(() => {
         if (ws.readyState === WebSocket.OPEN) {
@@ -70,7 +85,7 @@ function PrivateChat() {
       try {
         const data = JSON.parse(event.data);
         if (data.type === 'new_message') {
-          setMessages(prev => [...prev, data.message]);
+          updateMessages(prev => mergeMessages(prev, [data.message]));
         }
       } catch (e) {
         console.error('Error parsing WebSocket message:', e);
@@ -98,7 +113,8 @@ function PrivateChat() {
   const fetchMessages = async () => {
     try {
       const response = await axios.get(`${API}/chat/messages`);
-      setMessages(response.data);
+      updateMessages(() => response.data);
+      setOlderCursor(response.headers['x-before-cursor'] || null);
     } catch (error) {
       console.error('Error fetching messages:', error);
       if (error.response?.status === 403) {
@@ -109,6 +125,37 @@ function PrivateChat() {
     }
   };
 
+  const syncMessages = async () => {
+    try {
+      let params = { since: lastMessageIdRef.current };
+      // Longue coupure : on suit les pages jusqu'au message le plus récent
+      while (params) {
+        const response = await axios.get(`${API}/chat/messages`, { params });
+        updateMessages(prev => mergeMessages(prev, response.data));
+        params = response.headers['x-has-more-after']
+          ? { after: response.headers['x-after-cursor'] }
+          : null;
+      }
+    } catch (error) {
+      // Message de référence introuvable : rechargement complet
+      if (error.response?.status === 400) {
+        fetchMessages();
+      }
+    }
+  };
+
+  const loadOlderMessages = async () => {
+    try {
+      const response = await axios.get(`${API}/chat/messages`, {
+        params: { before: olderCursor }
+      });
+      updateMessages(prev => [...response.data, ...prev]);
+      setOlderCursor(response.headers['x-before-cursor'] || null);
+    } catch (error) {
+      console.error('Error fetching older messages:', error);
+    }
+  };
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
@@ -130,7 +177,7 @@ function PrivateChat() {
       created_at: new Date().toISOString(),
       is_read: false
     };
-    setMessages(prev => [...prev, optimisticMessage]);
+    updateMessages(prev => [...prev, optimisticMessage]);
 
     try {
       await axios.post(`${API}/chat/messages`, { content: messageContent });
@@ -138,7 +185,7 @@ function PrivateChat() {
       console.error('Error sending message:', error);
       toast.error('Erreur lors de l\'envoi du message');
       // Retirer le message optimiste en cas d'erreur
-      setMessages(prev => prev.filter(m => m.id !== optimisticMessage.id));
+      updateMessages(prev => prev.filter(m => m.id !== optimisticMessage.id));
       setNewMessage(messageContent);
     } finally {
       setSending(false);
@@ -261,6 +308,13 @@ function PrivateChat() {
                   </div>
                 ) : (
                   <AnimatePresence initial={false}>
+                    {olderCursor && (
+                      <div key="older-messages" className="text-center">
+                        <Button variant="ghost" size="sm" onClick={loadOlderMessages}>
+                          Messages précédents
+                        </Button>
+                      </div>
+                    )}
                     {messages.map((message, index) => (
                       <motion.div
                         key={message.id}
@@ -20,6 +20,7 @@ import {
   Bell
 } from 'lucide-react';
 import axios from 'axios';
+import { lastServerMessageId, mergeMessages } from '../../lib/chatSync';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -36,11 +37,26 @@ function AdminChat() {
   const [sending, setSending] = useState(false);
   const [connected, setConnected] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
+  const [olderCursor, setOlderCursor] = useState(null);
+  // Total serveur (compteur global), mis à jour par WebSocket
+  const [totalUnread, setTotalUnread] = useState(0);
   const messagesEndRef = useRef(null);
   const wsRef = useRef(null);
+  // Lus par les callbacks WebSocket (créés une seule fois à la connexion)
+  const selectedConversationRef = useRef(null);
+  const lastMessageIdRef = useRef(null);
+
+  const updateMessages = (updater) => {
+    setMessages(prev => {
+      const next = updater(prev);
+      lastMessageIdRef.current = lastServerMessageId(next);
+      return next;
+    });
+  };
 
   useEffect(() => {
     fetchConversations();
+    fetchUnreadTotal();
     connectWebSocket();
 
     return () => {
@@ -62,6 +78,12 @@ function AdminChat() {
 
     ws.onopen = () => {
       setConnected(true);
+      // Reconnexion : on ne récupère que les messages manqués de la conversation ouverte
+      if (selectedConversationRef.current && lastMessageIdRef.current) {
+        syncMessages(selectedConversationRef.current.id);
+      }
+      // Mises à jour du total éventuellement manquées pendant la coupure
+      fetchUnreadTotal();
       const pingInterval = setInterval(() => {
         if (ws.readyState === WebSocket.OPEN) {
           ws.send('ping');
@@ -75,10 +97,12 @@ function AdminChat() {
       
       try {
         const data = JSON.parse(event.data);
-        if (data.type === 'new_message') {
+        if (data.type === 'unread_total') {
+          setTotalUnread(data.unread);
+        } else if (data.type === 'new_message') {
           // Si c'est la conversation active, ajouter le message
-          if (selectedConversation?.id === data.conversation_id) {
-            setMessages(prev => [...prev, data.message]);
+          if (selectedConversationRef.current?.id === data.conversation_id) {
+            updateMessages(prev => mergeMessages(prev, [data.message]));
           }
           // Rafraîchir la liste des conversations
           fetchConversations();
@@ -107,6 +131,15 @@ function AdminChat() {
     wsRef.current = ws;
   };
 
+  const fetchUnreadTotal = async () => {
+    try {
+      const response = await axios.get(`${API}/admin/chat/unread-total`);
+      setTotalUnread(response.data.unread);
+    } catch (error) {
+      console.error('Error fetching unread total:', error);
+    }
+  };
+
   const fetchConversations = async () => {
     try {
       const response = await axios.get(`${API}/admin/chat/conversations`);
@@ -119,13 +152,52 @@ function AdminChat() {
     }
   };
 
+  const syncMessages = async (conversationId) => {
+    try {
+      let params = { since: lastMessageIdRef.current };
+      // Longue coupure : on suit les pages jusqu'au message le plus récent
+      while (params) {
+        const response = await axios.get(`${API}/admin/chat/conversations/${conversationId}/messages`, { params });
+        if (selectedConversationRef.current?.id !== conversationId) return;
+        updateMessages(prev => mergeMessages(prev, response.data));
+        params = response.headers['x-has-more-after']
+          ? { after: response.headers['x-after-cursor'] }
+          : null;
+      }
+    } catch (error) {
+      // Message de référence introuvable : rechargement complet
+      if (error.response?.status === 400 && selectedConversationRef.current?.id === conversationId) {
+        selectConversation(selectedConversationRef.current);
+      } else {
+        console.error('Error syncing messages:', error);
+      }
+    }
+  };
+
+  const loadOlderMessages = async () => {
+    const conversationId = selectedConversation.id;
+    try {
+      const response = await axios.get(`${API}/admin/chat/conversations/${conversationId}/messages`, {
+        params: { before: olderCursor }
+      });
+      if (selectedConversationRef.current?.id === conversationId) {
+        updateMessages(prev => [...response.data, ...prev]);
+        setOlderCursor(response.headers['x-before-cursor'] || null);
+      }
+    } catch (error) {
+      console.error('Error fetching older messages:', error);
+    }
+  };
+
   const selectConversation = async (conversation) => {
     setSelectedConversation(conversation);
+    selectedConversationRef.current = conversation;
     setLoadingMessages(true);
     
     try {
       const response = await axios.get(`${API}/admin/chat/conversations/${conversation.id}/messages`);
-      setMessages(response.data);
+      updateMessages(() => response.data);
+      setOlderCursor(response.headers['x-before-cursor'] || null);
       // Rafraîchir pour mettre à jour les compteurs
       fetchConversations();
     } catch (error) {
@@ -157,7 +229,7 @@ function AdminChat() {
       created_at: new Date().toISOString(),
       is_read: false
     };
-    setMessages(prev => [...prev, optimisticMessage]);
+    updateMessages(prev => [...prev, optimisticMessage]);
 
     try {
       await axios.post(`${API}/admin/chat/conversations/${selectedConversation.id}/messages`, {
@@ -167,7 +239,7 @@ function AdminChat() {
     } catch (error) {
       console.error('Error sending message:', error);
       toast.error('Erreur lors de l\'envoi du message');
-      setMessages(prev => prev.filter(m => m.id !== optimisticMessage.id));
+      updateMessages(prev => prev.filter(m => m.id !== optimisticMessage.id));
       setNewMessage(messageContent);
     } finally {
       setSending(false);
@@ -197,8 +269,6 @@ function AdminChat() {
     conv.student_email?.toLowerCase().includes(searchTerm.toLowerCase())
   );
 
-  const totalUnread = conversations.reduce((sum, conv) => sum + (conv.unread_by_admin || 0), 0);
-
   if (loading) {
     return (
       <div className="min-h-screen bg-gray-50 flex items-center justify-center">
@@ -329,7 +399,10 @@ function AdminChat() {
                           variant="ghost"
                           size="sm"
                           className="lg:hidden"
-                          onClick={() => setSelectedConversation(null)}
+                          onClick={() => {
+                            setSelectedConversation(null);
+                            selectedConversationRef.current = null;
+                          }}
                         >
                           <ArrowLeft className="h-4 w-4" />
                         </Button>
@@ -364,6 +437,13 @@ function AdminChat() {
                       </div>
                     ) : (
                       <AnimatePresence initial={false}>
+                        {olderCursor && (
+                          <div key="older-messages" className="text-center">
+                            <Button variant="ghost" size="sm" onClick={loadOlderMessages}>
+                              Messages précédents
+                            </Button>
+                          </div>
+                        )}
                         {messages.map((message) => (
                           <motion.div
                             key={message.id}
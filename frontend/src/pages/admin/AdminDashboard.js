@@ -40,15 +40,17 @@ function AdminDashboard() {
 
   const fetchData = async () => {
     try {
-      const [analyticsRes, usersRes, transactionsRes] = await Promise.all([
-        axios.get(`${API}/admin/analytics`),
-        axios.get(`${API}/admin/users?limit=5`),
-        axios.get(`${API}/admin/transactions`)
-      ]);
+      // Un seul appel : les sections sont calculées en parallèle côté serveur
+      const { data } = await axios.get(`${API}/admin/dashboard`);
 
-      setAnalytics(analyticsRes.data);
-      setRecentUsers(usersRes.data.users);
-      setRecentTransactions(transactionsRes.data.slice(0, 5));
+      if (data.analytics) {
+        setAnalytics(data.analytics);
+      }
+      setRecentUsers(data.recent_users || []);
+      setRecentTransactions(data.recent_transactions || []);
+      if (data.partial.length > 0) {
+        toast('Certaines données du tableau de bord sont momentanément indisponibles');
+      }
     } catch (error) {
       console.error('Error fetching admin data:', error);
       toast.error('Erreur lors du chargement des données');
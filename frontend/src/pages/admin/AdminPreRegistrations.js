@@ -21,7 +21,8 @@ import {
   PhoneOff,
   ThumbsUp,
   ThumbsDown,
-  UserCheck
+  UserCheck,
+  Download
 } from 'lucide-react';
 import toast from 'react-hot-toast';
 
@@ -40,6 +41,9 @@ const CALLBACK_STATUSES = {
 
 export default function AdminPreRegistrations() {
   const [prospects, setProspects] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [selectedProspect, setSelectedProspect] = useState(null);
   const [filterStatus, setFilterStatus] = useState('all');
@@ -50,14 +54,19 @@ export default function AdminPreRegistrations() {
 
   useEffect(() => {
     fetchProspects();
-  }, []);
+  }, [filterStatus]);
+
+  // Filtre de statut appliqué côté serveur
+  const statusParam = () => (filterStatus === 'all' ? '' : `callback_status=${filterStatus}`);
 
   const fetchProspects = async () => {
     try {
-      const response = await axios.get(`${API}/admin/pre-registrations`, {
+      const response = await axios.get(`${API}/admin/pre-registrations?${statusParam()}`, {
         headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
       });
-      setProspects(response.data);
+      setProspects(response.data.prospects);
+      setStatusCounts(response.data.counts || {});
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching prospects:', error);
       toast.error('Erreur lors du chargement des prospects');
@@ -66,6 +75,42 @@ export default function AdminPreRegistrations() {
     }
   };
 
+  const loadMoreProspects = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(
+        `${API}/admin/pre-registrations?${statusParam()}&cursor=${encodeURIComponent(nextCursor)}`,
+        { headers: { Authorization: `Bearer ${localStorage.getItem('token')}` } }
+      );
+      setProspects(prev => [...prev, ...response.data.prospects]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching prospects:', error);
+      toast.error('Erreur lors du chargement des prospects');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const exportProspects = async () => {
+    try {
+      const response = await axios.get(`${API}/admin/pre-registrations/export?${statusParam()}`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+        responseType: 'blob'
+      });
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'prospects.csv';
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting prospects:', error);
+      toast.error("Erreur lors de l'export");
+    }
+  };
+
   const updateCallbackStatus = async () => {
     if (!selectedProspect || !callbackStatus) return;
     
@@ -132,21 +177,18 @@ export default function AdminPreRegistrations() {
   };
 
   // Filtrage des prospects
-  const filteredProspects = prospects.filter(p => {
-    const matchesStatus = filterStatus === 'all' || (p.callback_status || 'pending') === filterStatus;
-    const matchesSearch = 
-      p.full_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      p.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      p.phone?.includes(searchTerm);
-    return matchesStatus && matchesSearch;
-  });
+  const filteredProspects = prospects.filter(p => 
+    p.full_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    p.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    p.phone?.includes(searchTerm)
+  );
 
-  // Statistiques
+  // Statistiques (calculées par le serveur sur l'ensemble des prospects)
   const stats = {
-    total: prospects.length,
-    pending: prospects.filter(p => !p.callback_status || p.callback_status === 'pending').length,
-    interested: prospects.filter(p => p.callback_status === 'interested').length,
-    converted: prospects.filter(p => p.callback_status === 'converted').length
+    total: Object.values(statusCounts).reduce((sum, count) => sum + count, 0),
+    pending: statusCounts.pending || 0,
+    interested: statusCounts.interested || 0,
+    converted: statusCounts.converted || 0
   };
 
   if (loading) {
@@ -247,6 +289,10 @@ export default function AdminPreRegistrations() {
                     <option key={key} value={key}>{value.label}</option>
                   ))}
                 </select>
+                <Button variant="outline" onClick={exportProspects}>
+                  <Download className="h-4 w-4 mr-2" />
+                  Export CSV
+                </Button>
               </div>
             </div>
           </CardContent>
@@ -352,6 +398,14 @@ export default function AdminPreRegistrations() {
                 </Card>
               );
             })}
+            {nextCursor && (
+              <div className="flex justify-center">
+                <Button variant="outline" onClick={loadMoreProspects} disabled={loadingMore}>
+                  {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                  Charger plus de prospects
+                </Button>
+              </div>
+            )}
           </div>
         )}
 
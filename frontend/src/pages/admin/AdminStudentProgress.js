@@ -27,6 +27,10 @@ const API = `${BACKEND_URL}/api`;
 
 function AdminStudentProgress() {
   const [students, setStudents] = useState([]);
+  const [reminderStudents, setReminderStudents] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalStudents, setTotalStudents] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [pendingValidations, setPendingValidations] = useState([]);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
@@ -43,11 +47,15 @@ function AdminStudentProgress() {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [progressRes, pendingRes] = await Promise.all([
+      const [progressRes, reminderRes, pendingRes] = await Promise.all([
         axios.get(`${API}/admin/students/progress`),
+        axios.get(`${API}/admin/students/progress?needs_reminder=true&limit=500`),
         axios.get(`${API}/admin/students/pending-validation`)
       ]);
-      setStudents(progressRes.data);
+      setStudents(progressRes.data.students);
+      setNextCursor(progressRes.data.next_cursor);
+      setTotalStudents(progressRes.data.total_students);
+      setReminderStudents(reminderRes.data.students);
       setPendingValidations(pendingRes.data);
     } catch (error) {
       console.error('Error fetching data:', error);
@@ -57,6 +65,21 @@ function AdminStudentProgress() {
     }
   };
 
+  const loadMoreStudents = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/admin/students/progress?cursor=${encodeURIComponent(nextCursor)}`);
+      setStudents(prev => [...prev, ...response.data.students]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching students:', error);
+      toast.error('Erreur lors du chargement des élèves');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleValidateProject = async (userId, validated) => {
     setActionLoading(true);
     try {
@@ -104,13 +127,14 @@ function AdminStudentProgress() {
     }
   };
 
-  const filteredStudents = students.filter(s => 
+  const matchesSearch = s => 
     s.full_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    s.email?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+    s.email?.toLowerCase().includes(searchTerm.toLowerCase());
 
-  const inactiveStudents = filteredStudents.filter(s => s.needs_reminder);
-  const activeStudents = filteredStudents.filter(s => !s.needs_reminder);
+  const filteredStudents = students.filter(matchesSearch);
+
+  // Élèves à relancer : requête dédiée (needs_reminder=true), indépendante de la pagination
+  const inactiveStudents = reminderStudents.filter(matchesSearch);
 
   if (loading) {
     return (
@@ -150,7 +174,7 @@ function AdminStudentProgress() {
                 <div className="flex items-center justify-between">
                   <div>
                     <p className="text-sm text-gray-600">Total Élèves</p>
-                    <p className="text-2xl font-bold">{students.length}</p>
+                    <p className="text-2xl font-bold">{totalStudents}</p>
                   </div>
                   <Users className="h-8 w-8 text-blue-600" />
                 </div>
@@ -472,6 +496,14 @@ function AdminStudentProgress() {
                   </tbody>
                 </table>
               </div>
+              {nextCursor && (
+                <div className="flex justify-center mt-4">
+                  <Button onClick={loadMoreStudents} variant="outline" disabled={loadingMore}>
+                    {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                    Charger plus d'élèves
+                  </Button>
+                </div>
+              )}
             </CardContent>
           </Card>
 
@@ -2,23 +2,33 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
-import { Loader2 } from 'lucide-react';
+import { Button } from '../../components/ui/button';
+import { Loader2, Download } from 'lucide-react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 export default function AdminTransactions() {
   const [transactions, setTransactions] = useState([]);
+  const [summary, setSummary] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [statusFilter, setStatusFilter] = useState('');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchTransactions();
-  }, []);
+  }, [statusFilter]);
+
+  const filterParams = () => (statusFilter ? `status=${statusFilter}` : '');
 
   const fetchTransactions = async () => {
+    setLoading(true);
     try {
-      const response = await axios.get(`${API}/admin/transactions`);
-      setTransactions(response.data);
+      const response = await axios.get(`${API}/admin/transactions?${filterParams()}`);
+      setTransactions(response.data.transactions);
+      setSummary(response.data.summary || {});
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching transactions:', error);
     } finally {
@@ -26,6 +36,42 @@ export default function AdminTransactions() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(
+        `${API}/admin/transactions?${filterParams()}&cursor=${encodeURIComponent(nextCursor)}`
+      );
+      setTransactions(prev => [...prev, ...response.data.transactions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching transactions:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const exportTransactions = async (format) => {
+    try {
+      const response = await axios.get(
+        `${API}/admin/transactions/export?format=${format}&${filterParams()}`,
+        { responseType: 'blob' }
+      );
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `transactions.${format}`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting transactions:', error);
+    }
+  };
+
+  const totalCount = Object.values(summary).reduce((sum, s) => sum + s.count, 0);
+  const completed = summary.completed || { count: 0, amount: 0 };
+
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString('fr-FR', {
       year: 'numeric',
@@ -63,16 +109,39 @@ export default function AdminTransactions() {
 
   return (
     <div className="container mx-auto p-6">
-      <div className="mb-8">
-        <h1 className="text-3xl font-bold">Transactions</h1>
-        <p className="text-gray-600 mt-2">Gestion des paiements et transactions</p>
+      <div className="mb-8 flex items-center justify-between">
+        <div>
+          <h1 className="text-3xl font-bold">Transactions</h1>
+          <p className="text-gray-600 mt-2">Gestion des paiements et transactions</p>
+        </div>
+        <div className="flex items-center gap-2">
+          <select
+            value={statusFilter}
+            onChange={(e) => setStatusFilter(e.target.value)}
+            className="border rounded-md px-3 py-2 text-sm"
+          >
+            <option value="">Tous les statuts</option>
+            <option value="completed">Complété</option>
+            <option value="pending">En attente</option>
+            <option value="expired">Expiré</option>
+            <option value="failed">Échoué</option>
+          </select>
+          <Button variant="outline" onClick={() => exportTransactions('csv')}>
+            <Download className="h-4 w-4 mr-2" />
+            CSV
+          </Button>
+          <Button variant="outline" onClick={() => exportTransactions('ndjson')}>
+            <Download className="h-4 w-4 mr-2" />
+            NDJSON
+          </Button>
+        </div>
       </div>
 
       <Card>
         <CardHeader>
           <CardTitle>Historique des transactions</CardTitle>
           <CardDescription>
-            Total: {transactions.length} transaction{transactions.length !== 1 ? 's' : ''}
+            Total: {totalCount} transaction{totalCount !== 1 ? 's' : ''}
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -127,6 +196,14 @@ export default function AdminTransactions() {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                Charger plus
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
@@ -137,7 +214,7 @@ export default function AdminTransactions() {
           </CardHeader>
           <CardContent>
             <p className="text-3xl font-bold">
-              {transactions.length}
+              {totalCount}
             </p>
           </CardContent>
         </Card>
@@ -148,7 +225,7 @@ export default function AdminTransactions() {
           </CardHeader>
           <CardContent>
             <p className="text-3xl font-bold text-green-600">
-              {transactions.filter(t => t.payment_status === 'completed').length}
+              {completed.count}
             </p>
           </CardContent>
         </Card>
@@ -159,10 +236,7 @@ export default function AdminTransactions() {
           </CardHeader>
           <CardContent>
             <p className="text-3xl font-bold text-blue-600">
-              {transactions
-                .filter(t => t.payment_status === 'completed')
-                .reduce((sum, t) => sum + t.amount, 0)
-                .toFixed(2)}€
+              {completed.amount.toFixed(2)}€
             </p>
           </CardContent>
         </Card>
@@ -47,7 +47,7 @@ async def setup_admin():
             "is_active": True,
             "is_admin": True,
             "avatar_url": None,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
             "has_purchased": False,
             "certificate_url": None,
             "last_login": None,
@@ -0,0 +1,92 @@
+"""
+Unit Tests for bulk admin actions (backend/admin_bulk.py)
+Tests: one bulk_write per collection, per-item results, ordered mode stopping at the first failure
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from admin_bulk import BulkAdminRequest, run_bulk_actions, summarize
+
+
+class Collection:
+    """In-memory stand-in answering the existence lookup and recording bulk writes"""
+
+    def __init__(self, ids, fail_ids=()):
+        self.ids = set(ids)
+        self.fail_ids = set(fail_ids)
+        self.batches = []
+
+    def find(self, query, projection):
+        wanted = query["id"]["$in"]
+
+        async def docs():
+            for doc_id in wanted:
+                if doc_id in self.ids:
+                    yield {"id": doc_id}
+        return docs()
+
+    async def bulk_write(self, operations, ordered=True):
+        targets = [op._filter["id"] for op in operations]
+        self.batches.append(targets)
+        errors = [{"index": i, "errmsg": "write conflict"} for i, t in enumerate(targets) if t in self.fail_ids]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors[:1] if ordered else errors})
+
+
+def make_db(fail_ids=()):
+    return {
+        "users": Collection({"u1", "u2", "u3"}, fail_ids),
+        "pre_registration_questionnaires": Collection({"p1"}),
+    }
+
+
+ACTIONS = [
+    {"type": "validate_student", "user_id": "u1", "validated": True},
+    {"type": "set_weproov_code", "user_id": "u2", "code": "WP-2"},
+    {"type": "update_prospect_callback", "prospect_id": "p1", "callback_status": "called"},
+    {"type": "validate_inspection", "user_id": "missing", "validated": True},
+    {"type": "update_prospect_callback", "prospect_id": "p1", "callback_status": "unknown"},
+    {"type": "validate_inspection", "user_id": "u3", "validated": False, "notes": "Rayures"},
+]
+
+
+class TestAdminBulk:
+    """Typed actions applied through bulk_write with per-item results"""
+
+    def test_unordered_groups_writes_per_collection(self):
+        db = make_db()
+        results, touched = asyncio.run(run_bulk_actions(db, BulkAdminRequest(actions=ACTIONS)))
+
+        assert [r["status"] for r in results] == ["ok", "ok", "ok", "not_found", "invalid", "ok"]
+        assert db["users"].batches == [["u1", "u2", "u3"]]
+        assert db["pre_registration_questionnaires"].batches == [["p1"]]
+        assert touched == {"u1", "u2", "u3"}
+        assert summarize(results) == {"ok": 4, "not_found": 1, "invalid": 1}
+
+    def test_ordered_stops_at_first_failure(self):
+        db = make_db()
+        results, touched = asyncio.run(run_bulk_actions(db, BulkAdminRequest(actions=ACTIONS, ordered=True)))
+
+        assert [r["status"] for r in results] == ["ok", "ok", "ok", "not_found", "skipped", "skipped"]
+        assert db["users"].batches == [["u1", "u2"]]
+        assert touched == {"u1", "u2"}
+
+    def test_write_errors_are_reported_per_item(self):
+        db = make_db(fail_ids={"u2"})
+        results, touched = asyncio.run(run_bulk_actions(db, BulkAdminRequest(actions=ACTIONS[:2] + ACTIONS[5:], ordered=True)))
+
+        assert [r["status"] for r in results] == ["ok", "error", "skipped"]
+        assert results[1]["detail"] == "write conflict"
+        assert touched == {"u1"}
+
+    def test_unknown_action_type_rejected(self):
+        with pytest.raises(ValidationError):
+            BulkAdminRequest(actions=[{"type": "delete_user", "user_id": "u1"}])
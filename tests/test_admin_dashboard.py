@@ -0,0 +1,93 @@
+"""
+Unit Tests for the composite admin dashboard (backend/admin_dashboard.py)
+Tests: concurrent sections, partial results on timeout / error, shared computation window
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from admin_dashboard import SharedResult, gather_sections
+
+
+def section(value, delay=0.0):
+    async def run():
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+async def failing():
+    raise RuntimeError("connection reset")
+
+
+class TestGatherSections:
+    """Independent sections run concurrently, each under its own timeout"""
+
+    def test_sections_run_concurrently(self):
+        """Each section waits until both are running: run one after the other, they would time out"""
+        entered = []
+        both_running = asyncio.Event()
+
+        def rendezvous(value):
+            async def run():
+                entered.append(value)
+                if len(entered) == 2:
+                    both_running.set()
+                await both_running.wait()
+                return value
+            return run
+
+        result = asyncio.run(gather_sections({"a": rendezvous(1), "b": rendezvous(2)}, timeout=5))
+        assert result == {"a": 1, "b": 2, "partial": []}
+
+    def test_slow_or_failing_section_is_partial(self):
+        result = asyncio.run(gather_sections({
+            "fast": section("ok"),
+            "slow": section("late", 1),
+            "broken": failing,
+        }, timeout=0.05))
+        assert result["fast"] == "ok"
+        assert result["slow"] is None and result["broken"] is None
+        assert sorted(result["partial"]) == ["broken", "slow"]
+
+
+class TestSharedResult:
+    """Concurrent refreshes collapse into one computation"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": len(calls), "partial": []}
+
+        shared = SharedResult(compute, ttl=5)
+
+        async def scenario():
+            results = await asyncio.gather(*(shared.get() for _ in range(5)))
+            results.append(await shared.get())
+            return results
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(r["value"] == 1 for r in results)
+        assert shared.stats()["shared"] == 5
+
+    def test_partial_result_not_kept(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"partial": ["chat"]}
+
+        shared = SharedResult(compute, ttl=5)
+
+        async def scenario():
+            await shared.get()
+            await shared.get()
+
+        asyncio.run(scenario())
+        assert len(calls) == 2
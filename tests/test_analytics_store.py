@@ -0,0 +1,199 @@
+"""
+Unit Tests for materialized analytics counters (backend/analytics_store.py)
+Tests: paid_users follows has_purchased transitions only, backfill rewrites finished days and corrects totals
+by $inc without losing live increments, backfill lease, seeding counters never rebuilt
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import DuplicateKeyError
+
+from analytics_store import AnalyticsStore, day_key
+
+NOW = datetime(2024, 3, 10, 15, 0, tzinfo=timezone.utc)
+TODAY = datetime(2024, 3, 10, tzinfo=timezone.utc)
+YESTERDAY = TODAY - timedelta(days=1)
+TWO_DAYS_AGO = TODAY - timedelta(days=2)
+
+
+def _inc(doc, path, value):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = doc.get(leaf, 0) + value
+
+
+class Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        # Rend la main comme un vrai curseur : les écritures concurrentes s'intercalent
+        await asyncio.sleep(0)
+        for row in self.rows:
+            yield row
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs]
+
+
+class Counters:
+    """In-memory stand-in for analytics_daily / analytics_totals"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        for field, value in update.get("$setOnInsert", {}).items():
+            doc.setdefault(field, value)
+        for field, value in update.get("$inc", {}).items():
+            _inc(doc, field, value)
+        doc.update(update.get("$set", {}))
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+    def find(self, query):
+        return Cursor([d for d in self.docs.values() if d["day"] < query["day"]["$lt"]])
+
+    async def bulk_write(self, operations):
+        for operation in operations:
+            self.docs[operation._filter["_id"]] = dict(operation._doc)
+
+    async def delete_many(self, query):
+        for key in [k for k, d in self.docs.items() if d["day"] < query["day"]["$lt"] and k not in query["_id"]["$nin"]]:
+            del self.docs[key]
+
+
+class Source:
+    """Raw collection returning canned aggregation rows"""
+
+    def __init__(self, rows=(), by_module=(), count=0, on_aggregate=None):
+        self.rows, self.by_module, self.count = list(rows), list(by_module), count
+        self.on_aggregate = on_aggregate
+
+    def aggregate(self, pipeline):
+        if self.on_aggregate:
+            self.on_aggregate()
+        if pipeline[-1]["$group"]["_id"] == "$module_id":
+            return Rows(self.by_module)
+        return Rows(self.rows)
+
+    async def count_documents(self, query):
+        return self.count
+
+
+class JobState:
+    def __init__(self, held=False):
+        self.held = held
+
+    async def find_one_and_update(self, *args, **kwargs):
+        if self.held:
+            raise DuplicateKeyError("lease held")
+        return {}
+
+    async def update_one(self, *args, **kwargs):
+        return None
+
+
+class Database:
+    def __init__(self, users=None, payments=None, progress=None, held=False):
+        self.analytics_daily = Counters()
+        self.analytics_totals = Counters()
+        self.users = users or Source()
+        self.payment_transactions = payments or Source()
+        self.module_progress = progress or Source()
+        self.job_state = JobState(held)
+
+
+class TestRecording:
+    """Write paths increment today's bucket and the running totals"""
+
+    def test_purchase_does_not_count_paid_user(self):
+        db = Database()
+        store = AnalyticsStore(db)
+
+        async def scenario():
+            await store.record_paid_access_change(True)
+            await store.record_purchase(49.0, NOW)
+            await store.record_purchase(49.0, NOW)
+
+        asyncio.run(scenario())
+        totals = db.analytics_totals.docs["totals"]
+        assert totals["paid_users"] == 1
+        assert totals["purchases"] == 2 and totals["revenue"] == 98.0
+        assert db.analytics_daily.docs[day_key(NOW)]["purchases"] == 2
+
+
+class TestBackfill:
+    """Finished days rebuilt exactly, today left live, totals corrected by $inc"""
+
+    def test_rebuilds_finished_days_and_keeps_live_increments(self):
+        store = None
+
+        def live_registration():
+            # Inscription arrivée pendant la reconstruction
+            asyncio.get_running_loop().create_task(store.record_registration(NOW))
+
+        db = Database(
+            users=Source(rows=[{"_id": day_key(YESTERDAY), "n": 3}], count=3, on_aggregate=live_registration),
+            payments=Source(rows=[{"_id": day_key(YESTERDAY), "n": 1, "revenue": 49.0}]),
+            progress=Source(by_module=[{"_id": "m1", "n": 3}, {"_id": "m2", "n": 1}]),
+        )
+        store = AnalyticsStore(db)
+        db.analytics_daily.docs = {
+            day_key(TWO_DAYS_AGO): {"_id": day_key(TWO_DAYS_AGO), "day": TWO_DAYS_AGO, "registrations": 1},
+            day_key(YESTERDAY): {"_id": day_key(YESTERDAY), "day": YESTERDAY, "registrations": 5},
+            day_key(TODAY): {"_id": day_key(TODAY), "day": TODAY, "registrations": 2},
+        }
+        db.analytics_totals.docs["totals"] = {
+            "_id": "totals", "registrations": 8, "paid_users": 4, "module_completions": {"m1": 2},
+        }
+
+        result = asyncio.run(store.backfill(now=NOW))
+
+        daily = db.analytics_daily.docs
+        assert day_key(TWO_DAYS_AGO) not in daily
+        assert daily[day_key(YESTERDAY)]["registrations"] == 3
+        assert daily[day_key(TODAY)]["registrations"] == 3
+        totals = db.analytics_totals.docs["totals"]
+        # 3 (hier, reconstruit) + 3 (aujourd'hui, dont l'inscription arrivée pendant la reconstruction)
+        assert totals["registrations"] == 6
+        assert totals["purchases"] == 1 and totals["revenue"] == 49.0
+        assert totals["paid_users"] == 3
+        assert totals["module_completions"] == {"m1": 3, "m2": 1}
+        assert result["registrations"] == -3
+
+    def test_lease_held_elsewhere(self):
+        db = Database(held=True)
+        assert asyncio.run(AnalyticsStore(db).backfill(now=NOW)) is None
+        assert db.analytics_totals.docs == {}
+
+    def test_seeds_counters_never_rebuilt(self):
+        db = Database(users=Source(rows=[{"_id": day_key(YESTERDAY), "n": 2}], count=1))
+        store = AnalyticsStore(db)
+
+        async def scenario():
+            # Incrément en direct avant le premier démarrage avec les compteurs
+            await store.record_registration()
+            first = await store.seed_if_missing()
+            return first, await store.seed_if_missing()
+
+        first, second = asyncio.run(scenario())
+        assert first is not None and second is None
+        totals = db.analytics_totals.docs["totals"]
+        assert totals["registrations"] == 3 and totals["paid_users"] == 1
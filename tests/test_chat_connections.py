@@ -0,0 +1,106 @@
+"""
+Unit Tests for the chat WebSocket registry (backend/chat_connections.py)
+Tests: role-indexed fan-out, per-socket send queues, slow-consumer eviction, server pings and idle close
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from chat_connections import CLOSE_IDLE, CLOSE_SEND_FAILED, CLOSE_SLOW_CONSUMER, ConnectionRegistry
+
+
+class FakeSocket:
+    """Stand-in WebSocket recording sent frames"""
+
+    def __init__(self, delay=0.0, broken=False):
+        self.delay = delay
+        self.broken = broken
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.broken:
+            raise RuntimeError("socket closed")
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+class TestConnectionRegistry:
+    """Connections indexed by user and role, each with its own writer task"""
+
+    def test_admin_fanout_skips_students(self):
+        registry = ConnectionRegistry()
+        admin, student = FakeSocket(), FakeSocket()
+
+        async def scenario():
+            await registry.connect(admin, "admin-1", is_admin=True)
+            await registry.connect(student, "student-1")
+            delivered = await registry.send_to_admins({"type": "new_message"})
+            await asyncio.sleep(0.01)
+            await registry.close_all()
+            return delivered
+
+        assert asyncio.run(scenario()) == 1
+        assert admin.sent == [{"type": "new_message"}]
+        assert student.sent == []
+
+    def test_send_never_waits_for_slow_socket(self):
+        registry = ConnectionRegistry(send_timeout=5, queue_size=2)
+        slow = FakeSocket(delay=1)
+
+        async def scenario():
+            await registry.connect(slow, "student-1")
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for i in range(4):
+                await registry.send_to_user("student-1", {"n": i})
+            elapsed = loop.time() - started
+            await asyncio.sleep(0.01)
+            return elapsed
+
+        elapsed = asyncio.run(scenario())
+        assert elapsed < 0.1
+        # File pleine : le client lent est déconnecté
+        assert slow.closed == CLOSE_SLOW_CONSUMER
+        stats = registry.stats()
+        assert stats["evicted_slow_consumers"] == 1 and stats["connections"] == 0
+
+    def test_failed_socket_is_pruned(self):
+        registry = ConnectionRegistry()
+        ok, broken = FakeSocket(), FakeSocket(broken=True)
+
+        async def scenario():
+            await registry.connect(ok, "student-1")
+            await registry.connect(broken, "student-1")
+            await registry.send_to_user("student-1", {"type": "new_message"})
+            await asyncio.sleep(0.01)
+            await registry.send_to_user("student-1", {"type": "new_message"})
+            await asyncio.sleep(0.01)
+            await registry.close_all()
+
+        asyncio.run(scenario())
+        assert len(ok.sent) == 2
+        assert broken.closed == CLOSE_SEND_FAILED
+        assert registry.stats()["failed_sends"] == 1
+
+    def test_server_ping_then_idle_close(self):
+        registry = ConnectionRegistry(ping_interval=0.02, idle_timeout=0.05)
+        socket = FakeSocket()
+
+        async def scenario():
+            await registry.connect(socket, "student-1")
+            await asyncio.sleep(0.15)
+
+        asyncio.run(scenario())
+        assert {"type": "ping"} in socket.sent
+        assert socket.closed == CLOSE_IDLE
+        assert registry.stats()["closed_idle"] == 1
@@ -0,0 +1,108 @@
+"""
+Unit Tests for keyset-paginated chat history (backend/chat_history.py)
+Tests: latest page, older pages through the before cursor, delta sync since a message id
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from chat_history import fetch_messages
+from pagination import InvalidCursor
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if "$lt" in condition and not doc[field] < condition["$lt"]:
+                return False
+            if "$gt" in condition and not doc[field] > condition["$gt"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class Messages:
+    """In-memory stand-in for db.private_chat_messages"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return Cursor([dict(d) for d in self.docs if matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        found = [d for d in self.docs if matches(d, query)]
+        return dict(found[0]) if found else None
+
+
+def make_db(count=7):
+    # Deux messages par horodatage : l'id départage
+    docs = [
+        {"id": f"m{i:02d}", "conversation_id": "c1", "content": str(i), "created_at": START + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ]
+    docs.append({"id": "other", "conversation_id": "c2", "content": "x", "created_at": START})
+    return type("DB", (), {"private_chat_messages": Messages(docs)})()
+
+
+def ids(messages):
+    return [m["id"] for m in messages]
+
+
+class TestChatHistory:
+    """Messages read by (created_at, id) keyset, oldest first"""
+
+    def test_latest_page_then_older_pages(self):
+        db = make_db()
+
+        async def scenario():
+            latest, headers = await fetch_messages(db, "c1", limit=3)
+            older, older_headers = await fetch_messages(db, "c1", before=headers["X-Before-Cursor"], limit=3)
+            oldest, oldest_headers = await fetch_messages(db, "c1", before=older_headers["X-Before-Cursor"], limit=3)
+            return latest, older, oldest, oldest_headers
+
+        latest, older, oldest, oldest_headers = asyncio.run(scenario())
+        assert ids(latest) == ["m04", "m05", "m06"]
+        assert ids(older) == ["m01", "m02", "m03"]
+        assert ids(oldest) == ["m00"]
+        assert "X-Before-Cursor" not in oldest_headers
+
+    def test_since_returns_only_newer_messages(self):
+        db = make_db()
+        messages, headers = asyncio.run(fetch_messages(db, "c1", since="m04"))
+        assert ids(messages) == ["m05", "m06"]
+
+        after, _ = asyncio.run(fetch_messages(db, "c1", after=headers["X-After-Cursor"]))
+        assert after == []
+
+    def test_since_unknown_message(self):
+        with pytest.raises(InvalidCursor):
+            asyncio.run(fetch_messages(make_db(), "c1", since="other"))
@@ -0,0 +1,196 @@
+"""
+Unit Tests for cross-worker chat fan-out (backend/chat_pubsub.py)
+Tests: local delivery on publish, delivery on other workers, own events not delivered twice,
+tailable cursor reopened after failures and resumed by position
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import AutoReconnect, ServerSelectionTimeoutError
+
+from chat_pubsub import ChatPubSub, InMemoryBackend, MongoCappedBackend
+
+
+class Registry:
+    """Stand-in connection registry recording deliveries"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def send_to_admins(self, message):
+        self.delivered.append(("admins", message))
+
+    async def send_to_user(self, user_id, message):
+        self.delivered.append((user_id, message))
+
+
+class TailableCursor:
+    """Tailable cursor over the fake capped collection, read in natural order"""
+
+    def __init__(self, events):
+        self.events = events
+        self.position = 0
+        # Comme MongoDB : un curseur tailable ouvert sur une collection vide meurt aussitôt
+        self.alive = bool(events.docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        if self.events.interrupt:
+            self.events.interrupt = False
+            self.alive = False
+            raise AutoReconnect("failover")
+        if self.position < len(self.events.docs):
+            self.position += 1
+            return dict(self.events.docs[self.position - 1])
+        # Fin du délai d'attente sans nouvel événement
+        await asyncio.sleep(0.001)
+        raise StopAsyncIteration
+
+
+class CappedEvents:
+    """In-memory capped collection: insertion order, oldest evicted first"""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.interrupt = False
+        self.opened = 0
+
+    def insert(self, _id, **event):
+        self.docs.append({"_id": _id, **event})
+
+    async def find_one(self, query, projection=None, sort=None):
+        if not self.docs:
+            return None
+        if "_id" in query:
+            return next(({"_id": d["_id"]} for d in self.docs if d["_id"] == query["_id"]), None)
+        return {"_id": self.docs[-1]["_id"]}
+
+    def find(self, query, projection=None, cursor_type=None):
+        self.opened += 1
+        return TailableCursor(self)
+
+
+class MongoDatabase:
+    def __init__(self, events, unreachable=0):
+        self.events = events
+        self.unreachable = unreachable
+
+    def __getitem__(self, name):
+        return self.events
+
+    async def create_collection(self, name, **options):
+        if self.unreachable:
+            self.unreachable -= 1
+            raise ServerSelectionTimeoutError("mongo unreachable")
+
+
+async def until(predicate, timeout=1.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.001)
+
+
+class TestMongoCappedBackend:
+    """Subscriber survives Mongo outages and resumes after the last delivered event"""
+
+    def run_backend(self, db, scenario):
+        backend = MongoCappedBackend(db, retry_interval=0.001)
+        received = []
+
+        async def handler(event):
+            received.append(event["n"])
+
+        async def main():
+            task = asyncio.get_running_loop().create_task(backend.run(handler))
+            try:
+                await scenario(received)
+                # L'abonné n'est pas mort en route
+                assert not task.done()
+            finally:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        asyncio.run(main())
+        return received
+
+    def test_reopens_and_resumes_by_position(self):
+        # Identifiants volontairement non ordonnés : ObjectId produits par d'autres processus
+        events = CappedEvents([{"_id": "m", "n": 0}])
+        db = MongoDatabase(events, unreachable=2)
+
+        async def scenario(received):
+            await until(lambda: events.opened >= 1)
+            events.insert("z", n=1)
+            await until(lambda: received == [1])
+            events.interrupt = True
+            await until(lambda: events.opened >= 2)
+            events.insert("a", n=2)
+            events.insert("b", n=3)
+            await until(lambda: received == [1, 2, 3])
+
+        # Mongo injoignable au démarrage, événement antérieur au démarrage non livré, rien en double
+        assert self.run_backend(db, scenario) == [1, 2, 3]
+
+    def test_resumes_when_last_event_was_evicted(self):
+        events = CappedEvents()
+        db = MongoDatabase(events)
+
+        async def scenario(received):
+            await until(lambda: events.opened >= 1)
+            events.insert("z", n=1)
+            await until(lambda: received == [1])
+            events.interrupt = True
+            await until(lambda: events.opened >= 2)
+            # Collection plafonnée pleine pendant la coupure : "z" évincé
+            events.docs = [{"_id": "a", "n": 2}, {"_id": "b", "n": 3}]
+            await until(lambda: received == [1, 2, 3])
+
+        assert self.run_backend(db, scenario) == [1, 2, 3]
+
+
+class TestChatPubSub:
+    """Each worker subscribes once and delivers events to its own sockets"""
+
+    def test_events_reach_every_worker_once(self):
+        backend = InMemoryBackend()
+        registry_a, registry_b = Registry(), Registry()
+        worker_a, worker_b = ChatPubSub(backend, registry_a), ChatPubSub(backend, registry_b)
+
+        async def scenario():
+            worker_a.start()
+            worker_b.start()
+            await asyncio.sleep(0)
+            await worker_a.publish_to_admins({"type": "new_message"})
+            await worker_b.publish_to_user("student-1", {"type": "new_message"})
+            await asyncio.sleep(0.01)
+            await worker_a.stop()
+            await worker_b.stop()
+
+        asyncio.run(scenario())
+        expected = [("admins", {"type": "new_message"}), ("student-1", {"type": "new_message"})]
+        # Les événements locaux sont livrés avant ceux reçus des autres workers
+        assert sorted(registry_a.delivered, key=str) == expected
+        assert sorted(registry_b.delivered, key=str) == expected
+        assert worker_a.stats()["received"] == 1 and worker_b.stats()["received"] == 1
+
+    def test_publish_failure_still_delivers_locally(self):
+        class BrokenBackend(InMemoryBackend):
+            async def publish(self, event):
+                raise ConnectionError("mongo unavailable")
+
+        registry = Registry()
+        worker = ChatPubSub(BrokenBackend(), registry)
+        asyncio.run(worker.publish_to_user("student-1", {"type": "new_message"}))
+        assert registry.delivered == [("student-1", {"type": "new_message"})]
+        assert worker.stats()["publish_errors"] == 1
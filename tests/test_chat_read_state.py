@@ -0,0 +1,89 @@
+"""
+Unit Tests for chat read watermarks (backend/chat_read_state.py)
+Tests: one conditional write per open returning the cleared count, no write when caught up, is_read derived from the watermark
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from chat_read_state import annotate_read, last_message_field, mark_read
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Conversations:
+    """In-memory stand-in for db.private_conversations recording updates"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.updates = []
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        self.updates.append((query, update))
+        matched = all(
+            self._get(field) == value for field, value in query.items()
+        )
+        if not matched:
+            return None
+        before = dict(self.doc)
+        self.doc.update(update["$set"])
+        return before
+
+    def _get(self, path):
+        value = self.doc
+        for part in path.split("."):
+            value = (value or {}).get(part)
+        return value
+
+
+def message(msg_id, minutes, sender):
+    return {"id": msg_id, "created_at": START + timedelta(minutes=minutes), "sender_type": sender}
+
+
+def make_conversation():
+    conversation = {"id": "c1", "unread_by_admin": 2, **last_message_field(message("m2", 2, "student"))}
+    return conversation, SimpleNamespace(private_conversations=Conversations(dict(conversation)))
+
+
+class TestReadWatermark:
+    """Read state kept on the conversation, messages untouched"""
+
+    def test_open_writes_once_then_never(self):
+        conversation, db = make_conversation()
+
+        async def scenario():
+            first = await mark_read(db, conversation, "admin")
+            second = await mark_read(db, {**conversation, **db.private_conversations.doc}, "admin")
+            return first, second
+
+        assert asyncio.run(scenario()) == (2, 0)
+        assert len(db.private_conversations.updates) == 1
+        stored = db.private_conversations.doc
+        assert stored["unread_by_admin"] == 0
+        assert stored["read_by_admin"]["message_id"] == "m2"
+
+    def test_message_arriving_during_open_keeps_counter(self):
+        conversation, db = make_conversation()
+        # Un nouveau message de l'élève arrive entre la lecture et l'écriture
+        db.private_conversations.doc.update(last_message_field(message("m3", 3, "student")), unread_by_admin=3)
+
+        assert asyncio.run(mark_read(db, conversation, "admin")) == 0
+        assert db.private_conversations.doc["unread_by_admin"] == 3
+
+    def test_is_read_derived_from_recipient_watermark(self):
+        conversation = {
+            "read_by_admin": {"message_id": "m2", "created_at": START + timedelta(minutes=2)},
+            "read_by_student": None,
+        }
+        messages = [
+            message("m1", 1, "student"),
+            message("m2", 2, "student"),
+            message("m3", 3, "student"),
+            {**message("a1", 2, "admin"), "is_read": True},
+        ]
+        annotated = annotate_read(messages, conversation)
+        assert [m["is_read"] for m in annotated] == [True, True, False, True]
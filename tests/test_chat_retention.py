@@ -0,0 +1,191 @@
+"""
+Unit Tests for the chat retention job (backend/chat_retention.py)
+Tests: monthly gzip NDJSON archives appended per batch, expired messages archived before deletion,
+run stopped when the lease is lost, no deletion without an archive directory,
+unread counters discounted for purged unread messages
+"""
+import asyncio
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import DuplicateKeyError
+
+from chat_retention import ChatRetentionJob, write_archive
+
+NOW = datetime.now(timezone.utc)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        self.docs.sort(key=lambda d: tuple(d[field] for field, _ in keys))
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs[:length]]
+
+
+class Messages:
+    """In-memory stand-in for db.private_chat_messages"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.deletes = 0
+
+    def find(self, query):
+        cutoff = query["created_at"]["$lt"]
+        return Cursor([d for d in self.docs if d["created_at"] < cutoff])
+
+    async def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] not in ids]
+        self.deletes += 1
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+
+class Conversations:
+    """In-memory stand-in for db.private_conversations (unread counter updates)"""
+
+    def __init__(self, docs=()):
+        self.docs = {d["id"]: d for d in docs}
+
+    def find(self, query, projection=None):
+        async def rows():
+            for conversation_id in query["id"]["$in"]:
+                if conversation_id in self.docs:
+                    yield dict(self.docs[conversation_id])
+        return rows()
+
+    async def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            doc = self.docs[op._filter["id"]]
+            for field, expr in op._doc[0]["$set"].items():
+                # $max(0, compteur - n)
+                doc[field] = max(0, doc.get(field, 0) - expr["$max"][1]["$subtract"][1])
+
+
+class UnreadCounter:
+    def __init__(self, total):
+        self.total = total
+
+    async def decrement(self, count):
+        self.total = max(0, self.total - count)
+        return self.total
+
+
+class JobState:
+    def __init__(self, lost_after=None):
+        # Nombre d'acquisitions réussies avant qu'un autre worker reprenne le bail
+        self.lost_after = lost_after
+        self.acquired = 0
+
+    async def find_one_and_update(self, *args, **kwargs):
+        if self.lost_after is not None and self.acquired >= self.lost_after:
+            raise DuplicateKeyError("lease held")
+        self.acquired += 1
+        return {}
+
+    async def update_one(self, *args, **kwargs):
+        return None
+
+
+def read_archive(path):
+    with gzip.open(path, "rb") as archive:
+        return [json.loads(line) for line in archive.read().splitlines()]
+
+
+class TestChatRetention:
+    """Expired messages go to compressed monthly archives, then out of MongoDB"""
+
+    def test_archive_appends_gzip_members(self, tmp_path):
+        january = datetime(2024, 1, 15, tzinfo=timezone.utc)
+        write_archive(tmp_path, [{"id": "m1", "created_at": january}])
+        written = write_archive(tmp_path, [
+            {"id": "m2", "created_at": january},
+            {"id": "m3", "created_at": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+        ])
+
+        assert written == {"chat-messages-2024-01.ndjson.gz": 1, "chat-messages-2024-02.ndjson.gz": 1}
+        assert [m["id"] for m in read_archive(tmp_path / "chat-messages-2024-01.ndjson.gz")] == ["m1", "m2"]
+
+    def test_run_archives_then_deletes_in_batches(self, tmp_path):
+        old = [
+            {"_id": i, "id": f"m{i}", "conversation_id": "c1", "created_at": NOW - timedelta(days=40, minutes=i)}
+            for i in range(5)
+        ]
+        recent = {"_id": 99, "id": "recent", "conversation_id": "c1", "created_at": NOW}
+        messages = Messages(old + [recent])
+        db = SimpleNamespace(private_chat_messages=messages, private_conversations=Conversations(), job_state=JobState())
+        job = ChatRetentionJob(db, tmp_path, retention_days=30, batch_size=2, max_per_second=10000)
+
+        assert asyncio.run(job.run_once()) == 5
+        assert [d["id"] for d in messages.docs] == ["recent"]
+        assert messages.deletes == 3
+
+        archived = [m for path in tmp_path.iterdir() for m in read_archive(path)]
+        assert sorted(m["id"] for m in archived) == [f"m{i}" for i in range(5)]
+        assert "_id" not in archived[0]
+        assert job.stats()["archived"] == 5
+
+    def test_stops_when_lease_is_lost(self, tmp_path):
+        old = [
+            {"_id": i, "id": f"m{i}", "conversation_id": "c1", "created_at": NOW - timedelta(days=40, minutes=i)}
+            for i in range(5)
+        ]
+        messages = Messages(old)
+        db = SimpleNamespace(private_chat_messages=messages, private_conversations=Conversations(), job_state=JobState(lost_after=1))
+        job = ChatRetentionJob(db, tmp_path, retention_days=30, batch_size=2, max_per_second=10000)
+
+        # Bail perdu après le premier lot : le worker qui l'a repris traitera la suite
+        assert asyncio.run(job.run_once()) == 2
+        assert len(messages.docs) == 3 and messages.deletes == 1
+
+    def test_refuses_to_delete_without_archive_dir(self):
+        messages = Messages([{"_id": 1, "id": "m1", "conversation_id": "c1", "created_at": NOW - timedelta(days=40)}])
+        db = SimpleNamespace(private_chat_messages=messages, private_conversations=Conversations(), job_state=JobState())
+        job = ChatRetentionJob(db, None)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(job.run_once())
+        assert len(messages.docs) == 1
+        assert job.stats()["enabled"] is False
+
+    def test_purged_unread_messages_leave_the_counters(self, tmp_path):
+        def message(i, sender_type, days):
+            return {"_id": i, "id": f"m{i}", "conversation_id": "c1", "sender_type": sender_type,
+                    "created_at": NOW - timedelta(days=days)}
+
+        messages = Messages([
+            message(1, "student", 50),  # lu par les admins (sous le filigrane)
+            message(2, "student", 45),  # non lu, purgé
+            message(3, "admin", 44),    # non lu par l'élève, purgé
+            message(4, "student", 1),   # non lu, conservé
+        ])
+        conversation = {
+            "id": "c1", "unread_by_admin": 2, "unread_by_student": 1,
+            "read_by_admin": {"message_id": "m1", "created_at": NOW - timedelta(days=50)},
+            "read_by_student": {"message_id": "m0", "created_at": NOW - timedelta(days=60)},
+        }
+        conversations = Conversations([conversation])
+        unread = UnreadCounter(total=2)
+        db = SimpleNamespace(private_chat_messages=messages, private_conversations=conversations, job_state=JobState())
+        job = ChatRetentionJob(db, tmp_path, retention_days=30, max_per_second=10000, unread_counter=unread)
+
+        assert asyncio.run(job.run_once()) == 3
+        assert conversation["unread_by_admin"] == 1 and conversation["unread_by_student"] == 0
+        assert unread.total == 1
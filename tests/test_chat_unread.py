@@ -0,0 +1,147 @@
+"""
+Unit Tests for the admin unread counter (backend/chat_unread.py)
+Tests: O(1) total from the counter document, clamped decrements, reconciliation of drift,
+concurrent increments not overwritten by reconciliation, reconciliation lease
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import DuplicateKeyError
+
+from chat_unread import AdminUnreadCounter
+
+
+class Counters:
+    """In-memory stand-in for db.chat_counters (single document)"""
+
+    def __init__(self):
+        self.doc = None
+
+    async def find_one(self, query, projection=None):
+        return dict(self.doc) if self.doc else None
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        before = dict(self.doc) if self.doc else None
+        doc = self.doc or {"_id": query["_id"]}
+        if isinstance(update, list):
+            # Pipeline de decrement : $max(0, total - n)
+            expr = update[0]["$set"]["total"]["$max"][1]["$subtract"]
+            doc["total"] = max(0, (doc.get("total") or 0) - expr[1])
+        elif "$inc" in update:
+            doc["total"] = doc.get("total", 0) + update["$inc"]["total"]
+        else:
+            doc.update(update["$set"])
+        self.doc = doc
+        return before if return_document is False else dict(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        # Filtre {"total": n} : None correspond aussi à un champ absent, comme MongoDB
+        if self.doc is not None and self.doc.get("total") == query["total"]:
+            self.doc.update(update["$set"])
+            return SimpleNamespace(matched_count=1)
+        if upsert:
+            if self.doc is not None:
+                raise DuplicateKeyError("duplicate _id")
+            self.doc = {"_id": query["_id"], **update["$set"]}
+        return SimpleNamespace(matched_count=0)
+
+
+class Conversations:
+    def __init__(self, unread, on_aggregate=None):
+        self.unread = unread
+        self.on_aggregate = on_aggregate
+
+    def aggregate(self, pipeline):
+        total = sum(self.unread)
+        if self.on_aggregate:
+            self.on_aggregate()
+
+        class Cursor:
+            async def to_list(self, length):
+                return [{"_id": None, "total": total}] if total else []
+
+        return Cursor()
+
+
+class JobState:
+    def __init__(self, held=False):
+        self.held = held
+
+    async def find_one_and_update(self, *args, **kwargs):
+        if self.held:
+            raise DuplicateKeyError("lease held")
+        return {}
+
+    async def update_one(self, *args, **kwargs):
+        return None
+
+
+def make_counter(unread=(), held=False):
+    db = SimpleNamespace(chat_counters=Counters(), private_conversations=Conversations(list(unread)),
+                         job_state=JobState(held))
+    return AdminUnreadCounter(db), db
+
+
+class TestAdminUnreadCounter:
+    """A single counter document replaces the $group on every badge refresh"""
+
+    def test_increment_and_decrement_return_new_total(self):
+        counter, _ = make_counter()
+
+        async def scenario():
+            assert await counter.total() == 0
+            await counter.increment()
+            assert await counter.increment(2) == 3
+            assert await counter.decrement(2) == 1
+            # Jamais négatif, même si le compteur a dérivé
+            assert await counter.decrement(5) == 0
+            return await counter.total()
+
+        assert asyncio.run(scenario()) == 0
+
+    def test_reconcile_corrects_drift(self):
+        counter, db = make_counter(unread=[2, 0, 3])
+
+        async def scenario():
+            await counter.increment(4)
+            drift = await counter.reconcile()
+            return drift, await counter.total()
+
+        assert asyncio.run(scenario()) == (1, 5)
+        assert counter.stats()["corrected_drift"] == 1
+        assert db.chat_counters.doc["reconciled_at"] is not None
+
+    def test_reconcile_creates_missing_counter(self):
+        counter, db = make_counter(unread=[2])
+
+        assert asyncio.run(counter.reconcile()) == 2
+        assert db.chat_counters.doc["total"] == 2
+
+    def test_concurrent_increment_is_not_overwritten(self):
+        counter, db = make_counter(unread=[2])
+        db.chat_counters.doc = {"_id": "admin_unread", "total": 2}
+        pending = [True]
+
+        def student_message():
+            # Message d'élève arrivé après la lecture de l'agrégat : conversation puis compteur
+            if pending:
+                pending.pop()
+                db.private_conversations.unread.append(1)
+                db.chat_counters.doc["total"] += 1
+
+        db.private_conversations.on_aggregate = student_message
+
+        assert asyncio.run(counter.reconcile()) == 0
+        # Le premier calcul (2) aurait effacé l'increment ; le second tient compte du message
+        assert db.chat_counters.doc["total"] == 3
+        assert counter.stats()["conflicts"] == 1
+
+    def test_lease_held_elsewhere(self):
+        counter, db = make_counter(unread=[2], held=True)
+
+        assert asyncio.run(counter.reconcile()) is None
+        assert db.chat_counters.doc is None
@@ -0,0 +1,66 @@
+"""
+Unit Tests for the index registry (backend/db_indexes.py)
+Tests: a failing index no longer blocks the rest of its collection, failures and missing indexes are reported
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import OperationFailure
+
+import db_indexes
+from db_indexes import ensure_indexes, missing_indexes
+
+
+class Collection:
+    """In-memory stand-in for a collection refusing some index names"""
+
+    def __init__(self, refused=()):
+        self.refused = set(refused)
+        self.indexes = {"_id_": {}}
+
+    async def create_indexes(self, indexes):
+        names = [index.document["name"] for index in indexes]
+        # Tout-ou-rien comme MongoDB
+        if self.refused & set(names):
+            raise OperationFailure("E11000 duplicate key error")
+        self.indexes.update({name: {} for name in names})
+        return names
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+
+class Database(dict):
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
+
+
+class TestEnsureIndexes:
+    """Indexes applied per collection, falling back to one at a time"""
+
+    def test_bad_index_only_skips_itself(self):
+        db = Database(pre_registration_questionnaires=Collection(refused={"email_unique"}))
+
+        report = asyncio.run(ensure_indexes(db))
+
+        declared = [index.document["name"] for index in db_indexes.INDEXES["pre_registration_questionnaires"]]
+        created = report["created"]["pre_registration_questionnaires"]
+        assert "email_unique" not in created
+        assert sorted(created) == sorted(name for name in declared if name != "email_unique")
+        assert list(report["failed"]) == ["pre_registration_questionnaires"]
+        assert "duplicate key" in report["failed"]["pre_registration_questionnaires"]["email_unique"]
+        # Les autres collections sont créées en un seul appel
+        assert report["created"]["users"]
+
+    def test_missing_indexes_reports_declared_but_absent(self):
+        db = Database(pre_registration_questionnaires=Collection(refused={"email_unique"}))
+
+        async def scenario():
+            await ensure_indexes(db)
+            return await missing_indexes(db)
+
+        assert asyncio.run(scenario()) == {"pre_registration_questionnaires": ["email_unique"]}
@@ -0,0 +1,54 @@
+"""
+Unit Tests for the orjson response layer (backend/fast_json.py)
+Tests: same JSON as the default FastAPI path, projection and default filling
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fast_json import TrustedProjection, dumps, fast_response
+
+
+class Item(BaseModel):
+    id: str
+    title: str
+    order_index: int
+    is_free: bool = False
+    tags: List[str] = []
+    video_url: Optional[str] = None
+    created_at: datetime
+
+
+class TestFastJson:
+    """Fast path must produce the same payload as response_model validation"""
+
+    def test_matches_validated_output(self):
+        docs = [{"id": "m1", "title": "Freinage", "order_index": 1, "created_at": datetime(2024, 5, 1, 8, 30, tzinfo=timezone.utc)}]
+        expected = jsonable_encoder(TypeAdapter(List[Item]).validate_python(docs))
+        projection = TrustedProjection(Item)
+        assert json.loads(dumps(projection.prepare_many(docs))) == expected
+
+    def test_projection_lists_model_fields(self):
+        projection = TrustedProjection(Item, exclude=["tags"])
+        assert projection.projection["_id"] == 0
+        assert "title" in projection.projection
+        assert "tags" not in projection.projection
+
+    def test_mutable_defaults_are_not_shared(self):
+        projection = TrustedProjection(Item)
+        first, second = projection.prepare({}), projection.prepare({})
+        first["tags"].append("x")
+        assert second["tags"] == []
+
+    def test_response_serializes_nested_models(self):
+        item = Item(id="m1", title="Moteur", order_index=2, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        response = fast_response({"items": [item]})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body)["items"][0]["created_at"] == "2024-01-01T00:00:00Z"
@@ -0,0 +1,120 @@
+"""
+Unit Tests for the versioned module catalog (backend/module_catalog.py)
+Tests: derived lookups, reload on shared version bump, no reload while version is unchanged,
+duplicate order_index and published filter matching the former queries
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from module_catalog import ModuleCatalog
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs]
+
+
+class ModulesCollection:
+    """In-memory stand-in for db.modules"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        return _Cursor(self.docs)
+
+
+class VersionsCollection:
+    """In-memory stand-in for db.cache_versions"""
+
+    def __init__(self):
+        self.version = 0
+
+    async def find_one(self, query):
+        return {"_id": query["_id"], "version": self.version}
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        self.version += update["$inc"]["version"]
+        return {"_id": query["_id"], "version": self.version}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+MODULES = [
+    {"id": "m2", "title": "Freinage", "order_index": 2, "is_free": False},
+    {"id": "m1", "title": "Introduction", "order_index": 1, "is_free": True},
+]
+
+
+class TestModuleCatalog:
+    """Process-wide catalog invalidated by a shared version document"""
+
+    def test_lookups(self):
+        catalog = ModuleCatalog(ModulesCollection(list(MODULES)), VersionsCollection())
+        snapshot = run(catalog.get())
+        assert [m["id"] for m in snapshot.modules] == ["m1", "m2"]
+        assert snapshot.by_order[2]["id"] == "m2"
+        assert snapshot.by_id["m1"]["is_free"] is True
+        assert [m["id"] for m in snapshot.free] == ["m1"]
+        assert snapshot.total == 2
+
+    def test_duplicate_order_and_published_filter(self):
+        modules = [
+            {"id": "m1", "order_index": 1, "is_published": True},
+            {"id": "m1-bis", "order_index": 1, "is_published": False},
+            {"id": "m2", "order_index": 2},
+        ]
+        # prepare complète is_published par défaut, comme TrustedProjection(Module)
+        prepare = lambda m: {"is_published": True, **m}
+        snapshot = run(ModuleCatalog(ModulesCollection(modules), VersionsCollection(), prepare=prepare).get())
+
+        assert snapshot.by_order[1]["id"] == "m1"
+        # Sans is_published : non publié, comme le filtre {"is_published": True}
+        assert [m["id"] for m in snapshot.published] == ["m1"]
+
+    def test_reload_only_when_version_changes(self):
+        modules = ModulesCollection(list(MODULES))
+        versions = VersionsCollection()
+        catalog = ModuleCatalog(modules, versions, check_interval=0)
+
+        async def scenario():
+            await catalog.get()
+            await catalog.get()
+            assert modules.finds == 1
+
+            # Another worker edits the course and bumps the shared version
+            modules.docs.append({"id": "m3", "title": "Moteur", "order_index": 3, "is_free": False})
+            versions.version += 1
+            snapshot = await catalog.get()
+            assert modules.finds == 2
+            assert snapshot.total == 3
+
+        run(scenario())
+
+    def test_bump_reloads_locally(self):
+        modules = ModulesCollection(list(MODULES))
+        catalog = ModuleCatalog(modules, VersionsCollection())
+
+        async def scenario():
+            await catalog.get()
+            modules.docs.pop()
+            assert await catalog.bump() == 1
+            snapshot = await catalog.get()
+            assert snapshot.total == 1
+            assert snapshot.version == 1
+
+        run(scenario())
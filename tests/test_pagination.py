@@ -0,0 +1,52 @@
+"""
+Unit Tests for keyset pagination cursors (backend/pagination.py)
+Tests: cursor round trip with datetimes, keyset filter shape, invalid cursors, operator injection rejected
+"""
+import base64
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+
+class TestPagination:
+    """Opaque cursors for created_at/id ordered lists"""
+
+    def test_round_trip(self):
+        created_at = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+        cursor = encode_cursor({"created_at": created_at, "id": "u-42"})
+        assert decode_cursor(cursor) == {"created_at": created_at, "id": "u-42"}
+
+    def test_keyset_filter_descending(self):
+        created_at = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        query = keyset_filter([("created_at", -1), ("id", -1)], {"created_at": created_at, "id": "u-42"})
+        assert query == {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": "u-42"}},
+        ]}
+
+    def test_invalid_cursor(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not a cursor")
+        with pytest.raises(InvalidCursor):
+            keyset_filter([("created_at", -1), ("id", -1)], decode_cursor(encode_cursor({"id": "u-1"})))
+
+    def test_forged_operator_values_rejected(self):
+        """A cursor carrying Mongo operators must never reach keyset_filter"""
+        def forge(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+        for payload in (
+            {"created_at": {"$ne": None}, "id": "u-1"},
+            {"created_at": {"$date": "2024-03-01T00:00:00+00:00", "$ne": None}, "id": "u-1"},
+            {"created_at": {"$date": {"$gt": ""}}, "id": "u-1"},
+            {"created_at": ["2024-03-01"], "id": "u-1"},
+        ):
+            with pytest.raises(InvalidCursor):
+                decode_cursor(forge(payload))
@@ -0,0 +1,61 @@
+"""
+Unit Tests for the bcrypt pool (backend/password_service.py)
+Tests: hash/verify round trip and rehash, bounded queue saturation, failed operations counted apart
+"""
+import asyncio
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from password_service import PasswordQueueSaturated, PasswordService
+
+
+class TestPasswordService:
+    """bcrypt off the event loop, with a bounded number of pending operations"""
+
+    def test_hash_verify_and_rehash_outdated_cost(self):
+        old, current = PasswordService(rounds=4), PasswordService(rounds=5)
+
+        async def scenario():
+            hashed = await old.hash("secret")
+            return await old.verify("secret", hashed), await old.verify("wrong", hashed), await current.verify("secret", hashed)
+
+        same_cost, wrong, outdated = asyncio.run(scenario())
+        assert same_cost == (True, None)
+        assert wrong == (False, None)
+        assert outdated[0] is True and outdated[1].startswith("$2b$05$")
+        assert current.stats()["rehashed"] == 1
+        assert old.stats()["completed"] == 3
+
+    def test_saturated_queue_rejects_instead_of_queueing(self):
+        service = PasswordService(max_workers=1, max_pending=2, rounds=4)
+        release = threading.Event()
+        service.pwd_context = SimpleNamespace(hash=lambda password: release.wait(5) and "hashed")
+
+        async def scenario():
+            pending = [asyncio.ensure_future(service.hash("secret")) for _ in range(2)]
+            await asyncio.sleep(0)
+            assert service.stats()["queue_depth"] == 2
+            with pytest.raises(PasswordQueueSaturated):
+                await service.hash("secret")
+            release.set()
+            return await asyncio.gather(*pending)
+
+        assert asyncio.run(scenario()) == ["hashed", "hashed"]
+        stats = service.stats()
+        assert stats["rejected"] == 1 and stats["completed"] == 2 and stats["queue_depth"] == 0
+        service.shutdown()
+
+    def test_failed_operation_not_counted_as_completed(self):
+        service = PasswordService(rounds=4)
+
+        with pytest.raises(ValueError):
+            asyncio.run(service.verify("secret", "not-a-bcrypt-hash"))
+
+        stats = service.stats()
+        assert stats["failed"] == 1 and stats["completed"] == 0 and stats["queue_depth"] == 0
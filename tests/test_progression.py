@@ -0,0 +1,45 @@
+"""
+Unit Tests for the sequential progression gate (backend/progression.py)
+Tests: free/purchase rules, previous module completion, previous quiz pass
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from progression import ProgressionState, compute_access
+
+
+MODULES = [
+    {"id": "m1", "title": "Introduction", "order_index": 1, "is_free": True},
+    {"id": "m2", "title": "Freinage", "order_index": 2, "is_free": False},
+    {"id": "m3", "title": "Moteur", "order_index": 3, "is_free": False},
+]
+BY_ORDER = {m["order_index"]: m for m in MODULES}
+QUIZZES = {"m2": "q2"}
+
+
+class TestProgressionGate:
+    """Access for the whole course computed from one progression state"""
+
+    def test_not_purchased(self):
+        access = compute_access(MODULES, BY_ORDER, False, ProgressionState(set(), set(), QUIZZES))
+        assert access["m1"] == {"can_access": True, "reason": "free_module"}
+        assert access["m2"]["reason"] == "purchase_required"
+
+    def test_previous_module_not_completed(self):
+        access = compute_access(MODULES, BY_ORDER, True, ProgressionState(set(), set(), QUIZZES))
+        assert access["m2"] == {
+            "can_access": False,
+            "reason": "previous_module_not_completed",
+            "required_module": "Introduction",
+        }
+
+    def test_previous_quiz_required(self):
+        state = ProgressionState({"m1", "m2"}, set(), QUIZZES)
+        access = compute_access(MODULES, BY_ORDER, True, state)
+        assert access["m2"]["reason"] == "prerequisites_met"
+        assert access["m3"]["reason"] == "previous_quiz_not_passed"
+
+        state.passed_quizzes.add("q2")
+        assert compute_access(MODULES, BY_ORDER, True, state)["m3"]["can_access"] is True
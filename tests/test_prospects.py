@@ -0,0 +1,176 @@
+"""
+Unit Tests for the prospects admin list (backend/prospects.py, backend/csv_export.py)
+Tests: server-side filter, indexed status counts, streamed CSV export with formula injection neutralized,
+dedupe by email
+"""
+import asyncio
+import csv
+import io
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import prospects
+from csv_export import csv_cell
+from prospects import CSV_COLUMNS, dedupe, export_prospects_csv, prospect_filter, status_counts
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys, direction=None):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: d.get(field), reverse=order < 0)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs]
+
+
+class Questionnaires:
+    """In-memory stand-in for db.pre_registration_questionnaires"""
+
+    def __init__(self, docs):
+        self.docs = [dict(d) for d in docs]
+        self.dropped = []
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        docs = self.docs
+        if "_id" in query:
+            docs = [d for d in docs if d["_id"] in query["_id"]["$in"]]
+        if "email" in query:
+            docs = [d for d in docs if any(c.isupper() for c in d["email"])]
+        return Cursor(list(docs))
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        groups = {}
+        for doc in self.docs:
+            groups.setdefault(doc["email"].lower(), []).append(doc["_id"])
+        return Cursor([{"_id": email, "ids": ids, "n": len(ids)} for email, ids in groups.items() if len(ids) > 1])
+
+    async def count_documents(self, query):
+        statuses = query["callback_status"]
+        statuses = statuses["$in"] if isinstance(statuses, dict) else [statuses]
+        return sum(1 for d in self.docs if d.get("callback_status") in statuses)
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                doc.update(update["$set"])
+
+    async def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] not in query["_id"]["$in"]]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def index_information(self):
+        return {"_id_": {}, "email": {}}
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+
+
+def read_csv(chunks):
+    text = b"".join(chunks).decode("utf-8").lstrip("\ufeff")
+    return list(csv.reader(io.StringIO(text), delimiter=";"))
+
+
+async def collect(generator):
+    return [chunk async for chunk in generator]
+
+
+class TestProspectFilter:
+    """Callback status and period filters"""
+
+    def test_pending_includes_legacy_questionnaires(self):
+        assert prospect_filter("pending") == {"callback_status": {"$in": ["pending", None]}}
+        assert prospect_filter("called") == {"callback_status": "called"}
+
+    def test_naive_dates_are_utc(self):
+        query = prospect_filter(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 2, 1, tzinfo=timezone.utc))
+        assert query == {"created_at": {"$gte": START, "$lt": datetime(2024, 2, 1, tzinfo=timezone.utc)}}
+
+
+class TestStatusCounts:
+    """One indexed count per callback status, legacy questionnaires counted as pending"""
+
+    def test_counts(self):
+        collection = Questionnaires([
+            {"_id": 1, "email": "a@example.com"},
+            {"_id": 2, "email": "b@example.com", "callback_status": "pending"},
+            {"_id": 3, "email": "c@example.com", "callback_status": "called"},
+        ])
+        counts = asyncio.run(status_counts(SimpleNamespace(pre_registration_questionnaires=collection)))
+
+        assert counts["pending"] == 2 and counts["called"] == 1 and counts["converted"] == 0
+
+
+class TestExport:
+    """CSV streamed in batches, safe to open in a spreadsheet"""
+
+    def test_formula_cells_are_neutralized(self):
+        assert csv_cell("=HYPERLINK(\"http://x\")") == "'=HYPERLINK(\"http://x\")"
+        for value in ("+33 6", "-1", "@SUM(A1)", "\tx", "\rx"):
+            assert csv_cell(value).startswith("'")
+        assert csv_cell("Jean Dupont") == "Jean Dupont"
+        assert csv_cell(-5) == -5
+        assert csv_cell(None) == ""
+        assert csv_cell(START) == START.isoformat()
+
+    def test_export_streams_rows_in_batches(self, monkeypatch):
+        monkeypatch.setattr(prospects, "EXPORT_BATCH_SIZE", 2)
+        docs = [
+            {"id": f"p{i}", "created_at": START + timedelta(days=i), "full_name": f"Prospect {i}", "email": f"p{i}@example.com"}
+            for i in range(3)
+        ]
+        docs[0]["full_name"] = "=cmd|' /C calc'!A0"
+        db = SimpleNamespace(pre_registration_questionnaires=Questionnaires(docs))
+
+        chunks = asyncio.run(collect(export_prospects_csv(db, {})))
+
+        # En-tête, un lot de 2, le reste
+        assert len(chunks) == 3
+        rows = read_csv(chunks)
+        assert rows[0] == CSV_COLUMNS
+        assert [row[0] for row in rows[1:]] == ["p2", "p1", "p0"]
+        assert rows[3][CSV_COLUMNS.index("full_name")] == "'=cmd|' /C calc'!A0"
+
+
+class TestDedupe:
+    """Duplicates merged by lower-cased email, callback follow-up kept"""
+
+    def test_keeps_latest_and_carries_callback(self):
+        collection = Questionnaires([
+            {"_id": 1, "email": "Eleve@Example.com", "created_at": START, "callback_status": "called",
+             "callback_notes": "Rappeler lundi", "callback_updated_at": START + timedelta(days=1)},
+            {"_id": 2, "email": "eleve@example.com", "created_at": START + timedelta(days=2), "callback_status": "pending"},
+            {"_id": 3, "email": "Autre@Example.com", "created_at": START},
+        ])
+        db = SimpleNamespace(pre_registration_questionnaires=collection)
+
+        assert asyncio.run(dedupe(db)) == 1
+
+        docs = {d["_id"]: d for d in collection.docs}
+        assert set(docs) == {2, 3}
+        assert docs[2]["callback_status"] == "called" and docs[2]["callback_notes"] == "Rappeler lundi"
+        assert docs[3]["email"] == "autre@example.com"
+        assert collection.dropped == ["email"]
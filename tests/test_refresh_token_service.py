@@ -0,0 +1,111 @@
+"""
+Unit Tests for rotating refresh tokens (backend/refresh_token_service.py)
+Tests: rotation within a family, reuse revoking the family, expiry, concurrent refresh grace window
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from refresh_token_service import RefreshTokenError, RefreshTokenService, _hash_token
+
+
+class Tokens:
+    """In-memory stand-in for db.refresh_tokens (equality filters only)"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _match(self, doc, query):
+        return all(doc.get(field) == value for field, value in query.items())
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        return next((dict(doc) for doc in self.docs if self._match(doc, query)), None)
+
+    async def find_one_and_update(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                before = dict(doc)
+                doc.update(update["$set"])
+                return before
+        return None
+
+    async def update_many(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(update["$set"])
+
+    def by_token(self, raw_token):
+        return next(doc for doc in self.docs if doc["token_hash"] == _hash_token(raw_token))
+
+
+def rotate_error(service, raw_token):
+    with pytest.raises(RefreshTokenError) as excinfo:
+        asyncio.run(service.rotate(raw_token))
+    return excinfo.value.reason
+
+
+class TestRefreshTokenRotation:
+    """Each refresh consumes the token and issues its successor in the same family"""
+
+    def test_rotation_issues_successor_in_family(self):
+        tokens = Tokens()
+        service = RefreshTokenService(tokens)
+        first = asyncio.run(service.issue("u1"))
+
+        user_id, second = asyncio.run(service.rotate(first))
+
+        assert user_id == "u1" and second != first
+        assert tokens.by_token(first)["used_at"] is not None
+        assert tokens.by_token(second)["family_id"] == tokens.by_token(first)["family_id"]
+        assert asyncio.run(service.rotate(second))[0] == "u1"
+
+    def test_unknown_token_is_invalid(self):
+        assert rotate_error(RefreshTokenService(Tokens()), "unknown") == "invalid"
+
+    def test_reuse_after_grace_revokes_family(self):
+        tokens = Tokens()
+        service = RefreshTokenService(tokens, reuse_grace_seconds=10)
+        first = asyncio.run(service.issue("u1"))
+        _, second = asyncio.run(service.rotate(first))
+        # Jeton consommé il y a longtemps puis présenté à nouveau : vol probable
+        tokens.by_token(first)["used_at"] = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+        assert rotate_error(service, first) == "reused"
+        assert all(doc["revoked"] for doc in tokens.docs)
+        assert rotate_error(service, second) == "reused"
+        assert service.stats()["reuse_detected"] == 2
+
+    def test_expired_token_rejected(self):
+        tokens = Tokens()
+        service = RefreshTokenService(tokens)
+        raw = asyncio.run(service.issue("u1"))
+        tokens.by_token(raw)["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        assert rotate_error(service, raw) == "expired"
+        assert len(tokens.docs) == 1
+
+    def test_concurrent_refresh_keeps_family(self):
+        """Two tabs refreshing with the same token: the loser gets a 401, no device is logged out"""
+        tokens = Tokens()
+        service = RefreshTokenService(tokens, reuse_grace_seconds=10)
+        raw = asyncio.run(service.issue("u1"))
+
+        async def scenario():
+            return await asyncio.gather(service.rotate(raw), service.rotate(raw), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        winners = [r for r in results if not isinstance(r, Exception)]
+        losers = [r for r in results if isinstance(r, RefreshTokenError)]
+        assert len(winners) == 1 and [e.reason for e in losers] == ["concurrent"]
+        assert not any(doc["revoked"] for doc in tokens.docs)
+        # Le jeton du gagnant reste utilisable
+        assert asyncio.run(service.rotate(winners[0][1]))[0] == "u1"
+        assert service.stats()["concurrent_refreshes"] == 1
@@ -0,0 +1,133 @@
+"""
+Unit Tests for date storage (backend/storage_codec.py, backend/migrate_dates_to_bson.py)
+Tests: ISO strings and naive datetimes normalized to UTC, resumable batch migration of string dates
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import migrate_dates_to_bson
+from migrate_dates_to_bson import migrate_collection
+from storage_codec import DATE_FIELDS, to_datetime
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field])
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs[:length]]
+
+
+class Collection:
+    """In-memory stand-in supporting the migration's $or/$type and _id range filters"""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+
+    def _match(self, doc, query):
+        if "$and" in query:
+            return all(self._match(doc, part) for part in query["$and"])
+        if "$or" in query:
+            return any(self._match(doc, part) for part in query["$or"])
+        for field, condition in query.items():
+            value = doc.get(field)
+            if isinstance(condition, dict):
+                if "$type" in condition and not isinstance(value, str):
+                    return False
+                if "$gt" in condition and not (value is not None and value > condition["$gt"]):
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if self._match(d, query))
+
+    def find(self, query, projection=None):
+        return Cursor([d for d in self.docs if self._match(d, query)])
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            for doc in self.docs:
+                if doc["_id"] == operation._filter["_id"]:
+                    doc.update(operation._doc["$set"])
+        return SimpleNamespace(modified_count=len(operations))
+
+    async def find_one(self, query):
+        return next((dict(d) for d in self.docs if self._match(d, query)), None)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if self._match(d, query)), None)
+        if doc is None:
+            doc = dict(query)
+            self.docs.append(doc)
+        doc.update(update["$set"])
+
+
+class Database(dict):
+    """db[name] and db.name both resolve to the collection"""
+
+    __getattr__ = dict.__getitem__
+
+
+class TestToDatetime:
+    """Stored dates normalized to aware UTC datetimes"""
+
+    def test_iso_strings_and_naive_datetimes(self):
+        expected = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+        assert to_datetime("2024-03-01T12:30:00Z") == expected
+        assert to_datetime("2024-03-01T14:30:00+02:00") == expected
+        assert to_datetime(datetime(2024, 3, 1, 12, 30)) == expected
+        assert to_datetime(expected.astimezone(timezone(timedelta(hours=-5)))).tzinfo == timezone.utc
+
+    def test_unreadable_values(self):
+        assert to_datetime(None) is None
+        assert to_datetime("pas une date") is None
+        assert to_datetime(42) is None
+
+    def test_quiz_updated_at_is_migrated(self):
+        assert "updated_at" in DATE_FIELDS["quizzes"]
+
+
+class TestMigrateCollection:
+    """String dates rewritten as BSON datetimes, batch by batch with a checkpoint"""
+
+    def test_converts_strings_and_resumes_from_checkpoint(self, monkeypatch):
+        monkeypatch.setattr(migrate_dates_to_bson, "BATCH_SIZE", 2)
+        native = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        quizzes = Collection([
+            {"_id": 1, "created_at": "2024-01-01T00:00:00+00:00", "updated_at": native},
+            {"_id": 2, "created_at": native, "updated_at": "2024-01-02T00:00:00"},
+            {"_id": 3, "created_at": "illisible"},
+            {"_id": 4, "created_at": "2024-01-04T00:00:00Z", "updated_at": "2024-01-05T00:00:00Z"},
+        ])
+        db = Database(quizzes=quizzes, migrations=Collection())
+
+        assert asyncio.run(migrate_collection(db, "quizzes", ["created_at", "updated_at"], dry_run=True)) == 4
+        modified = asyncio.run(migrate_collection(db, "quizzes", ["created_at", "updated_at"]))
+
+        assert modified == 3
+        docs = {d["_id"]: d for d in quizzes.docs}
+        assert docs[1]["created_at"] == native and docs[2]["updated_at"] == datetime(2024, 1, 2, tzinfo=timezone.utc)
+        assert docs[4]["updated_at"] == datetime(2024, 1, 5, tzinfo=timezone.utc)
+        # Valeur illisible laissée telle quelle
+        assert docs[3]["created_at"] == "illisible"
+        checkpoint = db.migrations.docs[0]
+        assert checkpoint["last_id"] == 4 and checkpoint["completed"] is True
+
+        # Reprise : les documents déjà traités ne sont pas relus
+        quizzes.docs.append({"_id": 0, "created_at": "2024-01-06T00:00:00Z"})
+        assert asyncio.run(migrate_collection(db, "quizzes", ["created_at"])) == 0
@@ -0,0 +1,218 @@
+"""
+Unit Tests for the materialized student status (backend/student_status.py)
+Tests: inactivity / reminder state, one reminder per inactivity episode, incremental scan windows,
+ISO string dates, full rescan when the module catalog changes, scan aborted when the lease is lost
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from student_status import StudentStatusService
+
+NOW = datetime.now(timezone.utc)
+
+
+class ProgressCollection:
+    """In-memory stand-in for db.module_progress answering the completion aggregation"""
+
+    def __init__(self, completed):
+        self.completed = completed
+
+    def aggregate(self, pipeline):
+        user_ids = pipeline[0]["$match"]["user_id"]["$in"]
+
+        async def rows():
+            for user_id in user_ids:
+                if user_id in self.completed:
+                    yield {"_id": user_id, "n": self.completed[user_id]}
+        return rows()
+
+
+class UpsertCollection:
+    """In-memory stand-in keeping upserted documents by filter"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = 0
+        for op in operations:
+            key = tuple(sorted((k, str(v)) for k, v in op._filter.items()))
+            if key not in self.docs:
+                upserted += 1
+                self.docs[key] = {**op._filter, **op._doc.get("$setOnInsert", {})}
+            self.docs[key].update(op._doc.get("$set", {}))
+        return SimpleNamespace(upserted_count=upserted)
+
+
+class Catalog:
+    def __init__(self, version=1):
+        self.version = version
+
+    async def get(self):
+        return SimpleNamespace(total=3, version=self.version)
+
+
+class UserCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        self.docs.sort(key=lambda d: tuple(d[field] for field, _ in keys))
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs[:length]]
+
+
+class Users:
+    """In-memory db.users answering the full-rescan phase (has_purchased, keyset on id)"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        after = None
+        if "$and" in query:
+            query, keyset = query["$and"]
+            after = keyset["$or"][0]["id"]["$gt"]
+        assert query == {"has_purchased": True}
+        return UserCursor([d for d in self.docs if after is None or d["id"] > after])
+
+
+class JobState:
+    """Single job_state document; another worker takes the lease after ``lost_after`` saves"""
+
+    def __init__(self, doc, lost_after=None):
+        self.doc = doc
+        self.lost_after = lost_after
+        self.saves = 0
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.doc.update(update["$set"])
+        return dict(self.doc)
+
+    async def update_one(self, query, update):
+        self.saves += 1
+        if self.lost_after is not None and self.saves > self.lost_after:
+            self.doc["lease_owner"] = "other-worker"
+        if self.doc.get("lease_owner") != query["lease_owner"]:
+            return SimpleNamespace(matched_count=0)
+        for field, value in update.get("$set", {}).items():
+            *parents, leaf = field.split(".")
+            target = self.doc
+            for part in parents:
+                target = target[part]
+            target[leaf] = value
+        for field in update.get("$unset", {}):
+            self.doc.pop(field, None)
+        return SimpleNamespace(matched_count=1)
+
+
+def make_service(completed=None, users=(), job_state=None, catalog=None):
+    db = SimpleNamespace(
+        module_progress=ProgressCollection(completed or {}),
+        student_status=UpsertCollection(),
+        reminder_queue=UpsertCollection(),
+        users=Users(list(users)),
+        job_state=job_state,
+    )
+    return db, StudentStatusService(db, catalog or Catalog(), inactivity_days=10, chunk_size=2)
+
+
+def student(user_id, last_activity=None, created_at=None):
+    return {"id": user_id, "full_name": user_id, "email": f"{user_id}@example.com",
+            "created_at": created_at or NOW - timedelta(days=60), "last_activity": last_activity}
+
+
+class TestStudentStatus:
+    """Status rows and reminders written per batch"""
+
+    def test_inactivity_and_reminder_flags(self):
+        db, service = make_service({"done": 3, "idle": 1})
+        users = [
+            student("idle", last_activity=NOW - timedelta(days=11)),
+            student("done", last_activity=NOW - timedelta(days=30)),
+            student("active", last_activity=NOW - timedelta(days=2)),
+            student("never", created_at=NOW - timedelta(days=20)),
+        ]
+        asyncio.run(service.process_users(users))
+
+        rows = {doc["user_id"]: doc for doc in db.student_status.docs.values()}
+        assert rows["idle"]["needs_reminder"] and rows["idle"]["completed_modules"] == 1
+        # Formation terminée : inactif mais pas de relance
+        assert rows["done"]["is_inactive"] and not rows["done"]["needs_reminder"]
+        assert not rows["active"]["is_inactive"] and rows["active"]["inactive_since"] is None
+        # Jamais actif : l'inscription fait office de dernière activité
+        assert rows["never"]["needs_reminder"]
+        assert {doc["user_id"] for doc in db.reminder_queue.docs.values()} == {"idle", "never"}
+
+    def test_one_reminder_per_inactivity_episode(self):
+        db, service = make_service()
+        idle = student("idle", last_activity=NOW - timedelta(days=11))
+
+        async def scenario():
+            await service.process_users([idle])
+            await service.process_users([idle])
+            await service.process_users([{**idle, "last_activity": NOW - timedelta(days=10, hours=1)}])
+
+        asyncio.run(scenario())
+        assert len(db.reminder_queue.docs) == 2
+        assert service.stats()["reminders_enqueued"] == 2
+
+    def test_scan_windows(self):
+        _, service = make_service()
+        threshold = NOW - timedelta(days=10)
+        previous = threshold - timedelta(minutes=15)
+        phases = service._phases({"threshold": threshold, "prev_threshold": previous, "since": NOW - timedelta(minutes=15)})
+
+        assert phases[0] == {"field": "last_activity", "query": {
+            "has_purchased": True, "last_activity": {"$gte": previous, "$lt": threshold}}}
+        assert phases[1]["query"]["last_activity"] is None
+        assert phases[2]["query"]["last_activity"] == {"$gte": NOW - timedelta(minutes=15)}
+
+    def test_iso_string_dates(self):
+        db, service = make_service()
+        legacy = student("legacy", created_at=(NOW - timedelta(days=20)).isoformat())
+
+        asyncio.run(service.process_users([legacy]))
+
+        row = next(iter(db.student_status.docs.values()))
+        assert row["needs_reminder"]
+        assert row["created_at"] == NOW - timedelta(days=20)
+
+
+class TestScan:
+    """Resumable scan under a job_state lease"""
+
+    def previous_run(self, catalog_version):
+        threshold = NOW - timedelta(days=10, minutes=15)
+        return {"_id": "inactivity_scan", "threshold": threshold, "last_run_at": NOW - timedelta(minutes=15),
+                "catalog_version": catalog_version}
+
+    def test_catalog_change_rescans_every_student(self):
+        users = [student(f"s{i}", last_activity=NOW - timedelta(days=30)) for i in range(3)]
+        job_state = JobState(self.previous_run(catalog_version=1))
+        db, service = make_service(users=users, job_state=job_state, catalog=Catalog(version=2))
+
+        assert asyncio.run(service.scan()) == 3
+        assert len(db.student_status.docs) == 3
+        assert job_state.doc["catalog_version"] == 2 and "run" not in job_state.doc
+
+    def test_lost_lease_aborts_scan(self):
+        users = [student(f"s{i}", last_activity=NOW - timedelta(days=30)) for i in range(5)]
+        # Bail repris après l'enregistrement du premier lot
+        job_state = JobState(self.previous_run(catalog_version=1), lost_after=2)
+        db, service = make_service(users=users, job_state=job_state, catalog=Catalog(version=2))
+
+        assert asyncio.run(service.scan()) is None
+        assert len(db.student_status.docs) == 4
+        assert job_state.doc["lease_owner"] == "other-worker" and service.stats()["scans"] == 0
@@ -0,0 +1,121 @@
+"""
+Unit Tests for claims-only authorization (backend/token_claims.py)
+Tests: claims trusted while the token version is current, stale is_admin / has_purchased rebuilt after a bump,
+version cache invalidated by forget, stale tokens rejected where the full user is loaded
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from token_claims import TokenVersions, claims_from_payload, ensure_admin, ensure_current_version
+
+
+class Users:
+    """In-memory stand-in for db.users counting reads"""
+
+    def __init__(self, **docs):
+        self.docs = docs
+        self.reads = 0
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        return self.docs.get(query["id"])
+
+
+def make_db(**user):
+    doc = {"id": "u1", "email": "eleve@example.com", "is_admin": False, "has_purchased": False, "token_version": 0, **user}
+    return SimpleNamespace(users=Users(u1=doc))
+
+
+def payload(**claims):
+    return {"sub": "eleve@example.com", "user_id": "u1", "is_admin": False, "has_purchased": False, "token_version": 0, **claims}
+
+
+def loader(db):
+    async def load_user(token_payload):
+        return SimpleNamespace(**db.users.docs[token_payload["user_id"]])
+    return load_user
+
+
+class TestClaimsFromPayload:
+    """Authorization from token claims, guarded by token_version"""
+
+    def test_current_claims_trusted_without_user_load(self):
+        db = make_db(is_admin=True, token_version=3)
+
+        async def fail_load(token_payload):
+            raise AssertionError("user should not be loaded")
+
+        claims = asyncio.run(claims_from_payload(payload(is_admin=True, token_version=3), TokenVersions(db), fail_load))
+        assert claims.is_admin is True and claims.token_version == 3
+        assert ensure_admin(claims) is claims
+
+    def test_stale_admin_claim_rejected_after_version_bump(self):
+        # Droits admin retirés : token_version incrémenté en base
+        db = make_db(is_admin=False, token_version=1)
+        versions = TokenVersions(db)
+
+        claims = asyncio.run(claims_from_payload(payload(is_admin=True, token_version=0), versions, loader(db)))
+
+        assert claims.is_admin is False and claims.token_version == 1
+        with pytest.raises(HTTPException) as excinfo:
+            ensure_admin(claims)
+        assert excinfo.value.status_code == 403
+
+    def test_stale_has_purchased_claim_rebuilt_from_user(self):
+        db = make_db(has_purchased=True, token_version=1)
+
+        claims = asyncio.run(claims_from_payload(payload(has_purchased=False, token_version=0), TokenVersions(db), loader(db)))
+
+        assert claims.has_purchased is True
+
+    def test_unknown_user_is_unauthorized(self):
+        db = SimpleNamespace(users=Users())
+
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(claims_from_payload(payload(), TokenVersions(db), loader(db)))
+        assert excinfo.value.status_code == 401
+
+
+class TestTokenVersions:
+    """Current token versions cached, dropped by forget after a bump"""
+
+    def test_forget_invalidates_cached_version(self):
+        db = make_db(is_admin=True)
+        versions = TokenVersions(db, ttl=60)
+
+        async def scenario():
+            await versions.get("u1")
+            # Rétrogradation : la version en cache reste l'ancienne tant qu'on ne l'oublie pas
+            db.users.docs["u1"].update(is_admin=False, token_version=1)
+            cached = await claims_from_payload(payload(is_admin=True), versions, loader(db))
+            versions.forget("u1")
+            refreshed = await claims_from_payload(payload(is_admin=True), versions, loader(db))
+            return cached, refreshed
+
+        cached, refreshed = asyncio.run(scenario())
+        assert cached.is_admin is True
+        assert refreshed.is_admin is False and refreshed.token_version == 1
+        assert db.users.reads == 2
+
+
+class TestEnsureCurrentVersion:
+    """get_current_user refuses tokens issued before a rights change"""
+
+    def test_current_and_legacy_tokens_accepted(self):
+        versions = TokenVersions(make_db(token_version=2))
+        asyncio.run(ensure_current_version(payload(token_version=2), versions))
+        # Ancien jeton sans user_id : rien à comparer
+        asyncio.run(ensure_current_version({"sub": "eleve@example.com"}, versions))
+
+    def test_stale_token_rejected(self):
+        versions = TokenVersions(make_db(token_version=2))
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(ensure_current_version(payload(token_version=1), versions))
+        assert excinfo.value.status_code == 401 and excinfo.value.detail == "Token revoked"
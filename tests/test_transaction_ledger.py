@@ -0,0 +1,111 @@
+"""
+Unit Tests for the transaction ledger (backend/transaction_ledger.py)
+Tests: status/period filter, batched user join, CSV and NDJSON export streams
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import transaction_ledger
+from transaction_ledger import CSV_COLUMNS, export_transactions, ledger_filter
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=order < 0)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+
+class Users:
+    """In-memory stand-in for db.users counting $in lookups"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.lookups = 0
+
+    def find(self, query, projection=None):
+        self.lookups += 1
+        return Cursor([d for d in self.docs if d["id"] in query["id"]["$in"]])
+
+
+class Transactions:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return Cursor(list(self.docs))
+
+
+def make_db():
+    users = Users([
+        {"id": "u1", "full_name": "=1+1", "email": "u1@example.com"},
+        {"id": "u2", "full_name": "Élève Deux", "email": "u2@example.com"},
+    ])
+    transactions = Transactions([
+        {"id": f"t{i}", "created_at": START + timedelta(hours=i), "payment_status": "completed",
+         "amount": 49.0, "currency": "eur", "user_id": "u1" if i % 2 else "u2"}
+        for i in range(3)
+    ])
+    return SimpleNamespace(users=users, payment_transactions=transactions)
+
+
+async def collect(generator):
+    return [chunk async for chunk in generator]
+
+
+class TestLedgerFilter:
+    """Status and creation period, naive dates read as UTC"""
+
+    def test_filter(self):
+        assert ledger_filter() == {}
+        query = ledger_filter("completed", date_from=datetime(2024, 1, 1), date_to=START + timedelta(days=31))
+        assert query == {"payment_status": "completed", "created_at": {"$gte": START, "$lt": START + timedelta(days=31)}}
+
+
+class TestExport:
+    """Exports joined with users one batch at a time"""
+
+    def test_csv_export_escapes_user_names(self, monkeypatch):
+        monkeypatch.setattr(transaction_ledger, "EXPORT_BATCH_SIZE", 2)
+        db = make_db()
+
+        chunks = asyncio.run(collect(export_transactions(db, {}, "csv")))
+
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8").lstrip("\ufeff")), delimiter=";"))
+        assert rows[0] == CSV_COLUMNS
+        assert [row[0] for row in rows[1:]] == ["t2", "t1", "t0"]
+        names = {row[0]: row[CSV_COLUMNS.index("user_full_name")] for row in rows[1:]}
+        assert names == {"t2": "Élève Deux", "t1": "'=1+1", "t0": "Élève Deux"}
+        assert rows[1][CSV_COLUMNS.index("created_at")] == (START + timedelta(hours=2)).isoformat()
+        # Une jointure par lot, pas par transaction
+        assert db.users.lookups == 2
+
+    def test_ndjson_export(self):
+        chunks = asyncio.run(collect(export_transactions(make_db(), {}, "ndjson")))
+
+        lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        assert [line["id"] for line in lines] == ["t2", "t1", "t0"]
+        assert lines[1]["user"] == {"full_name": "=1+1", "email": "u1@example.com"}
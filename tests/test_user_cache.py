@@ -0,0 +1,97 @@
+"""
+Unit Tests for the authenticated-user cache (backend/user_cache.py)
+Tests: hit/miss counters, invalidation, stale has_purchased after invalidation, per-user generations
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from user_cache import UserCache
+
+
+def make_user(has_purchased=False):
+    return SimpleNamespace(id="user-1", email="eleve@example.com", has_purchased=has_purchased)
+
+
+class TestUserCache:
+    """In-process TTL/LRU cache of validated users"""
+
+    def test_hit_and_miss_counters(self):
+        cache = UserCache(max_size=10, ttl=60)
+        assert cache.get(email="eleve@example.com") is None
+        cache.set(make_user(), cache.generation())
+        assert cache.get(email="eleve@example.com").id == "user-1"
+        assert cache.get(user_id="user-1").email == "eleve@example.com"
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_invalidate_by_id_drops_email_lookup(self):
+        cache = UserCache(max_size=10, ttl=60)
+        cache.set(make_user(), cache.generation())
+        cache.invalidate(user_id="user-1")
+        assert cache.get(email="eleve@example.com") is None
+        assert cache.get(user_id="user-1") is None
+
+    def test_invalidate_many_bumps_generation_once(self):
+        cache = UserCache(max_size=10, ttl=60)
+        cache.set(make_user(), cache.generation())
+        generation = cache.generation()
+        cache.invalidate_many(["user-1", "user-2"])
+        assert cache.get(email="eleve@example.com") is None
+        assert cache.generation() == generation + 1
+
+    def test_stale_has_purchased_never_outlives_invalidation(self):
+        """A read started before the payment update must not repopulate the cache"""
+        cache = UserCache(max_size=10, ttl=60)
+        cache.set(make_user(has_purchased=False), cache.generation())
+
+        # Request A misses after an eviction and starts reading the old document
+        cache.invalidate(user_id="user-1")
+        generation_before_read = cache.generation()
+        stale_user = make_user(has_purchased=False)
+
+        # Payment completes meanwhile: DB updated, then cache invalidated
+        cache.invalidate(user_id="user-1")
+
+        # Request A finishes with the stale document: the insert is refused
+        assert cache.set(stale_user, generation_before_read) is False
+        assert cache.get(user_id="user-1") is None
+
+        # The next reader sees the fresh document
+        cache.set(make_user(has_purchased=True), cache.generation())
+        assert cache.get(email="eleve@example.com").has_purchased is True
+
+    def test_other_users_invalidation_does_not_block_fill(self):
+        """A heartbeat or admin edit on one user must not refuse another user's cache fill"""
+        cache = UserCache(max_size=10, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(user_id="user-2")
+        cache.invalidate_many(["user-3", "user-4"])
+        assert cache.set(make_user(), generation) is True
+        assert cache.get(user_id="user-1") is not None
+
+    def test_invalidation_by_email_refuses_fill(self):
+        cache = UserCache(max_size=10, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(email="eleve@example.com")
+        assert cache.set(make_user(), generation) is False
+
+    def test_forgotten_invalidations_refuse_older_reads(self):
+        """Pruned invalidation marks fall back to refusing any read that predates them"""
+        cache = UserCache(max_size=1, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(user_id="user-1")
+        for i in range(3):
+            cache.invalidate(user_id=f"other-{i}")
+        assert cache.set(make_user(), generation) is False
+        assert cache.set(make_user(), cache.generation()) is True
+
+    def test_lru_bound(self):
+        cache = UserCache(max_size=2, ttl=60)
+        for i in range(3):
+            cache.set(SimpleNamespace(id=f"u{i}", email=f"u{i}@example.com"), cache.generation())
+        assert cache.stats()["size"] == 2
+        assert cache.get(user_id="u0") is None
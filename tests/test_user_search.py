@@ -0,0 +1,35 @@
+"""
+Unit Tests for indexed admin user search (backend/user_search.py)
+Tests: accent folding, search keys / trigrams, generated query shape
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from user_search import normalize, search_fields, search_query
+
+
+class TestUserSearch:
+    """Search keys maintained on write and matched through an index"""
+
+    def test_normalize_folds_accents(self):
+        assert normalize("Émilie  Lefèvre-Çelik") == "emilie lefevre celik"
+
+    def test_search_fields(self):
+        fields = search_fields("Émilie Lefèvre", "emilie.lefevre@example.com", "milou")
+        assert {"emilie", "lefevre", "milou", "emilielefevre", "emilie.lefevre@example.com"} <= set(fields["search_keys"])
+        # Infix search "fev" is covered by the trigrams
+        assert "fev" in fields["search_grams"]
+
+    def test_query_uses_anchored_prefix_and_trigrams(self):
+        assert search_query("Lé") == {"search_keys": {"$regex": "^le"}}
+        assert search_query("févr") == {"$or": [
+            {"search_keys": {"$regex": "^fevr"}},
+            {"search_grams": {"$all": ["fev", "evr"]}},
+        ]}
+        assert search_query("Émilie L")["$and"][1] == {"search_keys": {"$regex": "^l"}}
+
+    def test_email_query(self):
+        assert search_query("emilie.l@ex") == {"search_keys": {"$regex": r"^emilie\.l@ex"}}
+        assert search_query("  ") is None
@@ -0,0 +1,76 @@
+"""
+Unit Tests for write-behind module view counters (backend/view_counter.py)
+Tests: views aggregated into one bulk_write, counts kept when a flush fails, a single early flush in flight
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pymongo.errors import AutoReconnect
+
+from view_counter import ViewCounter
+
+
+class ModulesCollection:
+    """In-memory stand-in for db.modules recording bulk writes"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.fail:
+            raise AutoReconnect("primary stepped down")
+        self.batches.append({op._filter["id"]: op._doc["$inc"]["views_count"] for op in operations})
+
+
+class TestViewCounter:
+    """Views are counted in memory and flushed in batches"""
+
+    def test_flush_aggregates_views_per_module(self):
+        collection = ModulesCollection()
+        counter = ViewCounter(collection)
+
+        async def scenario():
+            for _ in range(3):
+                counter.record("m1")
+            counter.record("m2")
+            assert await counter.flush() == 4
+
+        asyncio.run(scenario())
+        assert collection.batches == [{"m1": 3, "m2": 1}]
+        assert counter.stats()["pending_views"] == 0
+
+    def test_failed_flush_keeps_counts(self):
+        collection = ModulesCollection(fail=True)
+        counter = ViewCounter(collection)
+
+        async def scenario():
+            counter.record("m1")
+            assert await counter.flush() == 0
+            counter.record("m1")
+            collection.fail = False
+            await counter.stop()
+
+        asyncio.run(scenario())
+        assert collection.batches == [{"m1": 2}]
+        assert counter.stats()["failed_flushes"] == 1
+
+    def test_burst_starts_a_single_early_flush(self):
+        collection = ModulesCollection()
+        counter = ViewCounter(collection, max_pending=2)
+
+        async def scenario():
+            for _ in range(10):
+                counter.record("m1")
+            flush_task = counter._flush_task
+            assert flush_task is not None
+            await flush_task
+            assert counter._flush_task is flush_task
+            await counter.stop()
+
+        asyncio.run(scenario())
+        assert collection.batches == [{"m1": 10}]
+        assert counter.stats()["flushes"] == 1